@@ -0,0 +1,369 @@
+# ======== EXCEPCIONES DE SELENIUM ========
+from selenium.common.exceptions import JavascriptException
+
+# ======== LOCALIZADORES MULTI-IDIOMA ========
+from common.locators import LocatorGroup
+
+
+# Instala (una sola vez por diálogo) un MutationObserver que encola en el navegador las
+# filas nuevas a medida que Instagram las agrega. Las filas ya presentes se encolan al
+# instalarlo; cada botón se marca con `data-bot-row` y se recuerda en `stream.buttons`.
+_STREAM_INSTALL_JS = """
+const [texts, startId] = [arguments[0], arguments[1]];
+const dlg = document.querySelector("div[role='dialog']");
+if (!dlg) { return false; }
+if (dlg.__botStream) { return true; }
+const stream = { queue: [], buttons: new Map(), rowEls: new Map(), drained: [], nextId: startId, waiters: [] };
+const classify = (btn) => {
+    if (btn.dataset.botRow) { return; }
+    const label = (btn.innerText || '').trim();
+    const followLabel = texts.follow.find((t) => t === label);
+    if (!followLabel && !texts.following.includes(label)) { return; }
+    btn.dataset.botRow = String(stream.nextId++);
+    let node = btn.parentElement, link = null;
+    while (node && node !== dlg && !(link = node.querySelector("a[href^='/']"))) { node = node.parentElement; }
+    const href = link ? link.getAttribute('href') : '';
+    // Fila completa: el ancestro más alto que solo contiene a esta fila (para poder podarla)
+    let rowEl = node && node !== dlg ? node : btn;
+    while (rowEl.parentElement && rowEl.parentElement !== dlg && rowEl.parentElement.childElementCount === 1) {
+        rowEl = rowEl.parentElement;
+    }
+    stream.buttons.set(btn.dataset.botRow, btn);
+    stream.rowEls.set(btn.dataset.botRow, rowEl);
+    stream.queue.push({
+        id: btn.dataset.botRow,
+        username: href.split('/').filter(Boolean)[0] || null,
+        state: followLabel ? 'follow' : 'following',
+        label: label,
+    });
+};
+const scan = (root) => {
+    if (root.tagName === 'BUTTON') { classify(root); }
+    for (const btn of root.querySelectorAll('button')) { classify(btn); }
+};
+stream.observer = new MutationObserver((mutations) => {
+    for (const m of mutations) {
+        for (const node of m.addedNodes) { if (node.nodeType === 1) { scan(node); } }
+    }
+    if (stream.queue.length) { stream.waiters.splice(0).forEach((wake) => wake()); }
+});
+stream.observer.observe(dlg, { childList: true, subtree: true });
+scan(dlg);
+dlg.__botStream = stream;
+return true;
+"""
+
+# Entrega hasta `max` filas de la cola. Si quedan pocas, scrollea para que Instagram cargue
+# más; si la cola está vacía, espera (hasta `waitMs`) a que el observer encole filas nuevas.
+_STREAM_DRAIN_JS = """
+const [max, lowWater, scrollBy, waitMs, done] = [arguments[0], arguments[1], arguments[2], arguments[3], arguments[arguments.length - 1]];
+const dlg = document.querySelector("div[role='dialog']");
+if (!dlg || !dlg.__botStream) { done(null); return; }
+const stream = dlg.__botStream;
+let scrolled = false;
+if (stream.queue.length <= lowWater) {
+    dlg.dispatchEvent(new WheelEvent('wheel', { deltaY: scrollBy, bubbles: true, cancelable: true }));
+    scrolled = true;
+}
+// Una sola entrega por llamada: si venció la espera, el waiter se quita de la lista para que
+// el observer no le pase filas a un callback que Python ya no escucha
+let settled = false;
+const finish = () => {
+    if (settled) { return; }
+    settled = true;
+    const rows = stream.queue.splice(0, max);
+    for (const row of rows) { stream.drained.push(row.id); }
+    done({ rows: rows, queued: stream.queue.length, scrolled: scrolled });
+};
+if (stream.queue.length) { finish(); return; }
+const wake = () => { clearTimeout(timer); finish(); };
+const timer = setTimeout(() => {
+    const index = stream.waiters.indexOf(wake);
+    if (index !== -1) { stream.waiters.splice(index, 1); }
+    finish();
+}, waitMs);
+stream.waiters.push(wake);
+"""
+
+# Desconecta del DOM las filas ya procesadas que quedaron por encima del área visible del
+# contenedor con scroll, y corrige `scrollTop` por la altura quitada para que la posición
+# (y la carga de más filas al llegar al final) no cambie. Se conservan las `keep` más recientes
+# y la primera fila entregada que todavía no se procesó frena la poda (y todas las siguientes).
+_PRUNE_JS = """
+const [keep, processed] = [arguments[0], arguments[1] || []];
+const dlg = document.querySelector("div[role='dialog']");
+if (!dlg || !dlg.__botStream) { return null; }
+const stream = dlg.__botStream;
+stream.done = stream.done || new Set();
+for (const id of processed) { stream.done.add(id); }
+if (!stream.scroller || !stream.scroller.isConnected) {
+    stream.scroller = null;
+    for (const el of dlg.querySelectorAll('*')) {
+        const overflow = getComputedStyle(el).overflowY;
+        if ((overflow === 'auto' || overflow === 'scroll') && el.scrollHeight > el.clientHeight) { stream.scroller = el; break; }
+    }
+}
+const scroller = stream.scroller;
+if (!scroller) { return { removed: 0, height: 0 }; }
+const viewTop = scroller.getBoundingClientRect().top;
+let removed = 0, height = 0;
+while (stream.drained.length > keep) {
+    const id = stream.drained[0];
+    if (!stream.done.has(id)) { break; }
+    const rowEl = stream.rowEls.get(id);
+    if (rowEl && rowEl.isConnected) {
+        const rect = rowEl.getBoundingClientRect();
+        if (rect.bottom > viewTop) { break; }
+        height += rect.height;
+        rowEl.remove();
+        removed++;
+    }
+    stream.drained.shift();
+    stream.done.delete(id);
+    stream.rowEls.delete(id);
+    stream.buttons.delete(id);
+}
+if (height) { scroller.scrollTop = Math.max(0, scroller.scrollTop - height); }
+return { removed: removed, height: height };
+"""
+
+# Para cada fila: scrollIntoView, pausa, click y clasificación del resultado. Si aparece
+# el popup "Dejar de seguir", se cierra con "Cancelar" dentro del mismo script.
+_SCROLL_AND_CLICK_JS = """
+const [rows, texts, done] = [arguments[0], arguments[1], arguments[arguments.length - 1]];
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+const findCancel = () => {
+    for (const dlg of document.querySelectorAll("div[role='dialog']")) {
+        for (const btn of dlg.querySelectorAll('button')) {
+            const label = (btn.innerText || '').trim();
+            const text = texts.cancel.find((t) => label.includes(t));
+            if (text) { btn.dataset.botCancel = text; return btn; }
+        }
+    }
+    return null;
+};
+(async () => {
+    const results = [];
+    const dlg = document.querySelector("div[role='dialog']");
+    const known = dlg && dlg.__botStream ? dlg.__botStream.buttons : new Map();
+    for (const row of rows) {
+        const btn = known.get(row.id) || document.querySelector(`[data-bot-row="${row.id}"]`);
+        known.delete(row.id);
+        if (!btn || !btn.isConnected) { results.push({ id: row.id, outcome: 'missing' }); continue; }
+        btn.scrollIntoView({ block: 'center' });
+        await sleep(row.before_ms);
+        const rect = btn.getBoundingClientRect();
+        const top = document.elementFromPoint(rect.left + rect.width / 2, rect.top + rect.height / 2);
+        if (top && top !== btn && !btn.contains(top)) {
+            const cancel = findCancel();
+            if (cancel) { cancel.click(); await sleep(row.after_ms); }
+            results.push({ id: row.id, outcome: cancel ? 'already_following' : 'intercepted',
+                           cancel: cancel ? cancel.dataset.botCancel : null });
+            continue;
+        }
+        btn.click();
+        let outcome = 'clicked', cancelText = null;
+        for (let waited = 0; waited < row.confirm_ms; waited += 100) {
+            await sleep(100);
+            const cancel = findCancel();
+            if (cancel) { cancelText = cancel.dataset.botCancel; cancel.click(); outcome = 'already_following'; break; }
+            const label = (btn.innerText || '').trim();
+            if (texts.following.includes(label)) { outcome = 'followed'; break; }
+        }
+        results.push({ id: row.id, outcome: outcome, cancel: cancelText });
+        await sleep(row.after_ms);
+    }
+    done(results);
+})().catch((e) => done({ error: String(e) }));
+"""
+
+# Botones del loop de follow según el idioma de la interfaz. Las plantillas XPath sirven
+# para buscarlos con `Locator`; dentro de los scripts por lotes se usan solo los textos,
+# ordenados según la caché de localizadores.
+FOLLOW_BUTTON = LocatorGroup(
+    "follow_button",
+    ("Seguir", "Follow", "Seguir de volta", "Follow Back", "Seguir también"),
+    "//div[@role='dialog']//button[normalize-space(.)='{text}']",
+)
+CANCEL_BUTTON = LocatorGroup(
+    "unfollow_cancel",
+    ("Cancelar", "Cancel"),
+    "//div[@role='dialog']//button[contains(., '{text}')]",
+)
+
+# Textos de los botones según el idioma de la interfaz
+DEFAULT_TEXTS = {
+    "follow": list(FOLLOW_BUTTON.variants),
+    "following": ["Siguiendo", "Following", "Seguindo", "Solicitado", "Requested", "Pendiente"],
+    "cancel": list(CANCEL_BUTTON.variants),
+}
+
+
+class BatchActions:
+    """
+    Primitivas agrupadas para el loop de follow: cada operación es un único round trip.
+
+    En lugar de `find_elements` + `execute_script(scrollIntoView)` + `click` por botón (y
+    volver a buscar el diálogo en cada vuelta), se usan tres operaciones:
+      - `stream_rows()`: generador de filas nuevas detectadas por un MutationObserver dentro del
+        diálogo; cada tanda se drena con un único script y solo se scrollea cuando la cola baja.
+      - `scroll_and_click()`: scroll, pausa, click y cierre del popup "Dejar de seguir" para
+        varias filas en un solo `execute_async_script`, con el resultado de cada una.
+      - `prune_rows()`: desconecta del DOM las filas ya procesadas que quedaron arriba.
+
+    Args:
+        driver (webdriver.Chrome): Navegador.
+        counter (CommandCounter, optional): Contador de comandos del driver (ver `common.roundtrips`).
+        texts (dict, optional): Textos de botones por idioma (`follow`, `following`, `cancel`).
+        locators (LocatorCache, optional): Caché de localizadores. Si se indica, los textos de
+            `follow` y `cancel` se prueban empezando por la última variante que coincidió, y cada
+            coincidencia se registra en la caché.
+
+    Attributes:
+        rows_processed (int): Filas accionadas con `scroll_and_click()`.
+        rows_pruned (int): Filas desconectadas del DOM con `prune_rows()`.
+    """
+
+    def __init__(self, driver, counter=None, texts=None, locators=None):
+        self.driver = driver
+        self.counter = counter
+        self.locators = locators
+        self.texts = dict(texts or DEFAULT_TEXTS)
+        if locators is not None:
+            self.texts["follow"] = locators.order(FOLLOW_BUTTON.name, self.texts["follow"])
+            self.texts["cancel"] = locators.order(CANCEL_BUTTON.name, self.texts["cancel"])
+        self.rows_processed = 0
+        self.rows_pruned = 0
+        self._start_id = 1
+        self._script_timeout = None
+        self._baseline = counter.total if counter is not None else 0
+
+    def stream_rows(self, batch_size=20, low_water=5, scroll_amount=900, wait=3, max_empty=10):
+        """
+        Genera tandas de filas nuevas del diálogo de seguidores.
+
+        Un MutationObserver instalado en `div[role='dialog']` encola del lado del navegador las
+        filas que Instagram agrega; cada vuelta drena la cola con un solo round trip. Las filas ya
+        entregadas no se vuelven a recorrer, así que el costo por vuelta no crece con la longitud
+        de la lista.
+
+        Args:
+            batch_size (int, optional): Filas máximas por tanda.
+            low_water (int, optional): Con esta cantidad de filas (o menos) en cola se scrollea
+                para cargar más.
+            scroll_amount (int, optional): `deltaY` del WheelEvent.
+            wait (float, optional): Segundos máximos esperando filas nuevas con la cola vacía.
+            max_empty (int, optional): Esperas vacías seguidas antes de dar la lista por terminada.
+
+        Yields:
+            list[dict]: Filas `{"id", "username", "state", "label"}` (`state` es `follow` o
+            `following`, según el botón de la fila).
+        """
+        if not self.driver.execute_script(_STREAM_INSTALL_JS, self.texts, self._start_id):
+            return
+
+        needed = wait + 10
+        if self._script_timeout is None or self._script_timeout < needed:
+            self.driver.set_script_timeout(needed)
+            self._script_timeout = needed
+
+        empty_runs = 0
+        while empty_runs < max_empty:
+            result = self.driver.execute_async_script(
+                _STREAM_DRAIN_JS, batch_size, low_water, scroll_amount, int(wait * 1000)
+            )
+            if result is None:
+                return  # El diálogo se cerró
+            rows = result["rows"]
+            if not rows:
+                empty_runs += 1
+                continue
+            empty_runs = 0
+            self._record_follow_label(rows)
+            yield rows
+
+    def _record_follow_label(self, rows):
+        if self.locators is None:
+            return
+        labels = [row["label"] for row in rows if row["state"] == "follow"]
+        if labels:
+            label = max(set(labels), key=labels.count)
+            self.locators.record(FOLLOW_BUTTON.name, label, first_try=label == self.texts["follow"][0])
+
+    def prune_rows(self, keep=10, processed=()):
+        """
+        Quita del DOM las filas ya procesadas que quedaron arriba del área visible.
+
+        En sesiones largas cada fila cargada queda en el DOM y la memoria de la página crece.
+        Las filas podadas se desconectan y se descuenta su altura de `scrollTop`, así el
+        contenedor sigue scrolleando y cargando filas nuevas normalmente. Solo se quitan filas
+        marcadas como procesadas (en esta llamada o en anteriores): una fila entregada por
+        `stream_rows()` que todavía no se accionó nunca se desconecta.
+
+        Args:
+            keep (int, optional): Filas entregadas más recientes que se conservan siempre.
+            processed (Iterable[str], optional): Ids de filas ya resueltas (accionadas o salteadas).
+
+        Returns:
+            int: Filas quitadas en esta llamada.
+        """
+        result = self.driver.execute_script(_PRUNE_JS, keep, list(processed))
+        if not result:
+            return 0
+        self.rows_pruned += result["removed"]
+        return result["removed"]
+
+    def scroll_and_click(self, rows, before_ms, after_ms, confirm_ms=1500):
+        """
+        Acciona varias filas en un único round trip.
+
+        Args:
+            rows (list[dict]): Filas devueltas por `stream_rows()`.
+            before_ms (list[int]): Pausa entre el scroll y el click de cada fila (ms).
+            after_ms (list[int]): Pausa después de cada click (ms).
+            confirm_ms (int, optional): Tiempo máximo esperando que el botón cambie de estado.
+
+        Returns:
+            list[dict]: `{"id", "outcome", "cancel"}` por fila, con `outcome` en `followed`,
+            `clicked` (sin confirmación visible), `already_following`, `intercepted` o `missing`,
+            y `cancel` con el texto del botón "Cancelar" usado (si hubo popup).
+
+        Raises:
+            JavascriptException: Si el script falló dentro de la página.
+            TimeoutException: Si el navegador no respondió dentro del timeout del script.
+        """
+        if not rows:
+            return []
+        payload = [
+            {"id": row["id"], "before_ms": int(b), "after_ms": int(a), "confirm_ms": confirm_ms}
+            for row, b, a in zip(rows, before_ms, after_ms)
+        ]
+
+        # El timeout de scripts asíncronos tiene que cubrir todas las pausas del lote
+        needed = (sum(p["before_ms"] + p["after_ms"] + confirm_ms for p in payload) / 1000) + 10
+        if self._script_timeout is None or self._script_timeout < needed:
+            self.driver.set_script_timeout(needed)
+            self._script_timeout = needed
+
+        results = self.driver.execute_async_script(_SCROLL_AND_CLICK_JS, payload, self.texts)
+        if isinstance(results, dict) and "error" in results:
+            raise JavascriptException(results["error"])
+        self.rows_processed += len(results)
+        if self.locators is not None:
+            for result in results:
+                if result.get("cancel"):
+                    self.locators.record(
+                        CANCEL_BUTTON.name, result["cancel"], first_try=result["cancel"] == self.texts["cancel"][0]
+                    )
+        return results
+
+    def round_trips_per_row(self):
+        """
+        Round trips de WebDriver por fila procesada desde que se creó el objeto.
+
+        Returns:
+            float | None: Promedio, o None si no hay contador o todavía no se procesaron filas.
+        """
+        if self.counter is None or not self.rows_processed:
+            return None
+        return (self.counter.total - self._baseline) / self.rows_processed
@@ -1,13 +1,28 @@
 # ======== LIBRERÍAS ESTÁNDAR DE PYTHON ========
 import os                                                               # Para manejar rutas de archivos y variables de entorno
-import time                                                             # Para pausas temporales (sleep) en flujos controlados
-import random
+import sys
+import time
+from collections import deque
+from pathlib import Path
 from dotenv import load_dotenv                                          # Para leer las credenciales desde un archivo .env (buena práctica)
 
-# ======== SELENIUM CORE ========
-from selenium import webdriver                                          # Núcleo para controlar el navegador
-from selenium.webdriver.chrome.service import Service                   # Maneja el proceso de ChromeDriver
-from selenium.webdriver.chrome.options import Options                   # Permite configurar opciones del navegador
+# Permite importar el paquete compartido `common` al ejecutar `python main.py` desde esta carpeta
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# ======== DRIVER COMPARTIDO ========
+from common.browser_supervisor import get_supervisor                    # Plazos duros, reciclado y procesos huérfanos
+from common.driver_pool import NO_PASSWORD_MANAGER_PREFS, build_chrome_options, get_pool
+from common.profiles import get_profiles                                # Perfil base clonado por navegador
+from common.readiness import Delay, Readiness                          # Esperas por eventos y pausas con nombre
+from common.roundtrips import install_counter                           # Conteo de comandos enviados a ChromeDriver
+from common.locators import Locator, LocatorCache, LocatorGroup         # Variantes multi-idioma en una sola consulta
+from common.page_metrics import PageMetricsSampler                      # Heap JS, nodos del DOM y latencia de consultas
+from common.tracing import Tracer, traced                               # Spans por paso (tiempo real, CPU, comandos)
+
+# ======== ACCIONES AGRUPADAS ========
+from batch_actions import BatchActions                                  # Un round trip por operación del loop de follow
+from processed_index import ProcessedIndex                              # Cuentas ya procesadas en ejecuciones anteriores
+from session_store import SessionStore                                  # Sesión autenticada cifrada entre ejecuciones
 
 # ======== LOCALIZACIÓN DE ELEMENTOS ========
 from selenium.webdriver.common.by import By                             # Para encontrar elementos (por ID, CSS, XPATH, etc.)
@@ -19,10 +34,77 @@ from selenium.webdriver.support import expected_conditions as EC        # Condic
 # ======== EXCEPCIONES DE SELENIUM ========
 from selenium.common.exceptions import (
     NoSuchElementException,
-    ElementClickInterceptedException,
-    StaleElementReferenceException,
-    TimeoutException
+    TimeoutException,
+    WebDriverException
+)
+
+# Navegadores que el pool mantiene calientes dentro del proceso
+POOL_SIZE = int(os.getenv("INSTAGRAM_POOL_SIZE", "1"))
+# Perfil de Chrome: base del que se clona cada navegador (o carpeta fija con INSTAGRAM_PROFILE_MODE=persistent)
+PROFILE_DIR = os.getenv("INSTAGRAM_PROFILE_DIR", str(Path(__file__).resolve().parent / "chrome_profile_instagram"))
+
+# Sitio al que apunta el bot (se puede reemplazar por un fixture local, ver `bench/`)
+INSTAGRAM_BASE_URL = os.getenv("INSTAGRAM_BASE_URL", "https://www.instagram.com").rstrip("/")
+
+# Perfil cuyos seguidores se recorren, y carpeta con el índice de cuentas ya procesadas por perfil
+TARGET_PROFILE = os.getenv("INSTAGRAM_TARGET", "chefsteps")
+PROCESSED_DIR = os.getenv("INSTAGRAM_PROCESSED_DIR", str(Path(__file__).resolve().parent / "processed"))
+
+# Archivo cifrado con la sesión autenticada (cookies + localStorage) para saltear el login
+SESSION_PATH = os.getenv("INSTAGRAM_SESSION_PATH", str(Path(__file__).resolve().parent / "session.bin"))
+
+# Caché de la variante de cada botón multi-idioma que coincidió en ejecuciones anteriores
+LOCATOR_CACHE_PATH = os.getenv(
+    "INSTAGRAM_LOCATOR_CACHE", str(Path(__file__).resolve().parent / "locators.json")
+)
+
+# ======== POPUPS POST-LOGIN ========
+# Todas las variantes de cada popup se prueban juntas, con un único plazo total corto
+POPUP_SAVE_LOGIN = LocatorGroup(
+    "popup_save_login",
+    ("Agora não", "Not now", "Ahora no"),
+    "//div[@role='button' and contains(., '{text}')]",
+)
+POPUP_NOTIFICATIONS = LocatorGroup(
+    "popup_notifications",
+    ("Agora não", "Not now", "Ahora no", "Não agora", "No ahora"),
+    "//button[contains(., '{text}')] | //div[@role='button' and contains(., '{text}')]",
 )
+# Plazo total por popup (s): el primero también cubre la navegación posterior al login
+POPUP_TIMEOUT = 8
+POPUP_FOLLOWUP_TIMEOUT = 4
+
+# ======== PAUSAS Y ESPERAS ========
+# Pausas "humanas" que se mantienen a propósito para no parecer un bot (segundos, aleatorias)
+DELAY_BEFORE_CLICK = Delay("before_click", 0.3, 0.8)
+DELAY_AFTER_FOLLOW = Delay("after_follow", 1.2, 2.8)
+# Tiempo máximo esperando filas nuevas en el diálogo tras un scroll (s)
+DIALOG_SETTLE_TIMEOUT = 3
+
+# ======== MEMORIA DE LA PÁGINA ========
+# Poda opcional de las filas ya procesadas que quedaron arriba del área visible del diálogo
+PRUNE_ROWS = os.getenv("INSTAGRAM_PRUNE_ROWS", "0").lower() in ("1", "true", "yes")
+# Cada cuántas tandas se muestrea heap JS / nodos del DOM / latencia de consulta (0 = nunca)
+METRICS_EVERY = int(os.getenv("INSTAGRAM_METRICS_EVERY", "5"))
+
+
+def instagram_chrome_options(slot=0):
+    """
+    Construye las opciones de Chrome del bot de Instagram.
+
+    Usa la configuración común de `build_chrome_options` y deshabilita la ventana emergente
+    del navegador para guardar passwords.
+
+    Args:
+        slot (int): Índice del navegador dentro del pool. Cada slot arranca de un clon efímero
+            del perfil base (`common.profiles`, configurable con `INSTAGRAM_PROFILE_*`): la
+            sesión se restaura desde `SessionStore`, no desde el perfil.
+
+    Returns:
+        Options: Opciones del navegador.
+    """
+    profile_dir = get_profiles("instagram", "INSTAGRAM", PROFILE_DIR).prepare(slot)
+    return build_chrome_options(user_data_dir=profile_dir, prefs=NO_PASSWORD_MANAGER_PREFS)
 
 
 class InstFollower:
@@ -42,10 +124,26 @@ class InstFollower:
     Atributos:
         driver (webdriver.Chrome): Instancia principal del navegador controlado por Selenium.
         wait (WebDriverWait): Controlador de espera explícita para sincronizar interacciones dinámicas.
+        ready (Readiness): Esperas basadas en eventos; `ready.results` guarda cuánto tardó cada una.
+        commands (CommandCounter): Comandos de WebDriver enviados por este bot.
+        follow_stats (dict | None): Seguidos, filas procesadas, round trips por fila, filas podadas y
+            resumen de memoria de la página (`page_metrics`) del último `follow()`.
         instagram_user (str): Nombre de usuario obtenido desde el archivo `.env` (variable USERNAME).
         instagram_pass (str): Contraseña de la cuenta obtenida desde el archivo `.env` (variable PASSWORD).
+        target (str): Perfil cuyos seguidores se recorren (por defecto `INSTAGRAM_TARGET` o 'chefsteps').
+        base_url (str): Sitio al que apunta el bot (por defecto `INSTAGRAM_BASE_URL`).
+        processed (ProcessedIndex): Cuentas ya procesadas para `target` en ejecuciones anteriores.
+        sessions (SessionStore): Sesiones autenticadas guardadas (cifradas).
+        tracer (Tracer): Spans por paso con tiempo real, CPU y comandos WebDriver. Se habilita con
+            `INSTAGRAM_TRACE=1` o `INSTAGRAM_TRACE_DIR` (exporta JSON de Chrome trace).
+        locator (Locator): Búsqueda de botones multi-idioma; `locator.cache` recuerda la variante
+            que coincidió en cada grupo y su tasa de acierto.
+        startup_stats (dict | None): Modo de inicio (`restored` o `login`) y segundos hasta la primera acción.
+        pool (DriverPool): Pool compartido del que se tomó el navegador.
 
     Métodos:
+        start_session():
+            Restaura la sesión guardada o, si expiró, inicia sesión y la guarda.
         login():
             Inicia sesión en Instagram con las credenciales configuradas.
         skip_popups():
@@ -59,8 +157,8 @@ class InstFollower:
     Example:
         # >>> from instafollower import InstFollower
         # >>> bot = InstFollower()
-        # >>> bot.login()
-        Iniciando sesion en Instagram
+        # >>> bot.start_session()
+        Sesión restaurada: se omiten login y popups.
         # >>> bot.find_followers()
         Ventana de seguidores abierta correctamente.
         # >>> bot.follow()
@@ -68,36 +166,97 @@ class InstFollower:
         ✅ Finalizado. Total seguidos: 15
     """
 
-    def __init__(self):
+    def __init__(self, pool=None, target=None, base_url=None):
         # ====================== CONFIGURACIÓN ======================
+        self._started = time.monotonic()                                   # Inicio del arranque (para startup_stats)
         load_dotenv()  # Carga las variables desde .env
         self.instagram_user = os.getenv("INTRAGRAM_USERNAME")
         self.instagram_pass = os.getenv("INSTAGRAM_PASSWORD")
-
-        # Configuración del driver
-        service = Service()
-        options = Options()
-        options.add_argument("--start-maximized")                                   #Hace que Chrome se abra directamente maximizado (a pantalla completa)
-        options.add_argument("--disable-infobars")                                  #Oculta la barra de información “Chrome is being controlled by automated test software”
-        options.add_argument("--disable-extensions")                                #Desactiva todas las extensiones del navegador
-        options.add_argument("--disable-blink-features=AutomationControlled")       #Desactiva una API interna de Chrome llamada “AutomationControlled"
-        options.add_experimental_option(
-            "excludeSwitches",                                                #Elimina el switch interno --enable-automation al iniciar Chrome (deja rastros de
-            ["enable-automation"]                                             #automatizacon)
-        )
-        options.add_experimental_option(                                            #Deshabilita la extensión de automatización que Selenium inyecta automáticamente
-            "useAutomationExtension",
-            False
-        )
-        options.add_experimental_option("prefs", {                      #Deshabilita la ventana emergente del navegador para guardar passwords
-            "credentials_enable_service": False,
-            "profile.password_manager_enabled": False
-        })
-        options.add_experimental_option("detach", True)                 #Mantiene abierto el navegador
-
-        self.driver = webdriver.Chrome(service=service, options=options)
+        self.target = target or TARGET_PROFILE
+        self.base_url = (base_url or INSTAGRAM_BASE_URL).rstrip("/")
+        self.processed = ProcessedIndex(PROCESSED_DIR, self.target)
+        self.sessions = SessionStore(SESSION_PATH, base_url=self.base_url)
+        self.startup_stats = None
+        self._session_mode = None
+        self.tracer = Tracer.from_env("instagram", "INSTAGRAM")
+
+        # Configuración del driver: se toma un navegador caliente del pool compartido
+        self.pool = pool or get_pool("instagram", instagram_chrome_options, size=POOL_SIZE,
+                                     supervisor=get_supervisor("instagram", "INSTAGRAM"), origins=(self.base_url,))
+        with self.tracer.span("driver_warm"):
+            try:
+                self.pool.warm()                                            # Los INSTAGRAM_POOL_SIZE navegadores, en paralelo
+            except WebDriverException as e:
+                print(f"⚠️ No se pudieron precalentar todos los navegadores: {e.msg}")
+        with self.tracer.span("driver_lease") as span:
+            self._lease = self.pool.lease()
+            span.set(slot=self._lease.slot, acquire_ms=round(self._lease.acquire_ms, 1))
+        self.driver = self._lease.driver
         self.wait = WebDriverWait(self.driver, 15)
+        self.ready = Readiness(self.driver, timeout=15)                     # Esperas por eventos con tiempos registrados
+        self.commands = install_counter(self.driver)                        # Cuenta los round trips de WebDriver
+        self.tracer.counter = self.commands
+        self.locator = Locator(self.driver, LocatorCache(LOCATOR_CACHE_PATH), timeout=POPUP_TIMEOUT)
+        self.follow_stats = None
 
+    def close(self):
+        """
+        Devuelve el navegador al pool compartido.
+
+        El pool limpia cookies, pestañas y storage antes de prestarlo de nuevo, y cierra
+        los navegadores ociosos al terminar el proceso. Si las trazas están habilitadas, se
+        exportan las de esta ejecución. Con supervisor, la sesión cuenta como una ejecución del
+        navegador: si llegó a `INSTAGRAM_RECYCLE_RUNS` o `INSTAGRAM_RECYCLE_RSS_MB`, el pool lo
+        descarta en lugar de reutilizarlo.
+        """
+        self.locator.cache.save()
+        if self.pool.supervisor is not None:
+            self.pool.supervisor.end_run(self.driver)
+        self._lease.release()
+        self.tracer.flush()
+
+    @traced()
+    def start_session(self):
+        """
+        Deja el navegador con una sesión iniciada, evitando el login cuando es posible.
+
+        Si hay una sesión guardada, se restaura y se valida con una única request liviana;
+        si sigue vigente se omiten `login()` y `skip_popups()`. Si expiró (o no hay ninguna),
+        se hace el login completo y se guarda la nueva sesión cifrada.
+
+        Returns:
+            str: `"restored"` si se reutilizó la sesión guardada, `"login"` si hubo que iniciar sesión.
+        """
+        if not self.sessions.available:
+            print("Persistencia de sesión deshabilitada: instalá `cryptography` (pip install cryptography).")
+        elif self._restore_session():
+            print("Sesión restaurada: se omiten login y popups.")
+            self._session_mode = "restored"
+            return self._session_mode
+
+        self.login()
+        self.sessions.save(self.driver, self.instagram_user)
+        self._session_mode = "login"
+        return self._session_mode
+
+    def _restore_session(self):
+        with self.tracer.span("session_restore") as span:
+            restored = self.sessions.restore(self.driver, self.instagram_user)
+            span.set(restored=restored)
+        return restored
+
+    def _record_first_action(self):
+        """Registra (una sola vez) el tiempo desde el arranque hasta la primera acción sobre un perfil."""
+        if self.startup_stats is not None:
+            return
+        self.startup_stats = {
+            "mode": self._session_mode or "login",
+            "seconds_to_first_action": time.monotonic() - self._started,
+        }
+        print(f"Arranque ({self.startup_stats['mode']}): "
+              f"{self.startup_stats['seconds_to_first_action']:.1f}s hasta la primera acción.")
+
+    @traced()
     def login(self):
         """
         Inicia sesión en Instagram con las credenciales almacenadas en el archivo `.env`.
@@ -126,9 +285,9 @@ class InstFollower:
             Popups de Instagram manejados correctamente.
         """
 
-        self.driver.get("https://www.instagram.com/")
+        self.driver.get(f"{self.base_url}/")
 
-        time.sleep(5)
+        self.ready.document_ready()
 
         self.wait.until(EC.visibility_of_element_located((By.NAME, 'username'))).send_keys(self.instagram_user)
         self.wait.until(EC.visibility_of_element_located((By.NAME, 'password'))).send_keys(self.instagram_pass)
@@ -138,6 +297,7 @@ class InstFollower:
 
         self.skip_popups()
 
+    @traced()
     def skip_popups(self):
         """
        Cierra las ventanas emergentes que aparecen después del inicio de sesión en Instagram.
@@ -148,14 +308,14 @@ class InstFollower:
 
        El método busca los botones correspondientes por texto visible,
        siendo compatible con interfaces en portugués, español e inglés.
-       Los textos admitidos se definen en listas (`textos_guardar`, `textos_notificaciones`).
+       Los textos admitidos se definen en `POPUP_SAVE_LOGIN` y `POPUP_NOTIFICATIONS`: cada
+       popup se busca con una sola consulta que prueba todas las variantes a la vez (primero
+       la que coincidió la última vez) con un plazo total corto, en lugar de un timeout por texto.
 
        Args:
            self: Instancia del objeto con `driver` y `wait` activos.
 
        Raises:
-           TimeoutException: Si los popups no aparecen dentro del tiempo de espera.
-           NoSuchElementException: Si los botones no existen o cambian de estructura.
            WebDriverException: Si el navegador no responde al intentar clickear un botón.
 
        Returns:
@@ -168,47 +328,30 @@ class InstFollower:
            Popups de Instagram manejados correctamente.
         """
 
-        # Primer popup: Guardar información
-        textos_guardar = ["Agora não", "Not now", "Ahora no"]
-        for texto in textos_guardar:
-
-            try:
-                self.wait.until(
-                    EC.element_to_be_clickable(
-                        (By.XPATH, f"//div[@role='button' and contains(., '{texto}')]")
-                    )
-                ).click()
-                print(f"Popup 'Guardar información' cerrado con texto: {texto}")
-                break
-
-            except (NoSuchElementException, TimeoutException):
-                print("Elemento no encontrado, continuando..")
+        # Primer popup: Guardar información (todas las variantes en una sola consulta)
+        texto = self.locator.click(POPUP_SAVE_LOGIN)
+        if texto:
+            print(f"Popup 'Guardar información' cerrado con texto: {texto}")
+        else:
+            print("Popup 'Guardar información' no apareció, continuando..")
 
         # Segundo popup: Activar notificaciones
-        textos_notificaciones = ["Agora não", "Not now", "Ahora no", "Não agora", "No ahora"]
-        for texto in textos_notificaciones:
-
-            try:
-                self.wait.until(
-                    EC.element_to_be_clickable(
-                        (By.XPATH,
-                         f"//button[contains(., '{texto}') or //div[@role='button' and contains(., '{texto}')]]")
-                    )
-                ).click()
-                print(f"Popup 'Notificaciones' cerrado con texto: {texto}")
-                break
-
-            except (NoSuchElementException, TimeoutException):
-                print("Elemento no encontrado, continuando..")
+        texto = self.locator.click(POPUP_NOTIFICATIONS, timeout=POPUP_FOLLOWUP_TIMEOUT)
+        if texto:
+            print(f"Popup 'Notificaciones' cerrado con texto: {texto}")
+        else:
+            print("Popup 'Notificaciones' no apareció, continuando..")
 
+        self.locator.cache.save()
         print("Popups de Instagram manejados correctamente.")
 
 
+    @traced()
     def find_followers(self):
         """
        Abre el perfil objetivo en Instagram y accede a su lista de seguidores.
 
-       Carga la página del perfil especificado (actualmente fijo como 'chefsteps'),
+       Carga la página del perfil objetivo (`self.target`, por defecto 'chefsteps'),
        espera la visibilidad del enlace 'Seguidores' (`/followers/`),
        y hace clic en él para abrir la ventana modal de la lista de seguidores.
 
@@ -228,7 +371,8 @@ class InstFollower:
            # >>> bot.find_followers()
            Ventana de seguidores abierta correctamente.
        """
-        self.driver.get("https://www.instagram.com/chefsteps/")
+        self._record_first_action()
+        self.driver.get(f"{self.base_url}/{self.target}/")
 
         try:
             self.wait.until(
@@ -238,27 +382,42 @@ class InstFollower:
         except (NoSuchElementException, TimeoutException):
             print("Elemento no encontrado")
 
+    def _prune_rows(self, batch, processed):
+        """Con `INSTAGRAM_PRUNE_ROWS`, desconecta del DOM las filas ya resueltas que quedaron arriba."""
+        if PRUNE_ROWS:
+            with self.tracer.span("prune_rows"):
+                batch.prune_rows(processed=processed)
+
+    @traced()
     def follow(self):
         """
         Sigue hasta 15 personas desde la lista de seguidores.
         - Trabaja dentro de div[role='dialog'].
+        - Consulta el índice persistente de cuentas procesadas (`self.processed`) y saltea las
+          conocidas sin interactuar con el navegador; lo actualiza después de cada tanda.
+        - Cada tanda cuesta pocos round trips: un MutationObserver encola en el navegador solo las
+          filas nuevas, que se drenan con un solo script y se accionan juntas con otro
+          (`BatchActions.stream_rows()` y `scroll_and_click()`). El costo por tanda no crece con
+          lo que ya se scrolleó.
+        - Con `INSTAGRAM_PRUNE_ROWS=1` quita del DOM las filas ya procesadas que quedaron arriba, y
+          cada `INSTAGRAM_METRICS_EVERY` tandas muestrea heap JS, nodos y latencia de consulta.
         - Scrollea el diálogo con WheelEvent (no depende de clases).
         - Maneja el popup de 'Dejar de seguir' tocando 'Cancelar'.
-        - Pausas aleatorias para comportamiento humano.
+        - Pausas aleatorias con nombre (`DELAY_*`) para comportamiento humano; el resto de las
+          esperas vuelven apenas el diálogo deja de mutar.
 
         Flujo:
         1. Espera el modal de seguidores (div[role='dialog']).
         2. Define un scroll sintético con WheelEvent para no depender de clases internas.
-        3. Entra en un bucle hasta lograr 15 follows o 10 iteraciones sin nuevos botones.
-        4. Busca botones “Seguir/Follow” dentro del diálogo.
-        5. Si no hay, scrollea y reintenta.
+        3. Entra en un bucle hasta lograr 15 follows o 10 esperas seguidas sin filas nuevas.
+        4. Recibe las filas nuevas con botón “Seguir/Follow” detectadas en el diálogo.
+        5. Si quedan pocas en cola, se scrollea para cargar más.
         6. Si hay:
             - Centra el botón.
             - Click.
             - Si salta el popup de “Dejar de seguir”, cierra con “Cancelar”.
         7. Pausas aleatorias entre acciones.
-        8. Entre tandas, scrollea para cargar más perfiles.
-        9. Finaliza con el conteo.
+        8. Finaliza con el conteo.
 
         Args:
         self: Instancia del objeto que contiene el `driver` y `wait` de Selenium.
@@ -293,103 +452,97 @@ class InstFollower:
 
         try:
             # 1) Esperar el diálogo de seguidores
-            dialog = self.wait.until(EC.presence_of_element_located((By.XPATH, "//div[@role='dialog']")))
+            self.wait.until(EC.presence_of_element_located((By.XPATH, "//div[@role='dialog']")))
             print("Ventana de seguidores detectada.")
 
-            # helper: scroll del diálogo sin conocer clases internas
-            def scroll_dialog(amount=800):
-                """
-                Desplaza hacia abajo el diálogo de seguidores simulando un evento de rueda del mouse.
-                Se usa execute_script() que permite ejecutar codigo JavaScript directamente desde el navegador que
-                controla Selenium.
-
-                Script: la constante 'dlg' toma como valor el primer argumento que recibe el script (el 'dialog'
-                de Python), y luego lanza un evento de scroll artifical (WheelEvent: en JS se dispara cuando el
-                usuario gira la rueda del mouse o hace scroll con el tackpad) sobre el dialogo.
-
-                Parametros del evento:
-                - deltaY: indica cuanto se desplaza verticalmente hacia abajo.
-                - bubbles: en true permite que el evento se propague hacia arriba en el DOM.
-                - cancelable: en true permite que el evento pueda ser interceptado o cancelado por scripts de la pagina.
-
-                :param amount: Cantidad de píxeles que se desplaza verticalmente (positivo = hacia abajo).
-                :return: None
-                """
-                try:
-                    self.driver.execute_script(
-                        """
-                        const dlg = arguments[0];
-                        dlg.dispatchEvent(new WheelEvent('wheel', { 
-                                                            deltaY: arguments[1], 
-                                                            bubbles: true,
-                                                            cancelable: true 
-                        }));
-                        """,
-                        dialog, amount
-                    )
-                except (StaleElementReferenceException, NoSuchElementException):
-                    pass
-
-            # 2) Bucle principal
-            empty_runs = 0
-            while followed < target and empty_runs < 10:
-                try:
-                    # Reobtener el diálogo cada vuelta por si re-renderiza
-                    dialog = self.driver.find_element(By.XPATH, "//div[@role='dialog']")
-                except NoSuchElementException:
-                    print("El diálogo desapareció.")
-                    break
-
-                # Botones 'Seguir' o 'Follow' visibles dentro del diálogo
-                buttons = dialog.find_elements(
-                    By.XPATH, ".//button[normalize-space()='Seguir' or normalize-space()='Follow']"
-                )
-
-                if not buttons:
-                    empty_runs += 1
-                    scroll_dialog(900)
-                    time.sleep(random.uniform(0.8, 1.4))
-                    continue
-                else:
-                    empty_runs = 0
-
-                for btn in buttons:
-                    if followed >= target:
-                        break
-                    try:
-                        # Llevar al viewport y click
-                        self.driver.execute_script("arguments[0].scrollIntoView({block:'center'});", btn)
-                        time.sleep(random.uniform(0.3, 0.8))
-                        btn.click()
-                        followed += 1
-                        print(f"[{followed}/{target}] Seguido.")
-                        time.sleep(random.uniform(1.2, 2.8))  # pausa humana
-
-                    except ElementClickInterceptedException:
-                        # Popup 'Dejar de seguir' → 'Cancelar'
-                        try:
-                            cancel = self.wait.until(
-                                EC.element_to_be_clickable((
-                                    By.XPATH,
-                                    "//div[@role='dialog']//button[contains(., 'Cancelar') or contains(., 'Cancel')]"
-                                ))
-                            )
-                            cancel.click()
-                            print("Ya estaba seguido. Cancelado y continuo.")
-                            time.sleep(random.uniform(0.8, 1.5))
-                        except TimeoutException:
-                            pass
-                        continue
-                    except (StaleElementReferenceException, NoSuchElementException):
+            # Cada operación del loop es un único round trip (ver batch_actions.py)
+            batch = BatchActions(self.driver, self.commands, locators=self.locator.cache)
+            sampler = PageMetricsSampler(self.driver) if METRICS_EVERY else None
+            if sampler:
+                sampler.sample("inicio")
+
+            # 2) Bucle principal: solo llegan filas nuevas, detectadas por un MutationObserver en el
+            #    diálogo; el scroll se dispara del lado del navegador cuando la cola de filas baja
+            pending = deque()                                    # Filas por accionar que no entraron en un lote
+            for tanda, rows in enumerate(batch.stream_rows(wait=DIALOG_SETTLE_TIMEOUT), start=1):
+                if sampler and tanda % METRICS_EVERY == 0:
+                    with self.tracer.span("page_metrics"):
+                        sampler.sample(f"tanda {tanda}")
+
+                # Las cuentas ya procesadas (en esta u otras ejecuciones) se saltean sin tocar el navegador
+                done_ids = []
+                for row in rows:
+                    if row["username"] in self.processed:
+                        done_ids.append(row["id"])
                         continue
+                    if row["state"] == "follow":
+                        pending.append(row)
+                    else:
+                        done_ids.append(row["id"])
+                        self.processed.add(row["username"])   # Ya seguida: se recuerda para la próxima
+
+                # Scroll + pausa humana + click (+ 'Cancelar' si salta 'Dejar de seguir') por lotes. `stream_rows`
+                # no vuelve a entregar una fila: las que exceden lo que falta seguir quedan en `pending` y se
+                # accionan (si alguna del lote no sumó) antes de drenar más
+                while pending and followed < target:
+                    candidates = [pending.popleft() for _ in range(min(len(pending), target - followed))]
+                    before = [DELAY_BEFORE_CLICK.seconds() for _ in candidates]
+                    after = [DELAY_AFTER_FOLLOW.seconds() for _ in candidates]
+                    self.ready.record("pause:" + DELAY_BEFORE_CLICK.name, sum(before))
+                    self.ready.record("pause:" + DELAY_AFTER_FOLLOW.name, sum(after))
+                    with self.tracer.span("scroll_and_click", rows=len(candidates)):
+                        results = batch.scroll_and_click(
+                            candidates, [s * 1000 for s in before], [s * 1000 for s in after]
+                        )
+
+                    usernames = {row["id"]: row["username"] for row in candidates}
+                    for result in results:
+                        if result["id"] not in usernames:
+                            continue  # No es una fila de este lote
+                        if result["outcome"] in ("followed", "clicked"):
+                            followed += 1
+                            print(f"[{followed}/{target}] Seguido.")
+                        elif result["outcome"] == "already_following":
+                            print("Ya estaba seguido. Cancelado y continuo.")
+                        elif result["outcome"] == "missing":
+                            done_ids.append(result["id"])   # Ya no está en el DOM: no hay nada que podar
+                            continue
+                        else:
+                            continue
+                        done_ids.append(result["id"])
+                        if usernames[result["id"]]:
+                            self.processed.add(usernames[result["id"]])
+                    self.processed.flush()
+
+                # Recién ahora: podar antes del click podía desconectar filas entregadas y todavía sin accionar
+                self._prune_rows(batch, done_ids)
+
+                if followed >= target:
+                    break
 
-                # Scroll entre tandas
-                scroll_dialog(900)
-                time.sleep(random.uniform(0.9, 1.7))
-
+            self.follow_stats = {
+                "followed": followed,
+                "rows_processed": batch.rows_processed,
+                "round_trips_per_row": batch.round_trips_per_row(),
+                "rows_pruned": batch.rows_pruned,
+                "page_metrics": None,
+            }
+            if sampler:
+                sampler.sample("fin")
+                self.follow_stats["page_metrics"] = sampler.summary()
             print(f"✅ Finalizado. Total seguidos: {followed}")
+            if batch.rows_processed:
+                print(f"Round trips de WebDriver por fila: {self.follow_stats['round_trips_per_row']:.1f}")
+            metrics = self.follow_stats["page_metrics"]
+            if metrics and "dom_nodes" in metrics:
+                heap = metrics.get("js_heap_used", {}).get("last", 0) / 1e6
+                print(f"Página: {metrics['dom_nodes']['last']:.0f} nodos, heap JS {heap:.1f} MB, "
+                      f"consulta {metrics['query_ms']['last']:.1f} ms (filas podadas: {batch.rows_pruned})")
 
         except TimeoutException:
             print("No se abrió el diálogo de seguidores a tiempo.")
         except Exception as e:
-            print(f"Error en follow(): {e}")
\ No newline at end of file
+            print(f"Error en follow(): {e}")
+        finally:
+            self.processed.flush()
+            self.locator.cache.save()
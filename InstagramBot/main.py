@@ -8,7 +8,8 @@ Python:  3.12+
 -------------------------------------------------------------------------------
 Description:
     Este script ejecuta el flujo principal del bot de Instagram. El bot:
-      1. Inicia sesión usando credenciales almacenadas en el archivo .env.
+      1. Restaura la sesión guardada (cifrada) o, si expiró, inicia sesión usando
+         las credenciales almacenadas en el archivo .env.
       2. Accede al perfil objetivo y abre la lista de seguidores.
       3. Sigue automáticamente a una cantidad configurada de usuarios (por defecto 15).
          - Gestiona popups de confirmación y scroll en la ventana modal.
@@ -17,6 +18,7 @@ Description:
 Dependencies:
     - selenium >= 4.22.0
     - python-dotenv
+    - cryptography (opcional, para guardar la sesión entre ejecuciones)
     - Google Chrome (instalado y compatible con chromedriver)
 
 Environment Variables (.env):
@@ -38,9 +40,13 @@ from instafollower import InstFollower
 def main():
     """Ejecuta el flujo principal del bot de Instagram."""
     instafollower = InstFollower()
-    instafollower.login()
-    instafollower.find_followers()
-    instafollower.follow()
+    try:
+        instafollower.start_session()
+        instafollower.find_followers()
+        instafollower.follow()
+    finally:
+        # Devuelve el navegador al pool, guarda la caché de localizadores y exporta las trazas
+        instafollower.close()
 
 
 if __name__ == "__main__":
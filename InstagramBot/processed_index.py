@@ -0,0 +1,108 @@
+# ======== LIBRERÍAS ESTÁNDAR DE PYTHON ========
+import hashlib
+import os
+import re
+import struct
+from array import array
+
+
+# Cada cuenta se guarda como un hash de 8 bytes: 1 millón de cuentas ocupan ~8 MB
+_HASH_SIZE = 8
+_HASH_FORMAT = "<Q"
+
+
+def username_hash(username):
+    """
+    Devuelve el hash de 64 bits de un nombre de usuario (sin distinguir mayúsculas).
+
+    Args:
+        username (str): Nombre de usuario de Instagram.
+
+    Returns:
+        int: Hash estable entre ejecuciones.
+    """
+    digest = hashlib.blake2b(username.strip().lower().encode("utf-8"), digest_size=_HASH_SIZE).digest()
+    return struct.unpack(_HASH_FORMAT, digest)[0]
+
+
+class ProcessedIndex:
+    """
+    Índice persistente de cuentas ya procesadas, uno por perfil objetivo.
+
+    Guarda hashes de 64 bits en un archivo binario append-only
+    (`<directorio>/<perfil>.idx`). Al abrirlo se cargan en un `set` en memoria, así
+    cada consulta es O(1) y no requiere tocar el navegador. Las altas se escriben de
+    forma incremental con `flush()`; `compact()` reescribe el archivo ordenado y sin
+    duplicados.
+
+    Args:
+        directory (str): Carpeta donde se guardan los índices.
+        target (str): Perfil objetivo (cada perfil tiene su propio índice).
+
+    Attributes:
+        path (str): Archivo del índice.
+
+    Example:
+        # >>> index = ProcessedIndex("processed", "chefsteps")
+        # >>> "usuario" in index
+        False
+        # >>> index.add("usuario"); index.flush()
+    """
+
+    def __init__(self, directory, target):
+        os.makedirs(directory, exist_ok=True)
+        safe_target = re.sub(r"[^A-Za-z0-9._-]", "_", target)
+        self.path = os.path.join(directory, f"{safe_target}.idx")
+        self._hashes = set()
+        self._pending = array("Q")
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        data = array("Q")
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        # Un cierre abrupto puede dejar un registro a medias: se ignora
+        raw = raw[: len(raw) - len(raw) % _HASH_SIZE]
+        data.frombytes(raw)
+        self._hashes.update(data)
+
+    def __contains__(self, username):
+        return bool(username) and username_hash(username) in self._hashes
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def add(self, username):
+        """
+        Marca una cuenta como procesada (queda pendiente de escribir hasta `flush()`).
+
+        Returns:
+            bool: True si la cuenta no estaba en el índice.
+        """
+        if not username:
+            return False
+        value = username_hash(username)
+        if value in self._hashes:
+            return False
+        self._hashes.add(value)
+        self._pending.append(value)
+        return True
+
+    def flush(self):
+        """Agrega al archivo las cuentas nuevas desde el último `flush()`."""
+        if not self._pending:
+            return
+        with open(self.path, "ab") as f:
+            self._pending.tofile(f)
+        self._pending = array("Q")
+
+    def compact(self):
+        """Reescribe el archivo ordenado y sin duplicados (de forma atómica)."""
+        data = array("Q", sorted(self._hashes))
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            data.tofile(f)
+        os.replace(tmp_path, self.path)
+        self._pending = array("Q")
@@ -0,0 +1,169 @@
+# ======== LIBRERÍAS ESTÁNDAR DE PYTHON ========
+import json
+import os
+import time
+
+# ======== CIFRADO (DEPENDENCIA OPCIONAL) ========
+try:
+    from cryptography.fernet import Fernet, InvalidToken                 # Cifrado simétrico autenticado (AES + HMAC)
+except ImportError:                                                     # Sin `cryptography` no se persisten sesiones
+    Fernet = None
+    InvalidToken = Exception
+
+# ======== EXCEPCIONES DE SELENIUM ========
+from selenium.common.exceptions import WebDriverException
+
+
+INSTAGRAM_URL = "https://www.instagram.com"
+# Página liviana del dominio: permite cargar cookies sin renderizar la app completa
+_COOKIE_PAGE = "/robots.txt"
+# Endpoint que responde 200 solo con una sesión válida (una única request liviana)
+_VALIDATE_URL = "/api/v1/accounts/current_user/?edit=true"
+_IG_APP_ID = "936619743392459"
+
+_DUMP_STORAGE_JS = """
+const data = {};
+for (let i = 0; i < localStorage.length; i++) {
+    const key = localStorage.key(i);
+    data[key] = localStorage.getItem(key);
+}
+return data;
+"""
+
+_RESTORE_STORAGE_JS = """
+const data = arguments[0];
+for (const key of Object.keys(data)) { localStorage.setItem(key, data[key]); }
+"""
+
+_VALIDATE_JS = """
+const done = arguments[arguments.length - 1];
+fetch(arguments[0], { credentials: 'include', headers: { 'X-IG-App-ID': arguments[1] } })
+    .then((r) => done(r.status))
+    .catch(() => done(0));
+"""
+
+
+class SessionStore:
+    """
+    Guarda cifrada la sesión autenticada de Instagram (cookies + localStorage).
+
+    La clave de cifrado se toma de `INSTAGRAM_SESSION_KEY` (clave Fernet en base64). Si no
+    está definida, se genera una vez y se guarda junto al archivo de sesión con permisos
+    0600. Requiere el paquete `cryptography`; si no está instalado, `available` es False y
+    el bot simplemente inicia sesión como siempre.
+
+    Args:
+        path (str): Archivo cifrado de sesiones.
+        key (bytes | str, optional): Clave Fernet explícita.
+        base_url (str, optional): Sitio de la sesión (el de `InstFollower.base_url`, que puede
+            ser un fixture local).
+
+    Attributes:
+        available (bool): Si el cifrado está disponible.
+    """
+
+    def __init__(self, path, key=None, base_url=INSTAGRAM_URL):
+        self.path = path
+        self.base_url = base_url.rstrip("/")
+        self.available = Fernet is not None
+        self._fernet = Fernet(self._load_key(key)) if self.available else None
+
+    def _load_key(self, key):
+        key = key or os.getenv("INSTAGRAM_SESSION_KEY")
+        if key:
+            return key.encode() if isinstance(key, str) else key
+
+        key_path = self.path + ".key"
+        if os.path.exists(key_path):
+            with open(key_path, "rb") as f:
+                return f.read().strip()
+
+        key = Fernet.generate_key()
+        fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+        return key
+
+    # ---------- ARCHIVO CIFRADO ----------
+    def _read_all(self):
+        if not self.available or not os.path.exists(self.path):
+            return {}
+        with open(self.path, "rb") as f:
+            token = f.read()
+        try:
+            return json.loads(self._fernet.decrypt(token))
+        except (InvalidToken, ValueError):
+            print("Sesión guardada ilegible (¿cambió la clave?), se descarta.")
+            return {}
+
+    def _write_all(self, sessions):
+        token = self._fernet.encrypt(json.dumps(sessions).encode("utf-8"))
+        tmp_path = self.path + ".tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(token)
+        os.replace(tmp_path, self.path)
+
+    # ---------- API ----------
+    def save(self, driver, username):
+        """
+        Guarda las cookies y el localStorage de la sesión actual del navegador.
+
+        Args:
+            driver (webdriver.Chrome): Navegador con la sesión iniciada (en `base_url`).
+            username (str): Cuenta a la que pertenece la sesión.
+        """
+        if not self.available:
+            return
+        sessions = self._read_all()
+        sessions[username] = {
+            "saved_at": time.time(),
+            "cookies": driver.get_cookies(),
+            "local_storage": driver.execute_script(_DUMP_STORAGE_JS),
+        }
+        self._write_all(sessions)
+
+    def forget(self, username):
+        """Elimina la sesión guardada de una cuenta (por ejemplo, si expiró)."""
+        sessions = self._read_all()
+        if sessions.pop(username, None) is not None:
+            self._write_all(sessions)
+
+    def restore(self, driver, username):
+        """
+        Restaura la sesión guardada y la valida con una única request liviana.
+
+        Antes de tocar la red se descartan las sesiones cuya cookie `sessionid` ya venció.
+
+        Args:
+            driver (webdriver.Chrome): Navegador donde restaurar la sesión.
+            username (str): Cuenta a restaurar.
+
+        Returns:
+            bool: True si la sesión restaurada es válida; False si hay que iniciar sesión.
+        """
+        session = self._read_all().get(username)
+        if not session:
+            return False
+
+        cookies = session["cookies"]
+        session_cookie = next((c for c in cookies if c.get("name") == "sessionid"), None)
+        if session_cookie is None or session_cookie.get("expiry", float("inf")) <= time.time():
+            self.forget(username)
+            return False
+
+        try:
+            driver.get(self.base_url + _COOKIE_PAGE)
+            for cookie in cookies:
+                cookie = {k: v for k, v in cookie.items() if k != "sameSite" or v in ("Strict", "Lax", "None")}
+                driver.add_cookie(cookie)
+            driver.execute_script(_RESTORE_STORAGE_JS, session["local_storage"])
+            status = driver.execute_async_script(_VALIDATE_JS, _VALIDATE_URL, _IG_APP_ID)
+        except WebDriverException as e:
+            print(f"No se pudo restaurar la sesión: {e.msg}")
+            return False
+
+        if status != 200:
+            self.forget(username)
+            return False
+        return True
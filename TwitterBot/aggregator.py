@@ -0,0 +1,337 @@
+"""Agregador central de mediciones de varios nodos (sitios).
+
+Cada nodo (`collector.Collector`) envía sus mediciones en tandas por HTTP.
+El agregador las guarda en SQLite y sirve agregados por sitio:
+
+    POST /v1/results      Tanda de un nodo (JSON, opcionalmente con gzip).
+    GET  /v1/sites        Agregados por sitio (`?since=<ts>` limita la ventana).
+    GET  /healthz         Estado y total de mediciones.
+
+Formato de una tanda (compacto: una lista por medición, sin repetir claves):
+
+    {"site": "oficina", "node": "rpi-1",
+     "fields": ["uid", "ts", "down", "up", "latency", "server"],
+     "rows": [["6f1c...", 1760000000.0, 123.4, 45.6, 12.0, "Claro"], ...]}
+
+Cada medición trae un `uid` generado por el nodo al guardarla, y la tabla
+lo usa como clave: si una tanda se reenvía (timeout, reintento tras un
+corte) las filas repetidas se ignoran en la misma inserción.
+
+Cada tanda se inserta con un solo `executemany` en una transacción, así
+que el costo por medición es mínimo. Ver `bench/ingest.py`.
+
+Usage:
+    $ python aggregator.py --port 8750 --db fleet.db
+"""
+
+import argparse
+import gzip
+import io
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+# Base del agregador
+AGGREGATOR_DB_PATH = os.getenv("XBOT_AGGREGATOR_DB", str(Path(__file__).resolve().parent / "fleet.db"))
+
+# Campos de cada fila de una tanda, en el orden por defecto
+FIELDS = ("uid", "ts", "down", "up", "latency", "server")
+
+# Tamaño máximo aceptado de una tanda (bytes, ya descomprimida)
+MAX_BATCH_BYTES = 8 * 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    uid      TEXT PRIMARY KEY,
+    site     TEXT NOT NULL,
+    node     TEXT NOT NULL,
+    ts       REAL NOT NULL,
+    down     REAL,
+    up       REAL,
+    latency  REAL,
+    server   TEXT,
+    received REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_results_site_ts ON results (site, ts);
+"""
+
+
+class BatchError(ValueError):
+    """La tanda recibida no tiene el formato esperado."""
+
+
+def _row_values(row, index, site, node, received):
+    """Valores de una fila para el INSERT, o `BatchError` si algún campo no tiene el tipo esperado.
+
+    Sin esto, un `uid` nulo se contaba como repetido y un campo no escalar rompía el `executemany`
+    con un `sqlite3.Error`, que el nodo reintentaba para siempre (500) en lugar de descartar (400).
+    """
+
+    if not isinstance(row, list):
+        raise BatchError("Cada fila debe ser una lista.")
+    uid, ts, down, up, latency, server = (row[i] for i in index)
+    if not isinstance(uid, str) or not uid:
+        raise BatchError("`uid` debe ser texto no vacío.")
+    if not isinstance(ts, (int, float)) or isinstance(ts, bool):
+        raise BatchError(f"`ts` debe ser un número (uid {uid}).")
+    for value in (down, up, latency, server):
+        if value is not None and not isinstance(value, (str, int, float)):
+            raise BatchError(f"Campo no escalar en la fila {uid}.")
+    return uid, site, node, ts, down, up, latency, server, received
+
+
+class FleetStore:
+    """Mediciones de todos los nodos sobre SQLite, con deduplicación por `uid`.
+
+    Args:
+        path (str): Archivo de la base (`":memory:"` para pruebas).
+
+    Attributes:
+        stats (dict): `batches`, `accepted` y `duplicates` recibidos desde que se abrió.
+    """
+
+    def __init__(self, path=AGGREGATOR_DB_PATH):
+        self.path = path
+        self.stats = {"batches": 0, "accepted": 0, "duplicates": 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def ingest(self, batch):
+        """Guarda una tanda de un nodo.
+
+        Args:
+            batch (dict): Tanda con `site`, `node`, `fields` (opcional) y `rows`.
+
+        Raises:
+            BatchError: Si faltan datos, las filas no coinciden con `fields` o algún campo no tiene
+                el tipo esperado (`uid` texto, `ts` número, el resto escalares o null).
+
+        Returns:
+            tuple[int, int]: Mediciones nuevas y repetidas (ya recibidas antes).
+        """
+
+        site, node, rows = batch.get("site"), batch.get("node"), batch.get("rows")
+        if not site or not node or not isinstance(rows, list):
+            raise BatchError("La tanda necesita `site`, `node` y `rows`.")
+        if not isinstance(site, str) or not isinstance(node, str):
+            raise BatchError("`site` y `node` deben ser texto.")
+        fields = batch.get("fields") or FIELDS
+        if not isinstance(fields, (list, tuple)):
+            raise BatchError("`fields` debe ser una lista.")
+        try:
+            index = [fields.index(name) for name in FIELDS]
+        except ValueError:
+            raise BatchError(f"`fields` debe incluir {', '.join(FIELDS)}.") from None
+
+        received = time.time()
+        try:
+            values = [_row_values(row, index, site, node, received) for row in rows]
+        except (IndexError, TypeError):
+            raise BatchError("Fila con menos campos que `fields`.") from None
+
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO results (uid, site, node, ts, down, up, latency, server, received) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                values,
+            )
+            accepted = self._conn.total_changes - before
+            self.stats["batches"] += 1
+            self.stats["accepted"] += accepted
+            self.stats["duplicates"] += len(values) - accepted
+        return accepted, len(values) - accepted
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def _percentile(self, site, field, since, count, q):
+        # El p95 se lee con un OFFSET sobre las filas ordenadas, sin traer la serie a Python
+        rank = max(1, math.ceil(count * q))
+        return self._conn.execute(
+            f"SELECT {field} FROM results WHERE site = ? AND ts >= ? AND {field} IS NOT NULL "
+            f"ORDER BY {field} LIMIT 1 OFFSET ?",
+            (site, since, rank - 1),
+        ).fetchone()[0]
+
+    def sites(self, since=0):
+        """Agregados por sitio desde `since`.
+
+        Returns:
+            dict: `{sitio: {"nodes", "count", "last_ts", "down": {...}, "up": {...}, "latency": {...}}}`
+            con `min`, `mean`, `p95` y `max` por campo.
+        """
+
+        result = {}
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT site, COUNT(DISTINCT node), COUNT(*), MAX(ts), "
+                "COUNT(down), MIN(down), AVG(down), MAX(down), "
+                "COUNT(up), MIN(up), AVG(up), MAX(up), "
+                "COUNT(latency), MIN(latency), AVG(latency), MAX(latency) "
+                "FROM results WHERE ts >= ? GROUP BY site ORDER BY site",
+                (since,),
+            ).fetchall()
+            for row in rows:
+                site = row[0]
+                summary = {"nodes": row[1], "count": row[2], "last_ts": row[3]}
+                for i, field in enumerate(("down", "up", "latency")):
+                    count, low, mean, high = row[4 + 4 * i:8 + 4 * i]
+                    if not count:
+                        continue
+                    summary[field] = {
+                        "min": low,
+                        "mean": round(mean, 3),
+                        "p95": self._percentile(site, field, since, count, 0.95),
+                        "max": high,
+                    }
+                result[site] = summary
+        return result
+
+
+def decode_batch(body, encoding=None):
+    """Decodifica el cuerpo de un `POST /v1/results` (JSON, opcionalmente gzip).
+
+    Raises:
+        BatchError: Si el cuerpo no es JSON válido o supera `MAX_BATCH_BYTES`.
+    """
+
+    try:
+        if encoding == "gzip":
+            with gzip.GzipFile(fileobj=io.BytesIO(body)) as f:
+                body = f.read(MAX_BATCH_BYTES + 1)
+        if len(body) > MAX_BATCH_BYTES:
+            raise BatchError("Tanda demasiado grande.")
+        batch = json.loads(body)
+    except (OSError, EOFError, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise BatchError(f"Cuerpo inválido: {e}") from None
+    if not isinstance(batch, dict):
+        raise BatchError("La tanda debe ser un objeto JSON.")
+    return batch
+
+
+class _AggregatorHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive: los nodos reutilizan la conexión entre tandas
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if urlsplit(self.path).path != "/v1/results":
+            self._reply(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BATCH_BYTES:
+            self.close_connection = True
+            self._reply(413, {"error": "tanda demasiado grande"})
+            return
+        body = self.rfile.read(length)
+        try:
+            batch = decode_batch(body, self.headers.get("Content-Encoding"))
+            accepted, duplicates = self.server.store.ingest(batch)
+        except BatchError as e:
+            self._reply(400, {"error": str(e)})
+            return
+        except sqlite3.Error as e:
+            # Problema del agregador (base bloqueada, disco lleno...): el nodo reintenta la tanda
+            self._reply(500, {"error": f"no se pudo guardar la tanda: {e}"})
+            return
+        self._reply(200, {"accepted": accepted, "duplicates": duplicates})
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/v1/sites":
+            since = float(parse_qs(url.query).get("since", ["0"])[0])
+            self._reply(200, self.server.store.sites(since))
+        elif url.path == "/healthz":
+            self._reply(200, {"ok": True, "results": self.server.store.count(), **self.server.store.stats})
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def log_message(self, format, *args):
+        pass  # Sin una línea por tanda: con muchos nodos solo sería ruido
+
+
+class AggregatorServer:
+    """Servidor HTTP del agregador en un hilo propio (o en primer plano con `serve_forever()`).
+
+    Args:
+        store (FleetStore): Dónde guardar las mediciones.
+        host (str, optional): Dirección de escucha.
+        port (int, optional): Puerto (0 = uno libre).
+    """
+
+    def __init__(self, store, host="127.0.0.1", port=0):
+        self.store = store
+        self._httpd = ThreadingHTTPServer((host, port), _AggregatorHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.store = store
+        self._thread = None
+
+    def url(self, path="/"):
+        """URL absoluta de `path` en este servidor."""
+
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}{path}"
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="aggregator", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Agregador central de mediciones de varios nodos.")
+    parser.add_argument("--host", default="127.0.0.1", help="Dirección de escucha (0.0.0.0 para la red).")
+    parser.add_argument("--port", type=int, default=8750)
+    parser.add_argument("--db", default=AGGREGATOR_DB_PATH, help="Base SQLite del agregador.")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    server = AggregatorServer(FleetStore(args.db), args.host, args.port)
+    print(f"Agregador escuchando en {server.url()} (base: {args.db})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""Estadísticas vectorizadas y detección de anomalías sobre el historial de mediciones.
+
+Decidir el tweet con una sola medición contra `PROMISED_DOWN`/`PROMISED_UP`
+hace que una lectura mala alcance para quejarse. Este módulo mira el
+historial completo (`MeasurementStore.series`) con NumPy, sin bucles de
+Python por medición:
+
+- **Percentiles móviles** (`rolling_percentiles`): p10/p50/p90 de una
+  ventana de tiempo que avanza en pasos fijos.
+- **Tiempo bajo lo contratado** (`share_below`): fracción del tiempo (cada
+  medición pesa lo que duró hasta la siguiente, con tope en los cortes).
+- **Perfil por hora del día** (`time_of_day_profile`): mediana, p10, p90 y
+  MAD por hora local.
+- **Anomalías robustas** (`anomaly_scores`): puntaje `0.6745 · (x − mediana) / MAD`
+  contra la misma hora del día; con |puntaje| > 3.5 la medición es atípica.
+
+`assess()` junta todo en un `Verdict` para `InternetSpeedXBot.tweet_at_provider()`:
+se tweetea cuando la medición está bajo lo contratado **y** el servicio
+estuvo bajo lo contratado al menos `COMPLAIN_SHARE` del tiempo en los
+últimos `ANALYSIS_WINDOW_DAYS` días. Una caída aislada no alcanza.
+
+Los percentiles son por rango más cercano, como en `measurements.py`.
+NumPy es opcional: sin él, `assess()` devuelve None y se usa la última
+medición como antes. Años de muestras cada 5 minutos (cientos de miles de
+filas) se analizan en décimas de segundo.
+
+Uso típico:
+    verdict = assess(store, down=125.4, up=48.2)
+    if verdict is not None and verdict.complain:
+        ...
+    report = summarize(*load(store, time.time() - 365 * 86400))
+"""
+
+import math
+import os
+import time
+from dataclasses import dataclass
+
+try:
+    import numpy as np                                                   # Opcional: sin NumPy no hay análisis
+except ImportError:
+    np = None
+
+from tweets import PROMISED_DOWN, PROMISED_UP
+
+# Ventana (días) del veredicto y fracción del tiempo bajo lo contratado a partir de la cual se tweetea
+ANALYSIS_WINDOW_DAYS = float(os.getenv("XBOT_ANALYSIS_WINDOW_DAYS", "7"))
+COMPLAIN_SHARE = float(os.getenv("XBOT_COMPLAIN_SHARE", "0.5"))
+# Días de historial para el perfil por hora del día que usan los puntajes de anomalía
+BASELINE_DAYS = 28
+# Mediciones mínimas en la ventana para dar un veredicto (si no, se usa la última medición)
+MIN_SAMPLES = 12
+# |puntaje robusto| desde el que una medición se considera atípica
+ANOMALY_THRESHOLD = 3.5
+# Escala del MAD para que sea comparable con un desvío estándar (distribución normal)
+MAD_SCALE = 0.6745
+# Percentiles que informa `summarize()`
+QUANTILES = (0.10, 0.50, 0.90)
+# Elementos máximos de cada bloque de ventanas en `rolling_percentiles` (acota la memoria)
+_ROLLING_BLOCK = 4_000_000
+
+
+@dataclass
+class Verdict:
+    """Decisión de tweet a partir del historial.
+
+    Attributes:
+        complain (bool): Si corresponde quejarse.
+        reason (str): Motivo legible de la decisión.
+        samples (int): Mediciones en la ventana.
+        window_days (float): Largo de la ventana analizada.
+        share_below (float): Fracción del tiempo bajo lo contratado en la ventana.
+        median_down (float): Mediana de bajada en la ventana (Mbps).
+        median_up (float): Mediana de subida en la ventana (Mbps).
+        score_down (float | None): Puntaje robusto de la bajada medida contra su hora del día.
+        score_up (float | None): Puntaje robusto de la subida medida contra su hora del día.
+    """
+
+    complain: bool
+    reason: str
+    samples: int
+    window_days: float
+    share_below: float
+    median_down: float
+    median_up: float
+    score_down: float = None
+    score_up: float = None
+
+
+def available():
+    """Indica si NumPy está instalado."""
+
+    return np is not None
+
+
+def load(store, start=None, end=None):
+    """Carga `ts`, `down` y `up` del historial como arrays (`nan` donde falta el dato).
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: Timestamps, bajada y subida, ordenados por `ts`.
+    """
+
+    rows = store.series(start, end, fields=("down", "up"))
+    data = np.array(rows, dtype=float).reshape(-1, 3)
+    return data[:, 0], data[:, 1], data[:, 2]
+
+
+# ---------- PERCENTILES ----------
+def _nearest_rank(sorted_rows, counts, q):
+    # Filas ordenadas con los faltantes (+inf) al final: el rango se calcula sobre `counts` valores
+    k = np.maximum(np.ceil(q * counts).astype(np.int64) - 1, 0)
+    values = np.take_along_axis(sorted_rows, np.minimum(k, sorted_rows.shape[1] - 1)[:, None], axis=1)[:, 0]
+    return np.where(counts > 0, values, np.nan)
+
+
+def grouped_quantiles(groups, values, n_groups, quantiles=QUANTILES):
+    """Percentiles de `values` por grupo en un solo ordenamiento.
+
+    Args:
+        groups (np.ndarray): Grupo (entero `0..n_groups-1`) de cada valor.
+        values (np.ndarray): Valores (`nan` se ignora).
+        n_groups (int): Cantidad de grupos.
+        quantiles (tuple[float], optional): Percentiles en `[0, 1]`.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Cantidad por grupo y matriz `(n_groups, len(quantiles))`.
+    """
+
+    keep = ~np.isnan(values)
+    groups, values = groups[keep], values[keep]
+    # Orden por valor y después, estable, por grupo (entero: radix sort), más rápido que `lexsort`
+    order = np.argsort(values)
+    order = order[np.argsort(groups[order], kind="stable")]
+    values = values[order]
+    counts = np.bincount(groups, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    result = np.full((n_groups, len(quantiles)), np.nan)
+    has = counts > 0
+    for j, q in enumerate(quantiles):
+        k = starts + np.maximum(np.ceil(q * counts).astype(np.int64) - 1, 0)
+        result[has, j] = values[k[has]]
+    return counts, result
+
+
+def rolling_percentiles(ts, values, window, step=None, quantiles=QUANTILES):
+    """Percentiles de una ventana de tiempo `[t - window, t)` que avanza cada `step` segundos.
+
+    Las ventanas se arman como una matriz (una fila por instante, con relleno para las más
+    cortas) y se ordenan juntas, por bloques para acotar la memoria.
+
+    Args:
+        ts (np.ndarray): Timestamps ordenados.
+        values (np.ndarray): Valores (`nan` se ignora).
+        window (float): Largo de la ventana (s).
+        step (float, optional): Separación entre instantes evaluados (s). Por defecto `window / 7`.
+        quantiles (tuple[float], optional): Percentiles en `[0, 1]`.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: Instantes, cantidad por ventana y matriz
+        `(instantes, len(quantiles))`.
+    """
+
+    if len(ts) == 0:
+        return np.empty(0), np.empty(0, dtype=np.int64), np.empty((0, len(quantiles)))
+    step = step or window / 7
+    ends = np.arange(ts[0] + min(window, ts[-1] - ts[0]), ts[-1] + step, step)
+    starts = np.searchsorted(ts, ends - window, side="left")
+    stops = np.searchsorted(ts, ends, side="left")
+    padded = np.where(np.isnan(values), np.inf, values)
+
+    counts = np.empty(len(ends), dtype=np.int64)
+    result = np.empty((len(ends), len(quantiles)))
+    width = max(int((stops - starts).max()), 1)
+    block = max(_ROLLING_BLOCK // width, 1)
+    offsets = np.arange(width)
+    for b in range(0, len(ends), block):
+        s, e = starts[b:b + block], stops[b:b + block]
+        index = s[:, None] + offsets
+        rows = np.where(index < e[:, None], padded[np.minimum(index, len(ts) - 1)], np.inf)
+        rows.sort(axis=1)
+        counts[b:b + block] = np.isfinite(rows).sum(axis=1)
+        for j, q in enumerate(quantiles):
+            result[b:b + block, j] = _nearest_rank(rows, counts[b:b + block], q)
+    return ends, counts, result
+
+
+# ---------- TIEMPO BAJO LO CONTRATADO ----------
+def sample_weights(ts, max_gap=None):
+    """Segundos que representa cada medición: hasta la siguiente, con tope `max_gap`.
+
+    El tope (por defecto, el doble del intervalo mediano) evita que un corte del bot o de la
+    máquina cuente como horas con la última velocidad medida. La última medición pesa el
+    intervalo mediano.
+    """
+
+    if len(ts) < 2:
+        return np.ones(len(ts))
+    gaps = np.diff(ts)
+    typical = float(np.median(gaps))
+    max_gap = max_gap or 2 * typical
+    return np.minimum(np.append(gaps, typical), max_gap)
+
+
+def share_below(ts, down, up, promised_down=PROMISED_DOWN, promised_up=PROMISED_UP, max_gap=None):
+    """Fracción del tiempo con bajada o subida bajo lo contratado.
+
+    Returns:
+        float: Entre 0 y 1 (`nan` si no hay mediciones completas).
+    """
+
+    valid = ~(np.isnan(down) | np.isnan(up))
+    weights = sample_weights(ts, max_gap)[valid]
+    below = (down[valid] < promised_down) | (up[valid] < promised_up)
+    total = weights.sum()
+    return float((weights * below).sum() / total) if total else float("nan")
+
+
+# ---------- PERFIL POR HORA Y ANOMALÍAS ----------
+def hour_of_day(ts, utc_offset=None):
+    """Hora local (0-23) de cada timestamp. `utc_offset` en segundos; por defecto, el de la máquina."""
+
+    if utc_offset is None:
+        utc_offset = time.localtime().tm_gmtoff
+    return ((ts + utc_offset) // 3600 % 24).astype(np.int64)
+
+
+def time_of_day_profile(ts, values, utc_offset=None):
+    """Mediana, p10, p90 y MAD de `values` por hora local del día.
+
+    Returns:
+        dict: `count`, `p10`, `median`, `p90` y `mad`, cada uno un array de 24 elementos.
+    """
+
+    hours = hour_of_day(ts, utc_offset)
+    counts, q = grouped_quantiles(hours, values, 24, (0.10, 0.50, 0.90))
+    _, mad = grouped_quantiles(hours, np.abs(values - q[hours, 1]), 24, (0.50,))
+    return {"count": counts, "p10": q[:, 0], "median": q[:, 1], "p90": q[:, 2], "mad": mad[:, 0]}
+
+
+def anomaly_scores(ts, values, profile=None, utc_offset=None):
+    """Puntaje robusto de cada medición contra la mediana y el MAD de su hora del día.
+
+    Args:
+        ts (np.ndarray): Timestamps de las mediciones a puntuar.
+        values (np.ndarray): Valores a puntuar.
+        profile (dict, optional): Perfil de referencia (`time_of_day_profile`). Por defecto, el
+            de las mismas mediciones.
+        utc_offset (int, optional): Ver `hour_of_day`.
+
+    Returns:
+        np.ndarray: `0.6745 · (x − mediana) / MAD`; negativo si la medición está por debajo de lo
+        habitual. `nan` donde no hay referencia; 0 si el MAD es 0 y el valor es la mediana.
+    """
+
+    profile = profile if profile is not None else time_of_day_profile(ts, values, utc_offset)
+    hours = hour_of_day(ts, utc_offset)
+    deviation = values - profile["median"][hours]
+    mad = profile["mad"][hours]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = MAD_SCALE * deviation / mad
+    return np.where(deviation == 0, 0.0, scores)
+
+
+# ---------- RESUMEN Y VEREDICTO ----------
+def summarize(ts, down, up, window=ANALYSIS_WINDOW_DAYS * 86400, promised_down=PROMISED_DOWN,
+              promised_up=PROMISED_UP, utc_offset=None):
+    """Análisis completo de un tramo del historial.
+
+    Returns:
+        dict: `samples`, `share_below`, `rolling` (instantes, cantidades y p10/p50/p90 de `down` y
+        `up`), `profile` (por hora, de `down` y `up`) y `anomalies` (cantidad con
+        |puntaje| > `ANOMALY_THRESHOLD` y las 10 peores como `(ts, campo, valor, puntaje)`).
+    """
+
+    report = {"samples": len(ts), "share_below": share_below(ts, down, up, promised_down, promised_up),
+              "rolling": {}, "profile": {}, "anomalies": {"count": 0, "worst": []}}
+    worst = []
+    for field, values in (("down", down), ("up", up)):
+        ends, counts, q = rolling_percentiles(ts, values, window)
+        report["rolling"][field] = {"ts": ends, "count": counts, "p10": q[:, 0], "p50": q[:, 1], "p90": q[:, 2]}
+        profile = report["profile"][field] = time_of_day_profile(ts, values, utc_offset)
+        scores = anomaly_scores(ts, values, profile, utc_offset)
+        flagged = np.flatnonzero(np.abs(np.nan_to_num(scores)) > ANOMALY_THRESHOLD)
+        report["anomalies"]["count"] += len(flagged)
+        worst += [(float(ts[i]), field, float(values[i]), float(scores[i])) for i in flagged]
+    report["anomalies"]["worst"] = sorted(worst, key=lambda item: -abs(item[3]))[:10]
+    return report
+
+
+def assess(store, down, up, now=None, window_days=ANALYSIS_WINDOW_DAYS, complain_share=COMPLAIN_SHARE,
+           promised_down=PROMISED_DOWN, promised_up=PROMISED_UP, utc_offset=None):
+    """Decide si la medición `down`/`up` amerita un tweet, mirando el historial reciente.
+
+    Args:
+        store (MeasurementStore): Historial (la medición ya guardada se incluye en la ventana).
+        down (float | None): Bajada medida (Mbps).
+        up (float | None): Subida medida (Mbps).
+        now (float, optional): Fin de la ventana. Por defecto, ahora.
+        window_days (float, optional): Días de la ventana del veredicto.
+        complain_share (float, optional): Fracción mínima del tiempo bajo lo contratado.
+        promised_down (float, optional): Bajada contratada.
+        promised_up (float, optional): Subida contratada.
+        utc_offset (int, optional): Ver `hour_of_day`.
+
+    Returns:
+        Verdict | None: None si NumPy no está instalado, la medición está incompleta o hay menos
+        de `MIN_SAMPLES` mediciones en la ventana (en esos casos decide la última medición).
+    """
+
+    if np is None or down is None or up is None:
+        return None
+    now = time.time() if now is None else now
+    window = window_days * 86400
+    # Un solo SELECT: la ventana del veredicto es el final del tramo de referencia por hora del día
+    ts, downs, ups = load(store, now - max(window, BASELINE_DAYS * 86400), now + 1)
+    recent = ts >= now - window
+    samples = int(recent.sum())
+    if samples < MIN_SAMPLES:
+        return None
+
+    share = share_below(ts[recent], downs[recent], ups[recent], promised_down, promised_up)
+    median_down = float(np.nanmedian(downs[recent]))
+    median_up = float(np.nanmedian(ups[recent]))
+    point = np.array([now])
+    score_down = float(anomaly_scores(point, np.array([down]), time_of_day_profile(ts, downs, utc_offset), utc_offset)[0])
+    score_up = float(anomaly_scores(point, np.array([up]), time_of_day_profile(ts, ups, utc_offset), utc_offset)[0])
+
+    below = down < promised_down or up < promised_up
+    lowest = min((s for s in (score_down, score_up) if not math.isnan(s)), default=0.0)
+    days = f"{window_days:g} días"
+    if not below:
+        complain, reason = False, "la medición cumple lo contratado"
+    elif share >= complain_share:
+        complain, reason = True, f"{share:.0%} del tiempo bajo lo contratado en los últimos {days}"
+    elif lowest < -ANOMALY_THRESHOLD:
+        complain, reason = False, (f"caída aislada (puntaje {lowest:.1f}): solo {share:.0%} "
+                                   f"del tiempo bajo lo contratado en los últimos {days}")
+    else:
+        complain, reason = False, f"solo {share:.0%} del tiempo bajo lo contratado en los últimos {days}"
+    return Verdict(complain, reason, samples, window_days, share, median_down, median_up, score_down, score_up)
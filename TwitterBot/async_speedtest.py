@@ -0,0 +1,286 @@
+"""Backend de medición sin navegador, basado en asyncio.
+
+Mide bajada y subida abriendo varios streams HTTP en paralelo contra
+endpoints configurables, y la latencia/jitter con requests pequeñas sobre
+una conexión keep-alive. No necesita Chrome ni dependencias externas: usa
+`asyncio.open_connection` y HTTP/1.1 a mano.
+
+Por defecto usa los endpoints públicos de speed.cloudflare.com; para
+pruebas alcanza con un servidor HTTP local que sirva
+`GET /__down?bytes=N` y acepte `POST /__up`, como `bench.server.FixtureServer`.
+
+Uso típico:
+    result = measure(ThroughputConfig(streams=4, duration=8))
+    print(result.down, result.up, result.latency, result.jitter)
+"""
+
+import asyncio
+import os
+import ssl
+import statistics
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+
+@dataclass
+class ThroughputConfig:
+    """Configuración del backend asyncio.
+
+    Attributes:
+        download_url (str): URL de descarga; `{bytes}` se reemplaza por el tamaño pedido.
+        upload_url (str): URL que acepta `POST` con cuerpo arbitrario.
+        latency_url (str): URL liviana para medir latencia.
+        streams (int): Conexiones en paralelo por dirección.
+        duration (float): Segundos de medición por dirección.
+        warmup (float): Segundos iniciales descartados (arranque de TCP).
+        request_bytes (int): Tamaño de cada descarga/subida individual.
+        latency_samples (int): Requests para medir latencia y jitter.
+        timeout (float): Timeout de conexión y de cada lectura (s).
+    """
+
+    download_url: str = "https://speed.cloudflare.com/__down?bytes={bytes}"
+    upload_url: str = "https://speed.cloudflare.com/__up"
+    latency_url: str = "https://speed.cloudflare.com/__down?bytes=0"
+    streams: int = 4
+    duration: float = 8.0
+    warmup: float = 1.0
+    request_bytes: int = 25_000_000
+    latency_samples: int = 10
+    timeout: float = 10.0
+
+    @classmethod
+    def from_env(cls, base_url=None):
+        """Crea la configuración; `XBOT_SPEED_ENDPOINT` (o `base_url`) apunta los tres endpoints a otro host."""
+
+        base_url = base_url or os.getenv("XBOT_SPEED_ENDPOINT")
+        if not base_url:
+            return cls()
+        base_url = base_url.rstrip("/")
+        return cls(
+            download_url=f"{base_url}/__down?bytes={{bytes}}",
+            upload_url=f"{base_url}/__up",
+            latency_url=f"{base_url}/__down?bytes=0",
+        )
+
+
+@dataclass
+class SpeedResult:
+    """Resultado de una medición.
+
+    Attributes:
+        down (float): Bajada (Mbps).
+        up (float): Subida (Mbps).
+        latency (float): Latencia mediana (ms).
+        jitter (float): Variación media entre latencias consecutivas (ms).
+        server (str): Host medido.
+        details (dict): Bytes y segundos contados por dirección.
+    """
+
+    down: float
+    up: float
+    latency: float
+    jitter: float
+    server: str
+    details: dict = field(default_factory=dict)
+
+
+class _Connection:
+    """Conexión HTTP/1.1 keep-alive mínima sobre asyncio streams."""
+
+    def __init__(self, url, timeout):
+        self.parts = urlsplit(url)
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+
+    async def open(self):
+        host = self.parts.hostname
+        secure = self.parts.scheme == "https"
+        port = self.parts.port or (443 if secure else 80)
+        context = ssl.create_default_context() if secure else None
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=context, server_hostname=host if secure else None),
+            self.timeout,
+        )
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    def _head(self, method, url, extra=""):
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        return (f"{method} {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nUser-Agent: InternetSpeedXBot\r\n"
+                f"Accept-Encoding: identity\r\nConnection: keep-alive\r\n{extra}\r\n").encode()
+
+    async def read_head(self):
+        raw = await asyncio.wait_for(self.reader.readuntil(b"\r\n\r\n"), self.timeout)
+        lines = raw.decode("latin-1").split("\r\n")
+        status = int(lines[0].split()[1])
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        return status, headers
+
+    async def read_body(self, headers, on_bytes=None, deadline=None):
+        """Lee el cuerpo (Content-Length o chunked). Devuelve False si se cortó por `deadline`."""
+
+        async def consume(size):
+            while size > 0:
+                if deadline is not None and time.monotonic() >= deadline:
+                    return False
+                chunk = await asyncio.wait_for(self.reader.read(min(size, 1 << 16)), self.timeout)
+                if not chunk:
+                    raise ConnectionError("Conexión cerrada por el servidor.")
+                size -= len(chunk)
+                if on_bytes:
+                    on_bytes(len(chunk))
+            return True
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                line = await asyncio.wait_for(self.reader.readuntil(b"\r\n"), self.timeout)
+                size = int(line.split(b";")[0], 16)
+                if size == 0:
+                    await self.reader.readuntil(b"\r\n")
+                    return True
+                if not await consume(size):
+                    return False
+                await self.reader.readexactly(2)
+        return await consume(int(headers.get("content-length", 0)))
+
+    async def get(self, url, on_bytes=None, deadline=None):
+        self.writer.write(self._head("GET", url))
+        await self.writer.drain()
+        status, headers = await self.read_head()
+        complete = await self.read_body(headers, on_bytes, deadline)
+        return status, complete
+
+    async def post(self, url, size, on_bytes=None, deadline=None):
+        self.writer.write(self._head("POST", url, f"Content-Type: application/octet-stream\r\nContent-Length: {size}\r\n"))
+        block = b"\0" * (1 << 16)
+        sent = 0
+        while sent < size:
+            if deadline is not None and time.monotonic() >= deadline:
+                return None, False
+            chunk = block[: min(len(block), size - sent)]
+            self.writer.write(chunk)
+            await asyncio.wait_for(self.writer.drain(), self.timeout)
+            sent += len(chunk)
+            if on_bytes:
+                on_bytes(len(chunk))
+        status, headers = await self.read_head()
+        await self.read_body(headers)
+        return status, True
+
+
+class _Counter:
+    """Suma bytes solo después del período de warm-up."""
+
+    def __init__(self, start, warmup):
+        self.counting_from = start + warmup
+        self.bytes = 0
+
+    def __call__(self, count):
+        if time.monotonic() >= self.counting_from:
+            self.bytes += count
+
+
+async def _stream(url_factory, send, config, counter, deadline):
+    connection = _Connection(url_factory(), config.timeout)
+    try:
+        await connection.open()
+        while time.monotonic() < deadline:
+            status, complete = await send(connection, counter, deadline)
+            if status is not None and status >= 400:
+                raise ConnectionError(f"El endpoint respondió HTTP {status}.")
+            if not complete:
+                break
+    finally:
+        connection.close()
+
+
+async def _direction(config, url_factory, send):
+    start = time.monotonic()
+    deadline = start + config.warmup + config.duration
+    counter = _Counter(start, config.warmup)
+    await asyncio.gather(*(_stream(url_factory, send, config, counter, deadline) for _ in range(config.streams)))
+    elapsed = max(time.monotonic() - counter.counting_from, 1e-6)
+    return counter.bytes, elapsed
+
+
+async def measure_latency(config):
+    """Mide latencia (mediana) y jitter (ms) con requests secuenciales sobre una conexión.
+
+    Returns:
+        tuple[float, float]: `(latency_ms, jitter_ms)`.
+
+    Raises:
+        ConnectionError: Si el endpoint responde con error.
+    """
+
+    connection = _Connection(config.latency_url, config.timeout)
+    await connection.open()
+    samples = []
+    try:
+        for _ in range(config.latency_samples):
+            start = time.perf_counter()
+            status, _ = await connection.get(config.latency_url)
+            if status >= 400:
+                # Una página de error no es una muestra de latencia del endpoint
+                raise ConnectionError(f"El endpoint de latencia respondió HTTP {status}.")
+            samples.append((time.perf_counter() - start) * 1000)
+    finally:
+        connection.close()
+    jitter = statistics.fmean(abs(b - a) for a, b in zip(samples, samples[1:])) if len(samples) > 1 else 0.0
+    return statistics.median(samples), jitter
+
+
+async def measure_async(config=None):
+    """Mide latencia, bajada y subida (en ese orden, para que no compitan entre sí).
+
+    Args:
+        config (ThroughputConfig, optional): Configuración; por defecto `ThroughputConfig.from_env()`.
+
+    Returns:
+        SpeedResult: Resultado de la medición.
+
+    Raises:
+        ConnectionError: Si algún endpoint falla o responde con error.
+        asyncio.TimeoutError: Si una conexión o lectura supera `config.timeout`.
+    """
+
+    config = config or ThroughputConfig.from_env()
+    latency, jitter = await measure_latency(config)
+
+    download_url = config.download_url.format(bytes=config.request_bytes)
+    down_bytes, down_seconds = await _direction(
+        config, lambda: download_url,
+        lambda conn, counter, deadline: conn.get(download_url, counter, deadline),
+    )
+    up_bytes, up_seconds = await _direction(
+        config, lambda: config.upload_url,
+        lambda conn, counter, deadline: conn.post(config.upload_url, config.request_bytes, counter, deadline),
+    )
+
+    return SpeedResult(
+        down=down_bytes * 8 / down_seconds / 1e6,
+        up=up_bytes * 8 / up_seconds / 1e6,
+        latency=latency,
+        jitter=jitter,
+        server=urlsplit(download_url).netloc,
+        details={"down_bytes": down_bytes, "down_seconds": down_seconds,
+                 "up_bytes": up_bytes, "up_seconds": up_seconds},
+    )
+
+
+def measure(config=None):
+    """Versión sincrónica de `measure_async` (crea su propio event loop)."""
+
+    return asyncio.run(measure_async(config))
@@ -0,0 +1,294 @@
+"""Modo colector: envía las mediciones de este nodo a un agregador central.
+
+Cada medición guardada por `InternetSpeedXBot` se copia a una cola local
+(SQLite) con un `uid` propio, y un hilo en segundo plano la envía en tandas
+compactas (`aggregator.py` describe el formato) por HTTP con gzip,
+reutilizando la conexión. Una tanda sale de la cola recién cuando el
+agregador confirma que la guardó; si la respuesta se pierde, el reenvío
+trae los mismos `uid` y el agregador descarta los repetidos. Si el
+agregador rechaza la tanda (4xx), reenviarla no sirve: pasa a la tabla
+`rejected` de la cola para no bloquear las que vienen detrás.
+
+Se habilita definiendo `XBOT_COLLECTOR_URL` (por ejemplo
+`http://agregador:8750`); `XBOT_SITE` identifica el sitio y `XBOT_NODE` el
+nodo (por defecto, el hostname).
+
+Uso típico:
+    collector = Collector("http://127.0.0.1:8750", site="oficina")
+    collector.submit(store.add(down, up))
+    collector.drain(timeout=10)
+"""
+
+import gzip
+import http.client
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from common.retry import RetryPolicy
+
+COLLECTOR_URL = os.getenv("XBOT_COLLECTOR_URL") or None
+SITE = os.getenv("XBOT_SITE", "default")
+NODE = os.getenv("XBOT_NODE") or socket.gethostname()
+SPOOL_PATH = os.getenv("XBOT_COLLECTOR_SPOOL", str(Path(__file__).resolve().parent / "collector.db"))
+
+# Mediciones por tanda y espera máxima (s) para juntar una tanda antes de enviarla
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 5.0
+
+FIELDS = ("uid", "ts", "down", "up", "latency", "server")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS spool (
+    seq     INTEGER PRIMARY KEY,
+    uid     TEXT NOT NULL UNIQUE,
+    ts      REAL NOT NULL,
+    down    REAL,
+    up      REAL,
+    latency REAL,
+    server  TEXT
+);
+CREATE TABLE IF NOT EXISTS rejected (
+    seq         INTEGER PRIMARY KEY,
+    uid         TEXT NOT NULL,
+    ts          REAL NOT NULL,
+    down        REAL,
+    up          REAL,
+    latency     REAL,
+    server      TEXT,
+    reason      TEXT,
+    rejected_at REAL NOT NULL
+);
+"""
+
+# Respuestas 4xx que sí vale la pena reintentar (el resto indica una tanda que nunca se va a aceptar)
+RETRYABLE_STATUS = (408, 429)
+
+
+class BatchRejected(Exception):
+    """El agregador rechazó la tanda de forma definitiva (respuesta 4xx)."""
+
+
+class Spool:
+    """Cola local de mediciones pendientes de enviar (SQLite).
+
+    Args:
+        path (str): Archivo de la base (`":memory:"` para pruebas).
+    """
+
+    def __init__(self, path=SPOOL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def put(self, rows):
+        """Encola filas `(uid, ts, down, up, latency, server)`."""
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO spool (uid, ts, down, up, latency, server) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def peek(self, limit):
+        """Devuelve `(último seq, filas)` de las `limit` mediciones más viejas."""
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, uid, ts, down, up, latency, server FROM spool ORDER BY seq LIMIT ?", (limit,)
+            ).fetchall()
+        return (rows[-1][0] if rows else None), [row[1:] for row in rows]
+
+    def ack(self, last_seq):
+        """Borra las mediciones ya confirmadas por el agregador (hasta `last_seq` inclusive)."""
+
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM spool WHERE seq <= ?", (last_seq,))
+
+    def reject(self, last_seq, reason):
+        """Mueve a `rejected` las mediciones hasta `last_seq` que el agregador no acepta."""
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO rejected (seq, uid, ts, down, up, latency, server, reason, rejected_at) "
+                "SELECT seq, uid, ts, down, up, latency, server, ?, ? FROM spool WHERE seq <= ?",
+                (reason, time.time(), last_seq),
+            )
+            self._conn.execute("DELETE FROM spool WHERE seq <= ?", (last_seq,))
+
+    def pending(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+
+
+def encode_batch(site, node, rows):
+    """Cuerpo gzip de una tanda para `POST /v1/results`."""
+
+    payload = {"site": site, "node": node, "fields": FIELDS, "rows": rows}
+    return gzip.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"), compresslevel=5)
+
+
+class Collector:
+    """Envía en segundo plano las mediciones de este nodo al agregador.
+
+    Args:
+        url (str): URL base del agregador (`http://host:puerto`).
+        site (str, optional): Sitio al que pertenece el nodo.
+        node (str, optional): Identificador del nodo.
+        spool (Spool, optional): Cola local. Por defecto, la de `SPOOL_PATH`.
+        batch_size (int, optional): Mediciones por tanda.
+        flush_interval (float, optional): Segundos máximos que una medición espera a completar tanda.
+        retry_policy (RetryPolicy, optional): Backoff cuando el agregador no responde.
+        timeout (float, optional): Timeout de cada request (s).
+
+    Attributes:
+        stats (dict): `batches`, `sent`, `duplicates`, `errors` y `rejected` (mediciones que el
+            agregador rechazó y quedaron en la tabla `rejected` de la cola).
+    """
+
+    def __init__(self, url, site=SITE, node=NODE, spool=None, batch_size=BATCH_SIZE,
+                 flush_interval=FLUSH_INTERVAL, retry_policy=None, timeout=10):
+        parts = urlsplit(url)
+        self._scheme, self._netloc = parts.scheme, parts.netloc
+        self._path = parts.path.rstrip("/") + "/v1/results"
+        self.site = site
+        self.node = node
+        self.spool = spool if spool is not None else Spool()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_policy = retry_policy or RetryPolicy(base_delay=2, max_delay=300, jitter="equal")
+        self.timeout = timeout
+        self.stats = {"batches": 0, "sent": 0, "duplicates": 0, "errors": 0, "rejected": 0}
+        self._conn = None
+        self._failures = 0
+        self._send_lock = threading.Lock()  # `drain()` y el hilo de envío no mandan la misma tanda a la vez
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---------- API ----------
+    def submit(self, measurement):
+        """Encola una medición (`measurements.Measurement`) para enviarla. No hace I/O de red."""
+
+        self.submit_many([measurement])
+
+    def submit_many(self, measurements):
+        rows = [(uuid.uuid4().hex, m.ts, m.down, m.up, m.latency, m.server) for m in measurements]
+        self.spool.put(rows)
+        self.start()
+        if self.spool.pending() >= self.batch_size:
+            self._wake.set()
+
+    def start(self):
+        """Arranca el hilo de envío si no está corriendo."""
+
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="collector", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        """Detiene el hilo de envío (lo pendiente queda en la cola local)."""
+
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def drain(self, timeout=30):
+        """Envía ya todo lo pendiente, esperando hasta `timeout` segundos.
+
+        Returns:
+            bool: True si la cola local quedó vacía.
+        """
+
+        deadline = time.monotonic() + timeout
+        while self.spool.pending() and time.monotonic() < deadline:
+            if not self.flush():
+                time.sleep(min(1.0, max(0.0, deadline - time.monotonic())))
+        return self.spool.pending() == 0
+
+    # ---------- ENVÍO ----------
+    def flush(self):
+        """Envía una tanda. Devuelve False si el agregador no la confirmó."""
+
+        with self._send_lock:
+            return self._flush()
+
+    def _flush(self):
+        last_seq, rows = self.spool.peek(self.batch_size)
+        if not rows:
+            return True
+        try:
+            result = self._post(encode_batch(self.site, self.node, rows))
+        except BatchRejected as e:
+            self._failures = 0
+            self.spool.reject(last_seq, str(e))
+            self.stats["rejected"] += len(rows)
+            print(f"❌ El agregador rechazó una tanda de {len(rows)} mediciones ({e}); quedó en la tabla `rejected`.")
+            return True
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            self.stats["errors"] += 1
+            self._failures += 1
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            print(f"⚠️ No se pudo enviar la tanda al agregador: {e}")
+            return False
+        self._failures = 0
+        self.spool.ack(last_seq)
+        self.stats["batches"] += 1
+        self.stats["sent"] += result.get("accepted", 0)
+        self.stats["duplicates"] += result.get("duplicates", 0)
+        return True
+
+    def _post(self, body):
+        if self._conn is None:
+            connection = http.client.HTTPSConnection if self._scheme == "https" else http.client.HTTPConnection
+            self._conn = connection(self._netloc, timeout=self.timeout)
+        self._conn.request("POST", self._path, body, {
+            "Content-Type": "application/json",
+            "Content-Encoding": "gzip",
+        })
+        response = self._conn.getresponse()
+        payload = response.read()
+        if 400 <= response.status < 500 and response.status not in RETRYABLE_STATUS:
+            raise BatchRejected(f"HTTP {response.status}: {payload[:200].decode('utf-8', 'replace')}")
+        if response.status != 200:
+            raise ValueError(f"HTTP {response.status}: {payload[:200].decode('utf-8', 'replace')}")
+        return json.loads(payload)
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self._failures:
+                self._wake.wait(self.retry_policy.backoff(self._failures))
+            elif self.spool.pending() < self.batch_size:
+                self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            while self.spool.pending() and self.flush():
+                pass
+
+
+_collector = None
+
+
+def get_collector():
+    """Devuelve el `Collector` del proceso según `XBOT_COLLECTOR_URL`, o None si está apagado."""
+
+    global _collector
+    if _collector is None and COLLECTOR_URL:
+        _collector = Collector(COLLECTOR_URL)
+    return _collector
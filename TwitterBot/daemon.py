@@ -0,0 +1,301 @@
+"""
+===============================================================================
+Project: InternetSpeedXBot - modo daemon
+Author:  Joaquin Albano
+Python:  3.12+
+-------------------------------------------------------------------------------
+Description:
+    Ejecuta mediciones de velocidad de forma periódica dentro de un único
+    proceso, reutilizando la misma instancia de `InternetSpeedXBot` y su
+    navegador entre ciclos. Así cada ciclo paga solo el test, no el arranque
+    del intérprete, los imports y Chrome (como pasaría lanzando `main.py`
+    desde cron).
+
+      - Programación por intervalo (`--interval`) o expresión cron (`--cron`),
+        con jitter aleatorio opcional.
+      - Si el navegador se cae o se cuelga, se descarta y se toma otro del
+        pool sin salir del proceso.
+      - SIGINT / SIGTERM terminan el ciclo en curso y cierran todo limpio.
+
+Usage:
+    $ python daemon.py --interval 1800 --jitter 60
+    $ python daemon.py --cron "*/30 * * * *" --tweet
+===============================================================================
+"""
+
+import argparse
+import random
+import signal
+import threading
+import time
+from datetime import datetime, timedelta
+
+if __name__ == "__main__":
+    # `main` y los módulos que importa leen su configuración del entorno al importarse
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+from selenium.common.exceptions import WebDriverException
+
+from main import InternetSpeedXBot, MEASUREMENT_MODE, PROMISED_DOWN, PROMISED_UP
+from common.retry import CircuitOpenError, classify_error
+
+
+class CronSchedule:
+    """Expresión cron de 5 campos (minuto hora día-del-mes mes día-de-la-semana).
+
+    Soporta `*`, valores sueltos, listas (`1,15`), rangos (`9-18`) y pasos
+    (`*/15`, `0-30/10`). El día de la semana va de 0 (domingo) a 6.
+
+    Args:
+        expression (str): Expresión cron.
+
+    Raises:
+        ValueError: Si la expresión no es válida.
+    """
+
+    _RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"La expresión cron necesita 5 campos: {expression!r}")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            self._parse(field, low, high) for field, (low, high) in zip(fields, self._RANGES)
+        )
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    @staticmethod
+    def _parse(field, low, high):
+        values = set()
+        for part in field.split(","):
+            step = 1
+            if "/" in part:
+                part, step = part.split("/", 1)
+                step = int(step)
+            if part == "*":
+                start, end = low, high
+            elif "-" in part:
+                start, end = (int(x) for x in part.split("-", 1))
+            else:
+                start = end = int(part)
+            if start < low or end > high or step < 1:
+                raise ValueError(f"Campo cron fuera de rango: {field!r}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment):
+        weekday = (moment.weekday() + 1) % 7          # Python: lunes = 0; cron: domingo = 0
+        day_ok = moment.day in self.days
+        weekday_ok = weekday in self.weekdays
+        # Semántica clásica de cron: si ambos campos están restringidos basta con uno
+        if not self._any_day and not self._any_weekday:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def next_after(self, moment):
+        """Devuelve el próximo instante (al minuto) posterior a `moment` que cumple la expresión.
+
+        Args:
+            moment (datetime): Instante de referencia (hora local).
+
+        Returns:
+            datetime: Próxima ejecución.
+        """
+
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 4)
+        while candidate < limit:
+            if candidate.month not in self.months or not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+                continue
+            if candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+                continue
+            return candidate
+        raise ValueError(f"La expresión cron nunca se cumple: {self.expression!r}")
+
+
+class IntervalSchedule:
+    """Ejecución cada `seconds` segundos, medidos desde el inicio del ciclo anterior."""
+
+    def __init__(self, seconds):
+        if seconds <= 0:
+            raise ValueError("El intervalo debe ser positivo.")
+        self.seconds = seconds
+
+    def next_after(self, moment):
+        return moment + timedelta(seconds=self.seconds)
+
+
+class SpeedDaemon:
+    """Bucle de mediciones periódicas sobre un `InternetSpeedXBot` reutilizado.
+
+    Args:
+        schedule (CronSchedule | IntervalSchedule): Cuándo medir.
+        jitter (float, optional): Segundos aleatorios (0..jitter) sumados a cada ejecución.
+        tweet (bool, optional): Publica un tweet cuando la velocidad es menor a la contratada.
+        bot_factory (Callable[[], InternetSpeedXBot], optional): Crea el bot.
+        run_immediately (bool, optional): Mide apenas arranca, sin esperar al primer turno.
+    """
+
+    def __init__(self, schedule, jitter=0, tweet=False, bot_factory=None, run_immediately=True):
+        self.schedule = schedule
+        self.jitter = jitter
+        self.tweet = tweet
+        self.bot_factory = bot_factory or (lambda: InternetSpeedXBot(measurement_mode=MEASUREMENT_MODE))
+        self.run_immediately = run_immediately
+        self.bot = None
+        self.cycles = 0
+        self.failures = 0
+        self.driver_restarts = 0
+        self._stop = threading.Event()
+
+    def stop(self, *_):
+        """Pide terminar el daemon (se puede usar como handler de señales)."""
+
+        print("🛑 Señal recibida, terminando el daemon...")
+        self._stop.set()
+
+    def install_signal_handlers(self):
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+
+    def _next_run(self, now):
+        return self.schedule.next_after(now) + timedelta(seconds=random.uniform(0, self.jitter))
+
+    def _below_promise(self):
+        measurement = self.bot.last_measurement
+        if measurement is None or measurement.down is None or measurement.up is None:
+            return False
+        # Con historial suficiente decide el veredicto (una caída aislada no se tweetea)
+        verdict = self.bot.assess()
+        if verdict is not None:
+            if not verdict.complain and (measurement.down < PROMISED_DOWN or measurement.up < PROMISED_UP):
+                print(f"ℹ️ Sin tweet: {verdict.reason}.")
+            return verdict.complain
+        return measurement.down < PROMISED_DOWN or measurement.up < PROMISED_UP
+
+    def run_cycle(self):
+        """Ejecuta una medición, recuperando el navegador si se cayó.
+
+        Returns:
+            bool: True si la medición terminó bien.
+        """
+
+        self.cycles += 1
+        try:
+            return self._run_cycle()
+        finally:
+            # Cada ciclo (medición y tweet) es una ejecución en las trazas, si están habilitadas
+            self.bot.tracer.flush()
+
+    def _run_cycle(self):
+        started = time.monotonic()
+        try:
+            # Cada ciclo es una medición nueva; las demás llamadas del equipo reutilizan su resultado
+            self.bot.get_internet_speed(force_refresh=True)
+        except CircuitOpenError as e:
+            print(f"⏸️ {e}")
+            self.failures += 1
+            return False
+        except WebDriverException as e:
+            self.failures += 1
+            category = classify_error(e)
+            print(f"❌ Ciclo {self.cycles} fallido ({category}): {e.msg}")
+            # Timeouts y errores de red se resuelven en el próximo ciclo; un navegador roto se reemplaza
+            if category in ("driver_lost", "fatal"):
+                self.restart_driver()
+            return False
+        except OSError as e:
+            # Backend `http`: errores de conexión o timeouts contra los endpoints
+            self.failures += 1
+            print(f"❌ Ciclo {self.cycles} fallido ({classify_error(e)}): {e}")
+            return False
+        except Exception as e:
+            # Cualquier otro error (SQLite, un resultado inesperado de la página...) no detiene el daemon
+            self.failures += 1
+            print(f"❌ Ciclo {self.cycles} fallido ({type(e).__name__}): {e}")
+            return False
+
+        print(f"Ciclo {self.cycles} completado en {time.monotonic() - started:.1f}s")
+        try:
+            if self.bot.recycle_if_needed():
+                self.driver_restarts += 1
+        except (WebDriverException, TimeoutError) as e:
+            print(f"❌ No se pudo reciclar el navegador: {e}")
+        try:
+            if self.tweet and self._below_promise():
+                self.bot.tweet_at_provider()
+        except Exception as e:
+            # La medición ya quedó guardada; el tweet se reintenta con la próxima queja
+            self.failures += 1
+            print(f"❌ No se pudo encolar el tweet del ciclo {self.cycles} ({type(e).__name__}): {e}")
+            return False
+        return True
+
+    def restart_driver(self):
+        """Reemplaza el navegador del bot sin salir del proceso."""
+
+        try:
+            self.bot.restart_driver()
+            self.driver_restarts += 1
+            print("🔁 Navegador reemplazado.")
+        except (WebDriverException, TimeoutError) as e:
+            print(f"❌ No se pudo reiniciar el navegador: {e}")
+
+    def run(self):
+        """Bucle principal. Vuelve cuando se llama a `stop()` o llega una señal."""
+
+        self.bot = self.bot_factory()
+        try:
+            next_run = datetime.now() if self.run_immediately else self._next_run(datetime.now())
+            while not self._stop.is_set():
+                wait = (next_run - datetime.now()).total_seconds()
+                if wait > 0:
+                    print(f"Próxima medición: {next_run:%Y-%m-%d %H:%M:%S}")
+                    if self._stop.wait(wait):
+                        break
+
+                cycle_start = datetime.now()
+                self.run_cycle()
+                next_run = self._next_run(cycle_start)
+                # Si un ciclo se alargó más que el intervalo, no se encadenan mediciones atrasadas
+                if next_run <= datetime.now():
+                    next_run = self._next_run(datetime.now())
+        finally:
+            self.bot.close()
+            self.bot.publisher.drain(timeout=10)
+            if self.bot.collector is not None:
+                self.bot.collector.drain(timeout=10)
+            print(f"Daemon terminado: {self.cycles} ciclos, {self.failures} fallidos, "
+                  f"{self.driver_restarts} reinicios de navegador.")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Mide la velocidad de Internet de forma periódica.")
+    schedule = parser.add_mutually_exclusive_group(required=True)
+    schedule.add_argument("--interval", type=float, help="Segundos entre mediciones.")
+    schedule.add_argument("--cron", help='Expresión cron de 5 campos, por ejemplo "*/30 * * * *".')
+    parser.add_argument("--jitter", type=float, default=0, help="Segundos aleatorios extra por ciclo.")
+    parser.add_argument("--tweet", action="store_true", help="Publica si la velocidad es menor a la contratada.")
+    parser.add_argument("--no-immediate", action="store_true", help="Espera al primer turno antes de medir.")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    schedule = CronSchedule(args.cron) if args.cron else IntervalSchedule(args.interval)
+    daemon = SpeedDaemon(schedule, jitter=args.jitter, tweet=args.tweet, run_immediately=not args.no_immediate)
+    daemon.install_signal_handlers()
+    daemon.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -38,26 +38,84 @@ License:
 ===============================================================================
 """
 
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
 import time
 import os
-from dotenv import load_dotenv
-import tweepy
+import sys
+from dataclasses import asdict
+from pathlib import Path
+from urllib.parse import urlsplit
 
-load_dotenv()
-
-PROMISED_DOWN = 300
-PROMISED_UP = 150
-api_key = os.getenv("X_API_KEY")
-api_secret = os.getenv("X_API_KEY_SECRET")
-access_token = os.getenv("X_ACCESS_TOKEN")
-token_secret = os.getenv("X_ACCESS_TOKEN_SECRET")
+if __name__ == "__main__":
+    # Solo al correr `python main.py`: quien importa el módulo (cli.py, daemon.py, bench) ya cargó su
+    # configuración. Va antes de importar los módulos que leen el entorno al importarse
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+# Permite importar el paquete compartido `common` al ejecutar `python main.py` desde esta carpeta
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from common.browser_supervisor import get_supervisor
+from common.driver_pool import BLOCKED_PERMISSION_PREFS, build_chrome_options, get_pool
+from common.profiles import get_profiles
+from common.measurement_mode import (
+    MeasurementModeConfig,
+    TrafficMeter,
+    apply_measurement_mode,
+    enable_request_blocking,
+)
+from common.readiness import Readiness
+from common.retry import Retrier, RetryPolicy, get_breaker
+from common.roundtrips import install_counter
+from common.tracing import Tracer, traced
+
+from measurements import DB_PATH, Measurement, MeasurementStore
+from speed_cache import SPEED_CACHE_TTL, SpeedCache
+from collector import get_collector
+from result_capture import ResultCapture
+from tweets import (  # Reexportados: `daemon.py` y otros scripts los importan desde acá
+    DIGEST_WINDOW,
+    OUTBOX_PATH,
+    PROMISED_DOWN,
+    PROMISED_UP,
+    assess_latest,
+    compose_tweet,
+    format_digest,
+    get_publisher,
+)
+from async_speedtest import ThroughputConfig, measure as measure_throughput
+
+# Navegadores que el pool mantiene calientes dentro del proceso
+POOL_SIZE = int(os.getenv("XBOT_POOL_SIZE", "1"))
+PROFILE_DIR = f"{os.getcwd()}/chrome_profile_xbot"
+
+# Modo medición (headless, carga `eager` y bloqueo de recursos pesados): opt-in
+MEASUREMENT_MODE = os.getenv("XBOT_MEASUREMENT_MODE", "0") == "1"
+
+# Página del test (se puede apuntar a un fixture local, ver `bench/`)
+SPEEDTEST_URL = os.getenv("XBOT_SPEEDTEST_URL", "https://www.speedtest.net/")
+
+# Captura de resultados: "hook" (por eventos, con muestras de progreso) o "dom" (esperas sobre la página)
+RESULT_CAPTURE = os.getenv("XBOT_RESULT_CAPTURE", "hook")
+# Plazo (s) del hook para entregar el resultado antes de pasar a las esperas sobre el DOM
+CAPTURE_TIMEOUT = 90
+
+# Ventana sin mutaciones del DOM para considerar que la página terminó de renderizar (s)
+PAGE_QUIET_TIME = 0.5
+# Requests en vuelo tolerados por la espera de red ociosa (publicidad y conexiones largas de la página)
+# y plazo máximo de esa espera: si no se cumple, el test arranca igual
+PAGE_IDLE_INFLIGHT = 2
+PAGE_IDLE_TIMEOUT = 5
+# Backend de medición: "selenium" (Speedtest.net en Chrome) o "http" (asyncio, sin navegador)
+SPEED_BACKENDS = ("selenium", "http")
+SPEED_BACKEND = os.getenv("XBOT_SPEED_BACKEND", "selenium")
+
+# Reintentos por paso del test: backoff exponencial con jitter y plazo total por paso (s)
+SPEEDTEST_RETRY_POLICY = RetryPolicy(max_attempts=5, base_delay=1, max_delay=15, deadline=180)
 
 """InternetSpeedXBot: mide la velocidad de Internet y publica un tweet.
 
@@ -66,33 +124,66 @@ Permite automatizar la medición de velocidad de conexión usando Selenium
 y publicar los resultados en X (Twitter) usando la API oficial a través de Tweepy.
 
 Uso típico:
-    bot = InternetSpeedXBot()
+    bot = InternetSpeedXBot(measurement_mode=MEASUREMENT_MODE)
     bot.get_internet_speed()
     bot.tweet_at_provider()
 """
 
+def xbot_profiles(measurement=False):
+    """Perfiles de Chrome del bot de X (ver `common.profiles`; se configuran con `XBOT_PROFILE_*`).
+
+        Args:
+            measurement (bool, optional): El perfil del modo medición, separado del normal.
+
+        Returns:
+            ProfileManager: Manager compartido por el proceso.
+    """
+
+    if measurement:
+        return get_profiles("xbot-measure", "XBOT", f"{PROFILE_DIR}_measure")
+    return get_profiles("xbot", "XBOT", PROFILE_DIR)
+
+def xbot_chrome_options(slot=0, measurement=None):
+    """Construye las opciones de Chrome del bot de X para un slot del pool.
+
+        Args:
+            slot (int, optional): Índice del navegador dentro del pool. Cada slot usa su
+                propia carpeta de perfil porque Chrome bloquea el perfil en uso (ver `xbot_profiles`).
+            measurement (MeasurementModeConfig, optional): Si se indica, aplica el modo
+                medición sobre las opciones (con un perfil separado).
+
+        Returns:
+            Options: Opciones con perfil propio y permisos innecesarios bloqueados.
+    """
+
+    # Perfil limpio (sin cookies viejas de X): un clon efímero del perfil base, o la carpeta podada
+    profile_dir = xbot_profiles(measurement is not None).prepare(slot)
+    options = build_chrome_options(user_data_dir=profile_dir, prefs=BLOCKED_PERMISSION_PREFS)
+
+    if measurement is not None:
+        apply_measurement_mode(options, measurement)
+    return options
+
 def retry(func, retries=5, description=""):
     """Reintenta ejecutar una función ante errores temporales de Selenium o red.
 
+        Se conserva por compatibilidad: delega en `common.retry.Retrier`, que aplica
+        backoff exponencial con jitter y solo reintenta errores clasificados como
+        transitorios (timeouts, elementos stale, errores de red...).
+
         Args:
             func (Callable): Función que se intentará ejecutar.
             retries (int, optional): Número máximo de intentos. Por defecto es 5.
             description (str, optional): Descripción del proceso para imprimir en consola.
 
         Raises:
-            TimeoutException: Si la función falla después de agotar los reintentos.
+            Exception: La última excepción de `func` si no es reintentable o se agotaron los intentos.
 
         Returns:
             Any: El valor retornado por `func` si se ejecuta correctamente.
     """
 
-    for attempt in range(1, retries + 1):
-        try:
-            return func()
-        except TimeoutException:
-            print(f"Intento {attempt}/{retries} fallido al {description}. Reintentando...")
-            time.sleep(2)
-    raise TimeoutException(f"Error: no se pudo completar {description} después de {retries} intentos.")
+    return Retrier(RetryPolicy(max_attempts=retries)).call(func, step=description)
 
 class InternetSpeedXBot:
 
@@ -104,8 +195,30 @@ class InternetSpeedXBot:
         Attributes:
             down (float): Velocidad de descarga (Mbps).
             up (float): Velocidad de subida (Mbps).
+            measurement (MeasurementModeConfig | None): Configuración del modo medición, si está activo.
+            traffic (TrafficMeter | None): Contador de bytes ajenos al test (solo en modo medición).
+            traffic_summary (dict | None): Resumen de tráfico de la última medición.
+            latency (str | None): Ping mostrado por Speedtest (ms), si pudo leerse.
+            jitter (str | None): Jitter (ms); solo lo informa el backend `http`.
+            backend (str): Backend de medición en uso (`"selenium"` o `"http"`).
+            speedtest_url (str): Página del test del backend `selenium`.
+            server (str | None): Servidor usado por el test, si pudo leerse.
+            progress (list[dict]): Muestras `{t, phase, value}` del velocímetro durante el último test
+                (solo con la captura por hook).
+            capture_source (str | None): Cómo se leyó el último resultado: `"hook"` o `"dom"`.
+            store (MeasurementStore): Historial local de mediciones.
+            last_measurement (Measurement | None): Última medición guardada en `store`.
+            publisher (Publisher): Cola persistente y envío en segundo plano de tweets.
+            collector (Collector | None): Envío de las mediciones al agregador central (modo colector).
+            speed_cache (SpeedCache | None): Caché de mediciones recientes; `speed_cache.stats` tiene
+                los hits y misses.
+            cache_key (str): Destino medido, clave de la medición en `speed_cache`.
             driver (webdriver.Chrome): Instancia del navegador controlada por Selenium.
             wait (WebDriverWait): Objeto de espera explícita para sincronización con elementos.
+            ready (Readiness): Esperas basadas en eventos; `ready.results` guarda cuánto tardó cada una.
+            retrier (Retrier): Reintentos por paso; `retrier.stats` guarda tiempos y resultados por intento.
+            tracer (Tracer): Spans por paso (tiempo real, CPU y comandos WebDriver). Se habilita con
+                `XBOT_TRACE=1` o `XBOT_TRACE_DIR` (exporta JSON de Chrome trace).
 
         Example:
             # >>> bot = InternetSpeedXBot()
@@ -118,141 +231,435 @@ class InternetSpeedXBot:
             ✅ Tweet publicado con ID: 1827364519287346
     """
 
-    def __init__(self):
+    def __init__(self, pool=None, measurement_mode=False, store=None, publisher=None, backend=None,
+                 speedtest_url=None, collector=None, speed_cache=None):
 
-        """Inicializa la instancia y configura el WebDriver de Chrome.
+        """Inicializa la instancia y toma un WebDriver de Chrome del pool compartido.
 
-           Crea el navegador con opciones y preferencias predefinidas:
+           El navegador se crea con opciones y preferencias predefinidas (ver `xbot_chrome_options`):
            - perfil de usuario (user-data-dir)
            - bloqueo de permisos (notificaciones, geolocalización, cámara, micrófono)
            - flags para reducir detección de automatización
 
+           Args:
+               pool (DriverPool, optional): Pool del que tomar el navegador. Por defecto se usa
+                   el pool "xbot" del proceso, de tamaño `POOL_SIZE`.
+               measurement_mode (bool | MeasurementModeConfig, optional): Activa el modo
+                   medición (headless, carga `eager`, bloqueo de recursos por CDP y conteo de
+                   bytes ajenos al test). Acepta `True` o una configuración propia.
+               store (MeasurementStore, optional): Dónde guardar cada medición. Por defecto,
+                   la base SQLite de `DB_PATH`.
+               publisher (Publisher, optional): Cola de tweets. Por defecto, `get_publisher()`.
+               backend (str, optional): `"selenium"` (Speedtest.net en Chrome) o `"http"`
+                   (asyncio, sin navegador). Por defecto, `SPEED_BACKEND`.
+               speedtest_url (str, optional): Página del test (por defecto `SPEEDTEST_URL`);
+                   permite usar un fixture local para benchmarks sin red.
+               collector (Collector, optional): Envía cada medición al agregador central. Por
+                   defecto, `get_collector()` (solo si está definido `XBOT_COLLECTOR_URL`).
+               speed_cache (SpeedCache, optional): Caché de la última medición compartida entre
+                   procesos. Por defecto, una con `XBOT_SPEED_CACHE_TTL` (ninguna si vale `0`).
+
            No retorna nada. Si la inicialización del driver falla, se propagará la excepción
            correspondiente de Selenium (por ejemplo, `WebDriverException`).
         """
 
         self.down = 0
         self.up = 0
+        self.latency = None
+        self.jitter = None
+        self.server = None
+        self.progress = []
+        self.capture_source = None
+        self.last_measurement = None
+        self.verdict = None
+        self.store = store if store is not None else MeasurementStore(DB_PATH)
+        self.publisher = publisher if publisher is not None else get_publisher()
+        self.collector = collector if collector is not None else get_collector()
+        self.speed_cache = speed_cache if speed_cache is not None else (SpeedCache() if SPEED_CACHE_TTL > 0 else None)
+        self.traffic = None
+        self.traffic_summary = None
+        self.tracer = Tracer.from_env("xbot", "XBOT")
+
+        self.backend = backend or SPEED_BACKEND
+        if self.backend not in SPEED_BACKENDS:
+            raise ValueError(f"Backend de medición desconocido: {self.backend}")
+        self.http_config = ThroughputConfig.from_env() if self.backend == "http" else None
+        self.speedtest_url = speedtest_url or SPEEDTEST_URL
+
+        # Reintentos por paso con circuit breaker compartido por destino medido
+        target_url = self.speedtest_url if self.http_config is None else self.http_config.download_url
+        target = urlsplit(target_url).netloc.removeprefix("www.")
+        self.retrier = Retrier(SPEEDTEST_RETRY_POLICY, breaker=get_breaker(target))
+        self.cache_key = f"{self.backend}:{target_url}"
+
+        if self.backend == "http":
+            # Sin navegador: no se toma nada del pool
+            self.measurement = None
+            self.pool = self._lease = self.driver = self.wait = self.ready = self.capture = None
+            return
+
+        if measurement_mode is True:
+            measurement_mode = MeasurementModeConfig()
+        self.measurement = measurement_mode or None
 
         # ---------- CONFIGURACION DEL DRIVER E INICIACION DEL NAVEGADOR ----------
-        # Evita la detección de automatización
-        service = Service()
-        options = Options()
-        options.add_argument("--start-maximized")
-        options.add_argument("--disable-infobars")
-        options.add_argument("--disable-extensions")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_experimental_option("useAutomationExtension", False)
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_experimental_option("useAutomationExtension", False)
-        options.add_argument("--disable-blink-features=AutomationControlled")
-
-        # Perfil limpio o nuevo (sin cookies viejas de X)
-        options.add_argument(f"--user-data-dir={os.getcwd()}/chrome_profile_xbot")
-
-        # Bloquear permisos innecesarios
-        prefs = {
-            "profile.default_content_setting_values.notifications": 2,
-            "profile.default_content_setting_values.geolocation": 2,
-            "profile.default_content_setting_values.media_stream_mic": 2,
-            "profile.default_content_setting_values.media_stream_camera": 2,
-        }
-        options.add_experimental_option("prefs", prefs)
-
-        # Mantiene abierto el navegador
-        options.add_experimental_option("detach", True)
+        # El navegador sale del pool compartido: si ya hay uno caliente no se paga el arranque en frío
+        if pool is None:
+            # Plazos duros por comando, reciclado por ejecuciones/memoria y limpieza de huérfanos. Un
+            # supervisor por pool: cerrar uno no debe terminar los navegadores del otro
+            if self.measurement is None:
+                pool = get_pool("xbot", xbot_chrome_options, size=POOL_SIZE,
+                                supervisor=get_supervisor("xbot", "XBOT"), origins=(self.speedtest_url,))
+            else:
+                measurement = self.measurement
+                pool = get_pool("xbot-measure",
+                                lambda slot: xbot_chrome_options(slot, measurement),
+                                size=POOL_SIZE, supervisor=get_supervisor("xbot-measure", "XBOT"),
+                                origins=(self.speedtest_url,))
+        self.pool = pool
+        self._attach_driver()
+
+    def _attach_driver(self):
+        """Toma un navegador del pool y prepara las utilidades que dependen de él.
+
+           Antes completa el pool: los `XBOT_POOL_SIZE` navegadores arrancan en paralelo y
+           los siguientes préstamos (otro bot del proceso, o el reemplazo de un navegador
+           reciclado en el daemon) los encuentran ya lanzados.
+        """
 
-        # Inicio del driver con configuracion y servicio
-        self.driver = webdriver.Chrome(service=service, options=options)
+        with self.tracer.span("driver_warm"):
+            try:
+                self.pool.warm()
+            except WebDriverException as e:
+                print(f"⚠️ No se pudieron precalentar todos los navegadores: {e.msg}")
+        with self.tracer.span("driver_lease") as span:
+            self._lease = self.pool.lease()
+            span.set(slot=self._lease.slot, acquire_ms=round(self._lease.acquire_ms, 1))
+        self.driver = self._lease.driver
+        if self.tracer.enabled:
+            self.tracer.counter = install_counter(self.driver)
+
+        if self.measurement is not None:
+            enable_request_blocking(self.driver, self.measurement)
+            self.traffic = TrafficMeter(self.driver, self.measurement.test_url_patterns)
 
         # Espera explícita (para usar más adelante)
         self.wait = WebDriverWait(self.driver, 15)
+        # Esperas basadas en eventos (readyState, red ociosa, DOM estable) con tiempos registrados
+        self.ready = Readiness(self.driver, timeout=15)
+        # Resultado por eventos dentro de la página; si no llega, se usan las esperas de `self.wait`
+        self.capture = ResultCapture(self.driver) if RESULT_CAPTURE == "hook" else None
+
+    def _release_driver(self, discard=False):
+        """Devuelve el navegador al pool; antes suelta el contador de tráfico suscripto a sus eventos."""
+
+        if self.traffic is not None:
+            self.traffic.close()
+            self.traffic = None
+        self._lease.release(discard=discard)
+
+    def restart_driver(self):
+
+        """Descarta el navegador actual (colgado o caído) y toma otro del pool.
+
+           Se usa para recuperarse de un driver roto sin recrear el bot ni salir del proceso.
+        """
+
+        if self._lease is None:
+            return
+        self._release_driver(discard=True)
+        self._attach_driver()
+
+    def recycle_if_needed(self):
 
-    def get_internet_speed(self):
+        """Reemplaza el navegador si el supervisor del pool pide reciclarlo.
 
-        """Ejecuta un test de velocidad en Speedtest.net y guarda los resultados.
+           Motivos: superó `XBOT_RECYCLE_RUNS` ejecuciones o `XBOT_RECYCLE_RSS_MB` de memoria.
+           Lo usa el daemon entre ciclos; en una ejecución suelta el pool lo descarta al devolverlo.
+
+           Returns:
+               bool: True si se reemplazó el navegador.
+        """
 
-            Flujo:
-                1. Abre `https://www.speedtest.net`.
+        supervisor = getattr(self.pool, "supervisor", None)
+        if self._lease is None or supervisor is None:
+            return False
+        reason = supervisor.recycle_reason(self.driver)
+        if not reason:
+            return False
+        supervisor.recycled(reason)
+        self.restart_driver()
+        return True
+
+    def close(self):
+
+        """Devuelve el navegador al pool (limpiando cookies, pestañas y storage).
+
+           El navegador queda caliente para la siguiente ejecución del proceso y se
+           cierra definitivamente al salir. Con el backend `http` no hay nada que liberar.
+           Si las trazas están habilitadas, se exportan las de esta ejecución.
+        """
+
+        if self._lease is not None:
+            self._release_driver()
+        self.tracer.flush()
+
+    @traced()
+    def get_internet_speed(self, force_refresh=False):
+
+        """Obtiene la velocidad actual: de la caché si hay una medición reciente, o con un test nuevo.
+
+            Con `self.speed_cache` (por defecto, TTL de `XBOT_SPEED_CACHE_TTL` segundos), una medición
+            del mismo destino de hace menos del TTL se reutiliza aunque la haya hecho otro proceso, y
+            si otro proceso está midiendo se espera su resultado en lugar de correr un segundo test.
+            Una medición reutilizada no se vuelve a guardar en el historial ni a enviar al agregador.
+
+            Args:
+                force_refresh (bool, optional): Corre un test nuevo aunque haya una medición vigente.
+
+            Raises:
+                TimeoutError: Si otro proceso retuvo el test en curso más de lo esperable.
+                (y las de `measure()`)
+        """
+
+        if self.speed_cache is None:
+            self.measure()
+            return
+        with self.tracer.span("speed_cache") as span:
+            entry, hit = self.speed_cache.get(self.cache_key, self._measure_for_cache, force_refresh)
+            span.set(hit=hit, force_refresh=force_refresh)
+        if hit:
+            self._apply_cached(entry)
+
+    def _measure_for_cache(self):
+        self.measure()
+        return {
+            "down": self.down,
+            "up": self.up,
+            "latency": self.latency,
+            "jitter": self.jitter,
+            "server": self.server,
+            "capture_source": self.capture_source,
+            "measurement": asdict(self.last_measurement),
+        }
+
+    def _apply_cached(self, entry):
+        """Carga en el bot una medición de la caché (ya guardada por quien la hizo)."""
+
+        self.down, self.up = entry["down"], entry["up"]
+        self.latency, self.jitter, self.server = entry.get("latency"), entry.get("jitter"), entry.get("server")
+        self.capture_source = "cache"
+        self.progress = []
+        self.traffic_summary = None
+        self.verdict = None
+        self.last_measurement = Measurement(**entry["measurement"])
+        print(f"♻️ Medición reutilizada de hace {time.time() - entry['ts']:.0f}s "
+              f"(caché de {self.speed_cache.ttl:g}s; force_refresh=True para medir de nuevo).")
+        print(f"Velocidad de bajada: {self.down}")
+        print(f"Velocidad de subida: {self.up}")
+
+    def measure(self):
+
+        """Ejecuta un test de velocidad y guarda los resultados (sin pasar por la caché).
+
+            Con el backend `selenium` (por defecto) el flujo es el de Speedtest.net descrito
+            abajo. Con el backend `http` no se usa navegador: se mide con streams HTTP en
+            paralelo (asyncio) y además se obtienen latencia y jitter.
+
+            Flujo (backend `selenium`):
+                1. Abre `https://www.speedtest.net` (o `self.speedtest_url`).
                 2. Acepta cookies si aparece el banner.
                 3. Inicia la prueba de velocidad.
                 4. Espera hasta que los resultados estén disponibles.
                 5. Guarda la velocidad de descarga (`self.down`) y subida (`self.up`).
+                6. Registra la medición en el historial local (`self.store`) y, en modo colector,
+                   la encola para el agregador central (`self.collector`).
 
-            Utiliza `retry()` para manejar errores de red o tiempo de espera.
+            Cada paso (abrir la página, iniciar el test, leer resultados) se reintenta por
+            separado con `self.retrier`, de modo que un fallo no repite el flujo completo.
+            Cada intento queda como un span de `self.tracer`.
 
             Raises:
                 TimeoutException: Si los elementos no aparecen dentro del tiempo límite.
                 WebDriverException: Si el navegador falla durante la ejecución.
+                ConnectionError: Si los endpoints del backend `http` fallan.
+                CircuitOpenError: Si speedtest.net falló repetidamente y el circuito está abierto.
 
             Example:
                 # >>> bot = InternetSpeedXBot()
-                # >>> bot.get_internet_speed()
+                # >>> bot.measure()
                 🕓 Ejecutando test de velocidad...
                 Velocidad de bajada: 125.4
                 Velocidad de subida: 49.8
         """
 
-        def run_speedtest():
-            print("🕓 Ejecutando test de velocidad...")
-            self.driver.get("https://www.speedtest.net/")
+        print("🕓 Ejecutando test de velocidad...")
+        started = time.monotonic()
+        if self.backend == "http":
+            self._run_http_speedtest()
+        elif getattr(self.pool, "supervisor", None) is not None:
+            # Cuenta la ejecución y mide la memoria del navegador para decidir si reciclarlo
+            with self.pool.supervisor.run(self.driver):
+                self._run_selenium_speedtest()
+        else:
+            self._run_selenium_speedtest()
+        print(f"Velocidad de bajada: {self.down}")
+        print(f"Velocidad de subida: {self.up}")
 
-            time.sleep(10)
+        self.verdict = None
+        with self.tracer.span("store"):
+            self.last_measurement = self.store.add(self.down, self.up, server=self.server,
+                                                   latency=self.latency, duration=time.monotonic() - started)
+        if self.collector is not None:
+            self.collector.submit(self.last_measurement)
+
+        if self.traffic is not None:
+            self.traffic_summary = self.traffic.collect()
+            print(f"Tráfico ajeno al test: {self.traffic_summary['overhead_bytes'] / 1024:.1f} KB "
+                  f"({self.traffic_summary['blocked_requests']} requests bloqueados)")
+
+    def _run_http_speedtest(self):
+        """Backend sin navegador: streams HTTP en paralelo con asyncio (ver `async_speedtest`)."""
+
+        result = self.retrier.call(self.tracer.wrap(lambda: measure_throughput(self.http_config), "http_measure"),
+                                   step="medir por HTTP")
+        self.down = f"{result.down:.2f}"
+        self.up = f"{result.up:.2f}"
+        self.latency = f"{result.latency:.1f}"
+        self.jitter = f"{result.jitter:.1f}"
+        self.server = result.server
+
+    def _run_selenium_speedtest(self):
+        """Backend Selenium: corre el test en Speedtest.net, reintentando cada paso por separado."""
+
+        def open_page():
+            if self.traffic is not None:
+                self.traffic.reset()
+            with self.tracer.span("page_load"):
+                self.driver.get(self.speedtest_url)
+
+                # En lugar de un sleep fijo: vuelve apenas el DOM está listo, la red se calmó y el DOM dejó de mutar
+                self.ready.document_ready(state="interactive")
+                self.ready.network_idle(idle_time=PAGE_QUIET_TIME, max_inflight=PAGE_IDLE_INFLIGHT,
+                                        timeout=PAGE_IDLE_TIMEOUT)
+                self.ready.dom_quiet(quiet_time=PAGE_QUIET_TIME)
 
             # Aceptar cookies si aparecen
-            try:
-                cookie_btn = self.wait.until(EC.element_to_be_clickable((By.ID, "onetrust-accept-btn-handler")))
-                cookie_btn.click()
-            except (TimeoutException, NoSuchElementException):
-                print("No aparecio el boton de cookies, continuando...")
-
+            with self.tracer.span("cookie_banner") as span:
+                try:
+                    cookie_btn = self.wait.until(EC.element_to_be_clickable((By.ID, "onetrust-accept-btn-handler")))
+                    cookie_btn.click()
+                    span.set(found=True)
+                except (TimeoutException, NoSuchElementException):
+                    span.set(found=False)
+                    print("No aparecio el boton de cookies, continuando...")
+
+            # El hook se instala en cada documento nuevo, antes de iniciar el test
+            if self.capture is not None:
+                self.capture.install()
+
+        def start_test():
             self.wait.until(EC.element_to_be_clickable((By.CLASS_NAME, 'start-text'))).click()
 
-            #time.sleep(45)
+        def read_results():
+            if self.capture is not None and self.capture.available:
+                with self.tracer.span("result_capture") as span:
+                    result = self.capture.wait(CAPTURE_TIMEOUT)
+                    span.set(captured=result is not None, progress_samples=len(self.capture.progress))
+                if result:
+                    self.down, self.up = result["download"], result["upload"]
+                    self.latency, self.server = result["ping"], result["server"]
+                    self.progress = self.capture.progress
+                    self.capture_source = "hook"
+                    return
+                # No llegó a tiempo: este intento y los reintentos leen el DOM
+                self.capture.available = False
+                print("La captura por eventos no entregó el resultado; leyendo la página...")
+
+            # Si vence la espera se reintenta solo la lectura: el test sigue corriendo en la página
+            self.progress = []
+            self.capture_source = "dom"
             self.wait.until(EC.visibility_of_element_located((By.CLASS_NAME, "result-container-speed")))
 
             self.down = self.wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, "span[class*='download-speed']"))).text
             self.up = self.wait.until(EC.visibility_of_element_located((By.CSS_SELECTOR, "span[class*='upload-speed']"))).text
 
-        retry(run_speedtest, description="ejecutar test de velocidad")
-        print(f"Velocidad de bajada: {self.down}")
-        print(f"Velocidad de subida: {self.up}")
+            # Datos secundarios: si la página no los muestra no se espera por ellos
+            ping = self.driver.find_elements(By.CSS_SELECTOR, "span[class*='ping-speed']")
+            server = self.driver.find_elements(By.CSS_SELECTOR, ".result-data .hostUrl, .js-data-sponsor")
+            self.latency = ping[0].text if ping else None
+            self.server = server[0].text if server else None
+
+        self.retrier.call(self.tracer.wrap(open_page), step="abrir speedtest.net")
+        self.retrier.call(self.tracer.wrap(start_test), step="iniciar el test")
+        # Las esperas de 15 s de la lectura sondean un test que sigue corriendo: vencerlas no es una
+        # falla de speedtest.net y no debe abrir el breaker a mitad de una medición sana
+        self.retrier.call(self.tracer.wrap(read_results), step="leer los resultados", count_timeouts=False)
+
+    def assess(self):
+
+        """Veredicto del historial reciente sobre la última medición (ver `analysis.assess`).
+
+        Returns:
+            Verdict | None: Se calcula una vez por medición. None si no hay NumPy, la medición
+            está incompleta o el historial es corto: en ese caso decide la última medición.
+        """
+
+        if self.verdict is None:
+            with self.tracer.span("assess"):
+                self.verdict = assess_latest(self.store, self.down, self.up)
+        return self.verdict
 
+    @traced()
     def tweet_at_provider(self):
 
-        """Publica un tweet en X con los resultados de velocidad de Internet.
+        """Encola un tweet en X con los resultados de velocidad de Internet.
 
-        Usa la API oficial de X (Twitter) mediante Tweepy para autenticar y publicar
-        automáticamente un tweet que compara la velocidad real con la prometida.
+        El texto compara la velocidad real con la prometida. Si hay historial suficiente (y
+        NumPy), decide `self.assess()`: una caída aislada no cuenta como incumplimiento (no se
+        tweetea nada), y el texto suma el tiempo bajo lo contratado de los últimos días. Sin
+        veredicto se tweetea como siempre. No espera a la red: el tweet
+        se guarda en la cola persistente y lo envía en segundo plano `self.publisher`
+        (cliente de Tweepy reutilizado, rate limits y reintentos). Si el resumen está
+        activo (`XBOT_DIGEST_WINDOW`), las mediciones bajo lo contratado se agrupan en un
+        único tweet.
 
-        Raises:
-            tweepy.errors.TweepyException: Si ocurre un error de autenticación o conexión.
+        Returns:
+            int | None: Id del tweet en la cola, o None si la medición se acumuló para el resumen,
+            el historial no justifica quejarse o la medición salió de `speed_cache`.
 
         Example:
             # >>> bot.tweet_at_provider()
+            📨 Tweet encolado (#12).
             ✅ Tweet publicado con ID: 1827364519287346
         """
 
-        try:
-            client = tweepy.Client(
-                consumer_key=api_key,
-                consumer_secret=api_secret,
-                access_token=access_token,
-                access_token_secret=token_secret
-            )
-
-            response = client.create_tweet(text=f"Porque mi velocidad de internet es de {self.down}Mbps de bajada y {self.up}Mbps de subida? Cuando yo estoy pagando por una subida de "
-                                     f"{PROMISED_UP}Mbps y una bajada de {PROMISED_DOWN}Mbps")
-
-            print(f"✅ Tweet publicado con ID: {response.data['id']}")
-
-        except tweepy.errors.TweepyException as e:
-            print(f"❌ Error al publicar el tweet: {e}")
+        if self.capture_source == "cache":
+            # Quien hizo esa medición ya decidió si tweetearla: repetirla duplicaría el tweet
+            print("♻️ La medición salió de la caché: no se tweetea de nuevo.")
+            return None
+        verdict = self.assess()
+        if verdict is not None:
+            print(f"📊 Veredicto del historial: {verdict.reason}.")
+            if not verdict.complain:
+                print("🙂 El historial no justifica quejarse: no se tweetea.")
+                return None
+        text, down, up, below_promise = compose_tweet(self.down, self.up, verdict)
+
+        item_id = self.publisher.publish_measurement(text, down, up, below_promise)
+        if item_id is None:
+            print("🗂️ Medición acumulada para el próximo tweet resumen.")
+        else:
+            print(f"📨 Tweet encolado (#{item_id}).")
+        return item_id
 
 if __name__ == "__main__":
-    bot = InternetSpeedXBot()
-    bot.get_internet_speed()
+    bot = InternetSpeedXBot(measurement_mode=MEASUREMENT_MODE)
+    # Se va a tweetear: siempre una medición nueva, no la de la caché
+    bot.get_internet_speed(force_refresh=True)
     bot.tweet_at_provider()
-    bot.driver.quit()
+    bot.close()
+    # Proceso de corta vida: se da un margen para enviar; lo pendiente queda en la cola
+    bot.publisher.drain(timeout=30)
+    if bot.collector is not None:
+        bot.collector.drain(timeout=10)
@@ -0,0 +1,283 @@
+"""Almacenamiento local de mediciones de velocidad (SQLite).
+
+Cada ejecución de `InternetSpeedXBot.get_internet_speed()` guarda una fila
+con timestamp, velocidades ya convertidas a float, servidor, latencia y
+duración. La tabla está indexada por timestamp, así que las consultas por
+rango y los agregados (mínimo, media y p95 por hora o por día) solo leen
+las filas del período pedido, aunque el historial tenga cientos de miles
+de muestras.
+
+Uso típico:
+    store = MeasurementStore("measurements.db")
+    store.add(down=125.4, up=48.2, server="Claro - Buenos Aires", latency=12.0, duration=41.3)
+    store.aggregate(time.time() - 7 * 86400, bucket="day", field="down")
+"""
+
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+# Base SQLite con el historial de mediciones
+DB_PATH = os.getenv("XBOT_DB_PATH", str(Path(__file__).resolve().parent / "measurements.db"))
+
+# Tamaño de cada bucket de agregación, en segundos (UTC)
+BUCKETS = {"hour": 3600, "day": 86400}
+FIELDS = ("down", "up", "latency", "duration")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS measurements (
+    id       INTEGER PRIMARY KEY,
+    ts       REAL NOT NULL,
+    down     REAL,
+    up       REAL,
+    server   TEXT,
+    latency  REAL,
+    duration REAL
+);
+CREATE INDEX IF NOT EXISTS idx_measurements_ts ON measurements (ts);
+"""
+
+
+@dataclass
+class Measurement:
+    """Una medición de velocidad.
+
+    Attributes:
+        ts (float): Timestamp UNIX (s).
+        down (float | None): Bajada (Mbps).
+        up (float | None): Subida (Mbps).
+        server (str | None): Servidor usado por el test.
+        latency (float | None): Ping (ms).
+        duration (float | None): Duración total de la medición (s).
+        id (int | None): Identificador en la base.
+    """
+
+    ts: float
+    down: float = None
+    up: float = None
+    server: str = None
+    latency: float = None
+    duration: float = None
+    id: int = None
+
+
+def parse_speed(text):
+    """Convierte el texto mostrado por Speedtest ("125.43", "1,024.5", "—") en float.
+
+    Args:
+        text (str | float | None): Valor leído de la página.
+
+    Returns:
+        float | None: Valor numérico, o None si el texto no contiene un número.
+    """
+
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        return float(text)
+    match = re.search(r"\d[\d,]*(?:\.\d+)?", str(text))
+    if not match:
+        return None
+    return float(match.group().replace(",", ""))
+
+
+def _percentile(sorted_values, q):
+    """Percentil por rango más cercano sobre una lista ya ordenada."""
+
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class MeasurementStore:
+    """Serie temporal de mediciones sobre SQLite.
+
+    Args:
+        path (str): Archivo de la base (`":memory:"` para pruebas).
+    """
+
+    def __init__(self, path="measurements.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        # WAL permite leer (consultas del CLI) mientras otro proceso escribe (el daemon)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # ---------- ESCRITURA ----------
+    def add(self, down, up, server=None, latency=None, duration=None, ts=None):
+        """Guarda una medición.
+
+        Args:
+            down (float | str): Bajada (Mbps); se acepta el texto de la página.
+            up (float | str): Subida (Mbps); se acepta el texto de la página.
+            server (str, optional): Servidor del test.
+            latency (float | str, optional): Ping (ms).
+            duration (float, optional): Duración de la medición (s).
+            ts (float, optional): Timestamp UNIX. Por defecto, ahora.
+
+        Returns:
+            Measurement: La medición guardada (con `id`).
+        """
+
+        measurement = Measurement(
+            ts=time.time() if ts is None else ts,
+            down=parse_speed(down),
+            up=parse_speed(up),
+            server=server,
+            latency=parse_speed(latency),
+            duration=duration,
+        )
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO measurements (ts, down, up, server, latency, duration) VALUES (?, ?, ?, ?, ?, ?)",
+                (measurement.ts, measurement.down, measurement.up, measurement.server,
+                 measurement.latency, measurement.duration),
+            )
+        measurement.id = cursor.lastrowid
+        return measurement
+
+    def add_many(self, measurements):
+        """Guarda varias mediciones en una sola transacción.
+
+        Args:
+            measurements (Iterable[Measurement]): Mediciones a insertar.
+        """
+
+        rows = [(m.ts, m.down, m.up, m.server, m.latency, m.duration) for m in measurements]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO measurements (ts, down, up, server, latency, duration) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    # ---------- CONSULTAS ----------
+    def range(self, start=None, end=None):
+        """Devuelve las mediciones entre `start` y `end` (timestamps, inclusive/exclusivo).
+
+        Returns:
+            list[Measurement]: Mediciones ordenadas por timestamp.
+        """
+
+        start = 0 if start is None else start
+        end = math.inf if end is None else end
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT ts, down, up, server, latency, duration, id FROM measurements "
+                "WHERE ts >= ? AND ts < ? ORDER BY ts",
+                (start, end),
+            ).fetchall()
+        return [Measurement(*row) for row in rows]
+
+    def series(self, start=None, end=None, fields=("down", "up")):
+        """Devuelve `(ts, *fields)` por medición, sin armar un `Measurement` por fila.
+
+        Pensado para cargar años de historial de una vez (ver `analysis.py`).
+
+        Returns:
+            list[tuple]: Filas ordenadas por timestamp.
+        """
+
+        unknown = [field for field in fields if field not in FIELDS]
+        if unknown:
+            raise ValueError(f"Campo desconocido: {unknown[0]}")
+        start = 0 if start is None else start
+        end = math.inf if end is None else end
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT ts, {', '.join(fields)} FROM measurements WHERE ts >= ? AND ts < ? ORDER BY ts",
+                (start, end),
+            ).fetchall()
+
+    def latest(self):
+        """Devuelve la última medición guardada, o None si no hay ninguna."""
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT ts, down, up, server, latency, duration, id FROM measurements ORDER BY ts DESC LIMIT 1"
+            ).fetchone()
+        return Measurement(*row) if row else None
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM measurements").fetchone()[0]
+
+    def _values(self, field, start, end, bucket_seconds=None):
+        if field not in FIELDS:
+            raise ValueError(f"Campo desconocido: {field}")
+        end = math.inf if end is None else end
+        bucket_expr = f"CAST(ts / {bucket_seconds} AS INTEGER)" if bucket_seconds else "0"
+        with self._lock:
+            # El índice por ts limita la lectura al rango; ordenar por valor deja el p95 a un acceso
+            return self._conn.execute(
+                f"SELECT {bucket_expr} AS bucket, {field} FROM measurements "
+                f"WHERE ts >= ? AND ts < ? AND {field} IS NOT NULL ORDER BY bucket, {field}",
+                (start, end),
+            ).fetchall()
+
+    @staticmethod
+    def _summarize(values):
+        return {
+            "count": len(values),
+            "min": values[0],
+            "mean": sum(values) / len(values),
+            "p95": _percentile(values, 0.95),
+            "max": values[-1],
+        }
+
+    def aggregate(self, start, end=None, bucket="hour", field="down"):
+        """Agrega un campo por hora o por día (UTC).
+
+        Args:
+            start (float): Timestamp inicial.
+            end (float, optional): Timestamp final (exclusivo). Por defecto, sin límite.
+            bucket (str, optional): `"hour"` o `"day"`.
+            field (str, optional): `down`, `up`, `latency` o `duration`.
+
+        Returns:
+            list[dict]: Un dict por bucket con `start`, `count`, `min`, `mean`, `p95` y `max`.
+        """
+
+        try:
+            seconds = BUCKETS[bucket]
+        except KeyError:
+            raise ValueError(f"Bucket desconocido: {bucket}") from None
+
+        result = []
+        current, values = None, []
+        for key, value in self._values(field, start, end, seconds):
+            if key != current and values:
+                result.append({"start": current * seconds, **self._summarize(values)})
+                values = []
+            current = key
+            values.append(value)
+        if values:
+            result.append({"start": current * seconds, **self._summarize(values)})
+        return result
+
+    def rolling(self, window, field="down", end=None):
+        """Resume un campo en la ventana `[end - window, end)`.
+
+        Args:
+            window (float): Largo de la ventana en segundos (por ejemplo `7 * 86400`).
+            field (str, optional): Campo a resumir.
+            end (float, optional): Fin de la ventana. Por defecto, ahora.
+
+        Returns:
+            dict | None: `count`, `min`, `mean`, `p95` y `max`, o None si no hay datos.
+        """
+
+        end = time.time() if end is None else end
+        values = [value for _, value in self._values(field, end - window, end)]
+        return self._summarize(values) if values else None
@@ -0,0 +1,393 @@
+"""Publicación de tweets: cliente reutilizable y cola persistente.
+
+- `get_client()`: un único `tweepy.Client` por proceso (su `requests.Session`
+  reutiliza la conexión TLS entre publicaciones).
+- `Outbox`: cola en disco (SQLite); los tweets pendientes sobreviven a
+  reinicios del proceso.
+- `Publisher`: hilo en segundo plano que envía la cola respetando los
+  headers de rate limit de la API de X, con backoff ante 429 y errores 5xx.
+  Opcionalmente agrupa varias mediciones bajo lo contratado en un único
+  tweet "resumen" para ahorrar cuota.
+
+La medición nunca espera a la red: `InternetSpeedXBot.tweet_at_provider()`
+solo encola el texto.
+
+Para probar contra un servidor HTTP local basta con definir
+`X_API_BASE_URL=http://127.0.0.1:8000`: las requests del cliente se
+redirigen a esa URL manteniendo el path (`/2/tweets`).
+
+`tweepy` y `requests` se importan recién al crear el cliente o enviar: encolar
+y consultar la cola no los carga (ver `cli.py status`).
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+from common.retry import RetryPolicy
+
+X_API_HOST = "https://api.twitter.com"
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _redirect_adapter(base_url):
+    """Adapter de `requests` que reenvía las requests de `api.twitter.com` a otra URL base (servidor de pruebas)."""
+
+    from requests.adapters import HTTPAdapter
+
+    class _RedirectAdapter(HTTPAdapter):
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            self.base = urlsplit(base_url)
+
+        def send(self, request, **kwargs):
+            url = urlsplit(request.url)
+            request.url = urlunsplit((self.base.scheme, self.base.netloc, url.path, url.query, url.fragment))
+            return super().send(request, **kwargs)
+
+    return _RedirectAdapter()
+
+
+def get_client():
+    """Devuelve el `tweepy.Client` del proceso, creándolo la primera vez.
+
+    Las credenciales se leen de las variables de entorno (`X_API_KEY`,
+    `X_API_KEY_SECRET`, `X_ACCESS_TOKEN`, `X_ACCESS_TOKEN_SECRET`) recién al
+    crear el cliente. Se usa `return_type=requests.Response` para tener acceso
+    a los headers de rate limit.
+
+    Returns:
+        tweepy.Client: Cliente compartido.
+    """
+
+    global _client
+    with _client_lock:
+        if _client is None:
+            import requests
+            import tweepy
+
+            client = tweepy.Client(
+                consumer_key=os.getenv("X_API_KEY"),
+                consumer_secret=os.getenv("X_API_KEY_SECRET"),
+                access_token=os.getenv("X_ACCESS_TOKEN"),
+                access_token_secret=os.getenv("X_ACCESS_TOKEN_SECRET"),
+                return_type=requests.Response,
+            )
+            base_url = os.getenv("X_API_BASE_URL")
+            if base_url:
+                client.session.mount(X_API_HOST, _redirect_adapter(base_url))
+            _client = client
+        return _client
+
+
+def rate_limit_pause(headers, now=None):
+    """Calcula hasta cuándo pausar según los headers de rate limit de X.
+
+    Se consideran el límite del endpoint (`x-rate-limit-*`) y el límite diario
+    por usuario (`x-user-limit-24hour-*`).
+
+    Args:
+        headers (Mapping[str, str]): Headers de la respuesta.
+        now (float, optional): Timestamp actual.
+
+    Returns:
+        float | None: Timestamp hasta el que no hay que enviar, o None si hay cuota.
+    """
+
+    now = time.time() if now is None else now
+    until = None
+    for prefix in ("x-rate-limit", "x-user-limit-24hour"):
+        remaining = headers.get(f"{prefix}-remaining")
+        reset = headers.get(f"{prefix}-reset")
+        if remaining is not None and reset is not None and int(remaining) <= 0:
+            until = max(until or 0, float(reset))
+    return until if until and until > now else None
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id           INTEGER PRIMARY KEY,
+    created      REAL NOT NULL,
+    text         TEXT NOT NULL,
+    status       TEXT NOT NULL DEFAULT 'pending',
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    tweet_id     TEXT,
+    last_error   TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt);
+CREATE TABLE IF NOT EXISTS digest_samples (
+    ts   REAL NOT NULL,
+    down REAL,
+    up   REAL
+);
+"""
+
+
+class Outbox:
+    """Cola persistente de tweets sobre SQLite.
+
+    Args:
+        path (str): Archivo de la base.
+    """
+
+    def __init__(self, path="outbox.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def enqueue(self, text):
+        """Agrega un tweet a la cola y devuelve su id."""
+
+        now = time.time()
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO outbox (created, text, next_attempt) VALUES (?, ?, ?)", (now, text, now)
+            )
+        return cursor.lastrowid
+
+    def next_due(self, now=None):
+        """Devuelve `(id, text, attempts)` del próximo tweet listo para enviar, o None."""
+
+        now = time.time() if now is None else now
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, text, attempts FROM outbox WHERE status = 'pending' AND next_attempt <= ? "
+                "ORDER BY next_attempt, id LIMIT 1",
+                (now,),
+            ).fetchone()
+
+    def next_attempt_at(self):
+        """Timestamp del próximo envío programado, o None si la cola está vacía."""
+
+        with self._lock:
+            row = self._conn.execute("SELECT MIN(next_attempt) FROM outbox WHERE status = 'pending'").fetchone()
+        return row[0]
+
+    def mark_sent(self, item_id, tweet_id):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE outbox SET status = 'sent', tweet_id = ?, attempts = attempts + 1 WHERE id = ?",
+                (str(tweet_id), item_id),
+            )
+
+    def mark_failed(self, item_id, error):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE outbox SET status = 'failed', last_error = ?, attempts = attempts + 1 WHERE id = ?",
+                (error, item_id),
+            )
+
+    def reschedule(self, item_id, when, error, count_attempt=True):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE outbox SET next_attempt = ?, last_error = ?, attempts = attempts + ? WHERE id = ?",
+                (when, error, int(count_attempt), item_id),
+            )
+
+    def pending_count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox WHERE status = 'pending'").fetchone()[0]
+
+    # ---------- RESUMEN DE MEDICIONES ----------
+    def add_digest_sample(self, down, up, ts=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO digest_samples (ts, down, up) VALUES (?, ?, ?)",
+                (time.time() if ts is None else ts, down, up),
+            )
+
+    def take_digest(self, formatter, window, max_samples, now=None):
+        """Convierte las muestras acumuladas en un tweet si ya corresponde.
+
+        Corresponde cuando la muestra más vieja superó `window` segundos o hay
+        `max_samples` acumuladas. El tweet y el borrado de las muestras se hacen
+        en la misma transacción.
+
+        Args:
+            formatter (Callable[[list[tuple]], str]): Arma el texto desde `(ts, down, up)`.
+            window (float): Segundos máximos de acumulación.
+            max_samples (int): Muestras que fuerzan el resumen.
+            now (float, optional): Timestamp actual.
+
+        Returns:
+            int | None: Id del tweet encolado, o None si todavía no corresponde.
+        """
+
+        now = time.time() if now is None else now
+        with self._lock, self._conn:
+            samples = self._conn.execute("SELECT ts, down, up FROM digest_samples ORDER BY ts").fetchall()
+            if not samples or (now - samples[0][0] < window and len(samples) < max_samples):
+                return None
+            self._conn.execute("DELETE FROM digest_samples")
+            cursor = self._conn.execute(
+                "INSERT INTO outbox (created, text, next_attempt) VALUES (?, ?, ?)",
+                (now, formatter(samples), now),
+            )
+        return cursor.lastrowid
+
+
+class Publisher:
+    """Envía en segundo plano los tweets de un `Outbox`.
+
+    Args:
+        outbox (Outbox): Cola persistente.
+        client_factory (Callable[[], tweepy.Client], optional): Devuelve el cliente a usar.
+        retry_policy (RetryPolicy, optional): Backoff ante errores transitorios.
+        max_attempts (int, optional): Intentos antes de marcar un tweet como fallido.
+        coalesce_window (float, optional): Si se indica, las mediciones bajo lo contratado
+            se agrupan durante ese tiempo (s) en un solo tweet resumen.
+        coalesce_max (int, optional): Muestras que fuerzan el resumen antes de la ventana.
+        digest_formatter (Callable[[list[tuple]], str], optional): Arma el texto del resumen.
+    """
+
+    def __init__(self, outbox, client_factory=get_client, retry_policy=None, max_attempts=8,
+                 coalesce_window=None, coalesce_max=6, digest_formatter=None):
+        self.outbox = outbox
+        self.client_factory = client_factory
+        self.retry_policy = retry_policy or RetryPolicy(base_delay=5, max_delay=900, jitter="equal")
+        self.max_attempts = max_attempts
+        self.coalesce_window = coalesce_window
+        self.coalesce_max = coalesce_max
+        self.digest_formatter = digest_formatter
+        self.paused_until = None
+        self.stats = {"sent": 0, "failed": 0, "rate_limited": 0, "retried": 0}
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---------- API ----------
+    def publish(self, text):
+        """Encola un tweet y despierta al hilo de envío. No hace I/O de red.
+
+        Returns:
+            int: Id del tweet en la cola.
+        """
+
+        item_id = self.outbox.enqueue(text)
+        self.start()
+        self._wake.set()
+        return item_id
+
+    def publish_measurement(self, text, down, up, below_promise):
+        """Encola el tweet de una medición, o la acumula para el resumen.
+
+        Args:
+            text (str): Texto del tweet individual.
+            down (float): Bajada medida.
+            up (float): Subida medida.
+            below_promise (bool): Si la medición está bajo lo contratado.
+
+        Returns:
+            int | None: Id del tweet encolado, o None si se acumuló para el resumen.
+        """
+
+        if self.coalesce_window and below_promise and self.digest_formatter:
+            self.outbox.add_digest_sample(down, up)
+            self.start()
+            self._wake.set()
+            return None
+        return self.publish(text)
+
+    def start(self):
+        """Arranca el hilo de envío si no está corriendo."""
+
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="x-publisher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        """Detiene el hilo de envío (los pendientes quedan en disco)."""
+
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def drain(self, timeout=30):
+        """Espera hasta `timeout` segundos a que no queden tweets listos para enviar.
+
+        Returns:
+            bool: True si la cola quedó sin envíos vencidos.
+        """
+
+        self.start()
+        self._wake.set()
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.outbox.next_due() is None:
+                return True
+            time.sleep(0.1)
+        return False
+
+    # ---------- HILO DE ENVÍO ----------
+    def _sleep_until(self, when):
+        delay = max(0.0, when - time.time())
+        self._wake.wait(min(delay, 60))
+        self._wake.clear()
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self.coalesce_window and self.digest_formatter:
+                self.outbox.take_digest(self.digest_formatter, self.coalesce_window, self.coalesce_max)
+
+            if self.paused_until and time.time() < self.paused_until:
+                self._sleep_until(self.paused_until)
+                continue
+
+            item = self.outbox.next_due()
+            if item is None:
+                next_at = self.outbox.next_attempt_at()
+                wake_at = next_at if next_at is not None else time.time() + 60
+                if self.coalesce_window:
+                    wake_at = min(wake_at, time.time() + self.coalesce_window)
+                self._sleep_until(wake_at)
+                continue
+
+            self._send(*item)
+
+    def _send(self, item_id, text, attempts):
+        import requests
+        import tweepy
+
+        try:
+            response = self.client_factory().create_tweet(text=text)
+        except tweepy.TooManyRequests as e:
+            headers = e.response.headers
+            self.paused_until = rate_limit_pause(headers) or time.time() + self.retry_policy.backoff(attempts + 1)
+            self.stats["rate_limited"] += 1
+            self.outbox.reschedule(item_id, self.paused_until, "429 Too Many Requests", count_attempt=False)
+            print(f"⏳ Rate limit de X: reintento a las {time.strftime('%H:%M:%S', time.localtime(self.paused_until))}")
+            return
+        except tweepy.HTTPException as e:
+            # 5xx es transitorio; el resto de 4xx (auth, texto duplicado...) no se arregla reintentando
+            if not isinstance(e, tweepy.TwitterServerError):
+                self.stats["failed"] += 1
+                self.outbox.mark_failed(item_id, str(e))
+                print(f"❌ Error al publicar el tweet: {e}")
+                return
+            error = str(e)
+        except (tweepy.TweepyException, requests.RequestException) as e:
+            error = str(e)
+        else:
+            self.paused_until = rate_limit_pause(response.headers)
+            tweet_id = response.json()["data"]["id"]
+            self.outbox.mark_sent(item_id, tweet_id)
+            self.stats["sent"] += 1
+            print(f"✅ Tweet publicado con ID: {tweet_id}")
+            return
+
+        if attempts + 1 >= self.max_attempts:
+            self.stats["failed"] += 1
+            self.outbox.mark_failed(item_id, error)
+            print(f"❌ Tweet descartado tras {attempts + 1} intentos: {error}")
+            return
+        self.stats["retried"] += 1
+        self.outbox.reschedule(item_id, time.time() + self.retry_policy.backoff(attempts + 1), error)
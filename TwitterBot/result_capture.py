@@ -0,0 +1,158 @@
+"""Captura de resultados de Speedtest.net por eventos, sin sondear el DOM.
+
+El camino original espera con `WebDriverWait` a que aparezca el contenedor
+de resultados y después, por separado, a cada número: tres bucles de
+sondeo que recién terminan cuando la interfaz dejó de animar.
+
+`ResultCapture.install()` inyecta en la página un hook que:
+
+- observa con un `MutationObserver` el velocímetro y los valores finales,
+  y guarda muestras de progreso (`{t, phase, value}`) durante el test;
+- marca el resultado en el mismo instante en que la página escribe los
+  valores finales (bajada y subida) y el contenedor queda visible;
+- registra las respuestas JSON de `fetch`/`XMLHttpRequest` a la API de
+  resultados (`payloads`) como dato de diagnóstico.
+
+`wait()` hace un único `execute_async_script` que vuelve apenas el hook
+tiene el resultado. Si la página cambió y el hook no lo detecta a tiempo,
+devuelve None y el bot sigue por el camino del DOM.
+
+Los frames de websocket del test solo transportan el tráfico de medición
+(no el resultado) y el log de eventos CDP solo está habilitado en modo
+medición, por eso la captura se hace con el hook.
+
+Uso típico:
+    capture = ResultCapture(driver)
+    capture.install()                 # después de abrir la página, antes de iniciar el test
+    start_button.click()
+    result = capture.wait(timeout=90) # dict con download, upload, ping, server y progress
+"""
+
+from selenium.common.exceptions import WebDriverException
+
+# Selectores de la página (los mismos que usa el camino del DOM)
+SELECTORS = {
+    "container": ".result-container-speed",
+    "download": "span[class*='download-speed']",
+    "upload": "span[class*='upload-speed']",
+    "ping": "span[class*='ping-speed']",
+    "server": ".result-data .hostUrl, .js-data-sponsor",
+    "gauge": ".gauge-speed-text .result-data-value, [class*='gauge-speed-text']",
+}
+
+# Máximo de muestras de progreso guardadas por test
+MAX_PROGRESS_SAMPLES = 600
+
+# Instala el hook una sola vez por documento. Es idempotente: reinstalar después de un reintento no duplica nada.
+_INSTALL_JS = """
+const [sel, maxSamples] = [arguments[0], arguments[1]];
+if (window.__xbotCapture) { return true; }
+const cap = window.__xbotCapture = { started: performance.now(), progress: [], payloads: [], result: null, waiters: [] };
+const text = (q) => { const el = document.querySelector(q); return el ? el.textContent.trim() : null; };
+const number = (s) => (s && /\\d/.test(s) && !isNaN(parseFloat(s.replace(/,/g, '')))) ? s : null;
+const visible = (q) => { const el = document.querySelector(q); return !!el && el.getClientRects().length > 0; };
+let lastGauge = null;
+
+const check = () => {
+    if (cap.result) { return; }
+    const down = number(text(sel.download)), up = number(text(sel.upload)), ping = number(text(sel.ping));
+    const gauge = number(text(sel.gauge));
+    if (gauge !== null && gauge !== lastGauge && cap.progress.length < maxSamples) {
+        lastGauge = gauge;
+        cap.progress.push({ t: Math.round(performance.now() - cap.started), phase: down ? 'upload' : (ping ? 'download' : 'latency'), value: gauge });
+    }
+    if (down && up && visible(sel.container)) {
+        cap.result = { download: down, upload: up, ping: ping, server: text(sel.server),
+                       at_ms: Math.round(performance.now() - cap.started) };
+        observer.disconnect();
+        cap.waiters.splice(0).forEach((w) => w());
+    }
+};
+const observer = new MutationObserver(check);
+observer.observe(document.documentElement, { subtree: true, childList: true, characterData: true, attributes: true, attributeFilter: ['class', 'style'] });
+
+// Respuestas JSON de la API de resultados: solo diagnóstico (sus unidades no están documentadas)
+const keep = (url, body) => {
+    if (!/\\/api\\/.*result/i.test(url) || cap.payloads.length >= 20) { return; }
+    try { cap.payloads.push({ url: url, body: JSON.parse(body) }); } catch (e) { /* no era JSON */ }
+};
+const origFetch = window.fetch;
+if (origFetch) {
+    window.fetch = function (...args) {
+        return origFetch.apply(this, args).then((response) => {
+            response.clone().text().then((body) => keep(response.url, body)).catch(() => {});
+            return response;
+        });
+    };
+}
+const origOpen = XMLHttpRequest.prototype.open;
+XMLHttpRequest.prototype.open = function (method, url, ...rest) {
+    this.addEventListener('load', () => { if (typeof this.responseText === 'string') { keep(String(url), this.responseText); } });
+    return origOpen.call(this, method, url, ...rest);
+};
+check();
+return true;
+"""
+
+# Espera el resultado sin sondear: resuelve cuando el hook lo marca o vence el plazo
+_WAIT_JS = """
+const [timeoutMs, done] = [arguments[0], arguments[arguments.length - 1]];
+const cap = window.__xbotCapture;
+if (!cap) { done(null); return; }
+const finish = () => done({ result: cap.result, progress: cap.progress, payloads: cap.payloads });
+if (cap.result) { finish(); return; }
+const timer = setTimeout(finish, timeoutMs);
+cap.waiters.push(() => { clearTimeout(timer); finish(); });
+"""
+
+
+class ResultCapture:
+    """Hook de captura de resultados de Speedtest.net en la página abierta.
+
+    Args:
+        driver (webdriver.Chrome): Navegador con Speedtest.net abierto.
+
+    Attributes:
+        available (bool): False si el hook no pudo instalarse (se usa el camino del DOM).
+        progress (list[dict]): Muestras de progreso `{t, phase, value}` del último `wait()`.
+        payloads (list[dict]): Respuestas JSON de la API de resultados vistas en la página.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.available = True
+        self.progress = []
+        self.payloads = []
+
+    def install(self):
+        """Inyecta el hook en el documento actual. Devuelve False si no se pudo."""
+
+        try:
+            self.available = bool(self.driver.execute_script(_INSTALL_JS, SELECTORS, MAX_PROGRESS_SAMPLES))
+        except WebDriverException:
+            self.available = False
+        return self.available
+
+    def wait(self, timeout=90):
+        """Espera el resultado del test en un único round trip.
+
+        Args:
+            timeout (float, optional): Segundos máximos de espera.
+
+        Returns:
+            dict | None: `download`, `upload`, `ping`, `server` (textos de la página) y `at_ms`
+            (ms desde que se instaló el hook), o None si no llegó a tiempo o el hook no está.
+        """
+
+        if not self.available:
+            return None
+        self.driver.set_script_timeout(timeout + 5)
+        try:
+            captured = self.driver.execute_async_script(_WAIT_JS, int(timeout * 1000))
+        except WebDriverException:
+            return None
+        if not captured:
+            return None
+        self.progress = captured.get("progress") or []
+        self.payloads = captured.get("payloads") or []
+        return captured.get("result")
@@ -0,0 +1,170 @@
+"""Caché de la última medición, compartida entre procesos, con TTL y single-flight.
+
+Un test de velocidad tarda cerca de un minuto y satura el enlace. Con esta
+caché, `InternetSpeedXBot.get_internet_speed()` reutiliza una medición de
+hace menos de `XBOT_SPEED_CACHE_TTL` segundos en lugar de correr otro test,
+aunque la haya hecho otro proceso (el daemon, el CLI, otro script).
+
+- Los resultados viven en un JSON (una entrada por destino medido: la
+  página de Speedtest o el endpoint del backend `http`), que se reemplaza
+  de forma atómica; leerlo no necesita lock.
+- **Single-flight**: quien tiene que medir toma un `flock` exclusivo sobre
+  `<archivo>.lock` (y un lock del proceso para los hilos). Quien llega
+  mientras tanto espera ese lock y, al obtenerlo, usa el resultado recién
+  escrito en lugar de medir otra vez.
+- `force_refresh=True` siempre mide, salvo que otro proceso haya terminado
+  un test *después* de que se pidió (esperar ese test ya es "fresco").
+
+Sin `fcntl` (Windows) el single-flight queda limitado al proceso.
+
+Uso típico:
+    cache = SpeedCache(ttl=300)
+    entry, hit = cache.get("speedtest.net", measure)    # measure() -> dict serializable a JSON
+    print(cache.stats)                                   # hits, misses, coalesced, forced
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+try:
+    import fcntl                                                         # Lock entre procesos (POSIX)
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+SPEED_CACHE_PATH = os.getenv("XBOT_SPEED_CACHE_PATH", str(Path(__file__).resolve().parent / "speed_cache.json"))
+# Segundos durante los que una medición se considera actual (0 = sin caché)
+SPEED_CACHE_TTL = float(os.getenv("XBOT_SPEED_CACHE_TTL", "300"))
+
+# Espera máxima (s) por el test que está corriendo otro proceso, y cada cuánto se reintenta el lock
+LOCK_TIMEOUT = 600
+LOCK_POLL = 0.2
+
+
+class SpeedCache:
+    """Resultados recientes de tests de velocidad, por destino medido.
+
+    Args:
+        path (str, optional): Archivo JSON de la caché (el lock es `<path>.lock`).
+        ttl (float, optional): Segundos de validez de una medición.
+        lock_timeout (float, optional): Espera máxima por el test de otro proceso.
+
+    Attributes:
+        stats (dict): `hits` (medición reutilizada), `misses` (se midió), `coalesced` (hits que
+            esperaron el test de otro proceso o hilo) y `forced` (pedidos con `force_refresh`).
+    """
+
+    def __init__(self, path=SPEED_CACHE_PATH, ttl=SPEED_CACHE_TTL, lock_timeout=LOCK_TIMEOUT):
+        self.path = path
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "forced": 0}
+        self._thread_lock = threading.Lock()
+
+    def get(self, key, measure, force_refresh=False):
+        """Devuelve una medición de `key` de menos de `ttl` segundos, o mide una nueva.
+
+        Args:
+            key (str): Destino medido (mediciones de destinos distintos no se mezclan).
+            measure (Callable[[], dict]): Corre el test y devuelve la entrada a guardar.
+            force_refresh (bool, optional): Mide aunque haya una medición vigente.
+
+        Returns:
+            tuple[dict, bool]: La entrada (con `ts`, el momento en que terminó el test) y si
+            salió de la caché.
+
+        Raises:
+            TimeoutError: Si otro proceso retuvo el lock más de `lock_timeout` segundos.
+        """
+
+        requested = time.time()
+        if force_refresh:
+            self.stats["forced"] += 1
+        else:
+            entry = self._fresh(key, requested)
+            if entry is not None:
+                self.stats["hits"] += 1
+                return entry, True
+
+        # Single-flight: los hilos del proceso y los demás procesos esperan al que está midiendo
+        with self._thread_lock, self._file_lock():
+            entry = self._read().get(key)
+            if entry is not None and entry.get("ts", 0) >= requested:
+                self.stats["hits"] += 1
+                self.stats["coalesced"] += 1
+                return entry, True
+            if not force_refresh:
+                entry = self._fresh(key, time.time())
+                if entry is not None:
+                    self.stats["hits"] += 1
+                    return entry, True
+
+            self.stats["misses"] += 1
+            entry = dict(measure(), ts=time.time())
+            entries = self._read()
+            entries[key] = entry
+            self._write(entries)
+            return entry, False
+
+    def peek(self, key):
+        """Última entrada de `key` sin importar su edad, o None."""
+
+        return self._read().get(key)
+
+    def _fresh(self, key, now):
+        entry = self._read().get(key)
+        if entry is not None and self.ttl > 0 and now - entry.get("ts", 0) < self.ttl:
+            return entry
+        return None
+
+    # ---------- ARCHIVO ----------
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def _write(self, entries):
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def _file_lock(self):
+        return _FileLock(f"{self.path}.lock", self.lock_timeout)
+
+
+class _FileLock:
+    """`flock` exclusivo con espera máxima (sin `fcntl` no bloquea nada)."""
+
+    def __init__(self, path, timeout):
+        self.path = path
+        self.timeout = timeout
+        self._fd = None
+
+    def __enter__(self):
+        if fcntl is None:
+            return self
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return self
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    os.close(self._fd)
+                    self._fd = None
+                    raise TimeoutError(f"Otro proceso retiene {self.path} hace más de {self.timeout:g}s.") from None
+                time.sleep(LOCK_POLL)
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        return False
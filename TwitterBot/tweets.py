@@ -0,0 +1,94 @@
+"""Texto de los tweets y cola de publicación del bot de X.
+
+Separado de `main.py` para que publicar o consultar la cola no importe
+Selenium: lo usan tanto `InternetSpeedXBot.tweet_at_provider()` como el
+comando `tweet` del CLI (`cli.py`), que publica la última medición
+guardada sin abrir el navegador.
+
+Uso típico:
+    text, down, up, below = compose_tweet("125.4", "48.2")
+    get_publisher().publish_measurement(text, down, up, below)
+"""
+
+import os
+from pathlib import Path
+
+from measurements import parse_speed
+from publisher import Outbox, Publisher
+
+PROMISED_DOWN = 300
+PROMISED_UP = 150
+
+# Cola persistente de tweets y ventana (s) para agrupar mediciones bajas en un resumen (0 = sin resumen)
+OUTBOX_PATH = os.getenv("XBOT_OUTBOX_PATH", str(Path(__file__).resolve().parent / "outbox.db"))
+DIGEST_WINDOW = float(os.getenv("XBOT_DIGEST_WINDOW", "0"))
+
+
+def compose_tweet(down_text, up_text, verdict=None):
+    """Arma el tweet de una medición y decide si corresponde quejarse.
+
+    Args:
+        down_text (str | float): Bajada tal como se mostró (por ejemplo, `"125.4"`).
+        up_text (str | float): Subida tal como se mostró.
+        verdict (analysis.Verdict, optional): Veredicto sobre el historial reciente. Si se
+            indica, decide él (y el texto suma cuánto tiempo se estuvo bajo lo contratado); si
+            no, decide solo esta medición.
+
+    Returns:
+        tuple[str, float | None, float | None, bool]: Texto, bajada, subida y si corresponde
+        quejarse (la medición, o el historial, está bajo lo contratado).
+    """
+
+    down, up = parse_speed(down_text), parse_speed(up_text)
+    if verdict is not None:
+        below_promise = verdict.complain
+    else:
+        below_promise = down is not None and up is not None and (down < PROMISED_DOWN or up < PROMISED_UP)
+    text = (f"Porque mi velocidad de internet es de {down_text}Mbps de bajada y {up_text}Mbps de subida? Cuando yo estoy pagando por una subida de "
+            f"{PROMISED_UP}Mbps y una bajada de {PROMISED_DOWN}Mbps")
+    if verdict is not None and verdict.complain:
+        text += (f". En los últimos {verdict.window_days:g} días estuve el {verdict.share_below:.0%} del tiempo "
+                 f"por debajo (mediana {verdict.median_down:.0f}/{verdict.median_up:.0f}Mbps)")
+    return text, down, up, below_promise
+
+
+def assess_latest(store, down, up):
+    """Veredicto del historial para una medición (ver `analysis.assess`), o None sin NumPy.
+
+    `analysis` (y NumPy) se importan recién acá: consultar la cola desde el CLI no los carga.
+    """
+
+    import analysis
+
+    return analysis.assess(store, parse_speed(down), parse_speed(up))
+
+
+def format_digest(samples):
+    """Arma el texto del tweet resumen a partir de varias mediciones bajo lo contratado.
+
+    Args:
+        samples (list[tuple]): Mediciones `(ts, down, up)`.
+
+    Returns:
+        str: Texto del tweet.
+    """
+
+    downs = [down for _, down, _ in samples if down is not None]
+    ups = [up for _, _, up in samples if up is not None]
+    return (f"En mis últimas {len(samples)} mediciones la velocidad de internet promedió "
+            f"{sum(downs) / max(len(downs), 1):.1f}Mbps de bajada (mín. {min(downs, default=0):.1f}) y "
+            f"{sum(ups) / max(len(ups), 1):.1f}Mbps de subida (mín. {min(ups, default=0):.1f}). "
+            f"Estoy pagando por {PROMISED_DOWN}Mbps de bajada y {PROMISED_UP}Mbps de subida.")
+
+
+_publisher = None
+
+
+def get_publisher():
+    """Devuelve el `Publisher` del proceso (cola en `OUTBOX_PATH`), creándolo la primera vez."""
+
+    global _publisher
+    if _publisher is None:
+        _publisher = Publisher(Outbox(OUTBOX_PATH), coalesce_window=DIGEST_WINDOW or None,
+                               digest_formatter=format_digest)
+    return _publisher
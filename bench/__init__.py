@@ -0,0 +1,11 @@
+"""Benchmarks sin red: ambos bots contra fixtures HTML locales.
+
+- `server.py`: servidor HTTP local con las réplicas de Speedtest.net y del
+  diálogo de seguidores de Instagram (`fixtures/`).
+- `run.py`: corre los escenarios, mide latencia de punta a punta, round
+  trips de WebDriver y RSS de Chrome, y compara contra `baseline.json`.
+
+Uso:
+    $ python -m bench.run                      # corre y compara contra el baseline
+    $ python -m bench.run --update-baseline    # guarda los resultados como baseline
+"""
@@ -0,0 +1,137 @@
+"""Benchmark de ingesta del agregador central (`TwitterBot/aggregator.py`).
+
+Levanta el agregador local con una base temporal y simula varios nodos
+(`Collector`, cada uno en su hilo) que envían sus mediciones en tandas por
+HTTP. Mide el throughput de punta a punta (codificación, gzip, HTTP,
+decodificación e inserción) y luego reenvía una parte de las tandas para
+verificar que los repetidos se descartan.
+
+Uso:
+    $ python -m bench.ingest [--nodes 4] [--results 20000] [--batch 500] [--min-rate 2000]
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _import_modules():
+    for path in (str(ROOT / "TwitterBot"), str(ROOT)):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    import aggregator
+    import collector
+    from measurements import Measurement
+    return aggregator, collector, Measurement
+
+
+def fake_measurements(Measurement, count, start=None):
+    """Mediciones sintéticas cada 5 minutos hacia atrás desde `start`."""
+
+    start = time.time() if start is None else start
+    rng = random.Random(count)
+    return [Measurement(ts=start - i * 300, down=round(rng.uniform(50, 320), 2), up=round(rng.uniform(20, 160), 2),
+                        latency=round(rng.uniform(5, 40), 1), server="bench") for i in range(count)]
+
+
+def run(nodes=4, results=20000, batch=500, resend=0.1):
+    """Corre el benchmark y devuelve sus métricas.
+
+    Args:
+        nodes (int, optional): Nodos simulados en paralelo.
+        results (int, optional): Mediciones en total (repartidas entre los nodos).
+        batch (int, optional): Mediciones por tanda.
+        resend (float, optional): Fracción de tandas que se reenvían para probar la deduplicación.
+
+    Returns:
+        dict: `results`, `seconds`, `rate`, `batches`, `duplicates` y `stored`.
+    """
+
+    aggregator, collector, Measurement = _import_modules()
+
+    with tempfile.TemporaryDirectory(prefix="bench-ingest-") as tmp:
+        store = aggregator.FleetStore(str(Path(tmp) / "fleet.db"))
+        with aggregator.AggregatorServer(store) as server:
+            per_node = results // nodes
+            collectors = []
+            for n in range(nodes):
+                node = collector.Collector(server.url(), site=f"site-{n % 2}", node=f"node-{n}",
+                                           spool=collector.Spool(":memory:"), batch_size=batch)
+                # Se encola directo en la cola local: el benchmark mide el envío, no el hilo de fondo
+                node.spool.put([(f"{n}-{i}", m.ts, m.down, m.up, m.latency, m.server)
+                                for i, m in enumerate(fake_measurements(Measurement, per_node))])
+                collectors.append(node)
+
+            threads = [threading.Thread(target=node.drain, args=(120,)) for node in collectors]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            seconds = time.perf_counter() - started
+            batches = sum(node.stats["batches"] for node in collectors)
+
+            # Reenvíos: mismas filas (mismos uid), como si se hubiera perdido la confirmación
+            resent = 0
+            for n, node in enumerate(collectors):
+                rows = [(f"{n}-{i}", m.ts, m.down, m.up, m.latency, m.server)
+                        for i, m in enumerate(fake_measurements(Measurement, per_node))]
+                for i in range(0, int(len(rows) * resend), batch):
+                    node.spool.put(rows[i:i + batch])
+                    resent += len(rows[i:i + batch])
+                node.drain(30)
+                node.stop()
+
+            sites = store.sites()
+            metrics = {
+                "results": per_node * nodes,
+                "seconds": round(seconds, 3),
+                "rate": round(per_node * nodes / seconds),
+                "batches": batches,
+                "resent": resent,
+                "duplicates": store.stats["duplicates"],
+                "stored": store.count(),
+                "sites": {site: summary["count"] for site, summary in sites.items()},
+            }
+        store.close()
+    return metrics
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark de ingesta del agregador de mediciones.")
+    parser.add_argument("--nodes", type=int, default=4, help="Nodos simulados en paralelo.")
+    parser.add_argument("--results", type=int, default=20000, help="Mediciones en total.")
+    parser.add_argument("--batch", type=int, default=500, help="Mediciones por tanda.")
+    parser.add_argument("--resend", type=float, default=0.1, help="Fracción reenviada para probar la deduplicación.")
+    parser.add_argument("--min-rate", type=float, default=2000, help="Mediciones/s mínimas (código 1 si no se alcanzan).")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    metrics = run(args.nodes, args.results, args.batch, args.resend)
+    print(f"Ingesta: {metrics['results']} mediciones de {args.nodes} nodos en {metrics['seconds']} s "
+          f"→ {metrics['rate']} mediciones/s ({metrics['batches']} tandas de {args.batch})")
+    print(f"Reenvío: {metrics['resent']} mediciones repetidas, {metrics['duplicates']} descartadas; "
+          f"guardadas {metrics['stored']} · por sitio {metrics['sites']}")
+
+    failed = False
+    if metrics["stored"] != metrics["results"] or metrics["duplicates"] != metrics["resent"]:
+        print("❌ La deduplicación no coincide con lo enviado.")
+        failed = True
+    if metrics["rate"] < args.min_rate:
+        print(f"❌ Throughput bajo el mínimo ({args.min_rate:g} mediciones/s).")
+        failed = True
+    if not failed:
+        print("✅ Ingesta dentro de lo esperado.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
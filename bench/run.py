@@ -0,0 +1,271 @@
+"""Corre los escenarios de benchmark contra los fixtures locales.
+
+Escenarios:
+    speedtest   InternetSpeedXBot.get_internet_speed() sobre la réplica de Speedtest.net.
+    follow      InstFollower.find_followers() + follow() sobre la réplica del diálogo de seguidores
+                (sin login y sin las pausas "humanas", que solo agregarían ruido aleatorio).
+
+Por escenario se informa la mediana de la latencia de punta a punta, la mediana de round trips
+de WebDriver y el máximo de RSS del árbol de procesos de Chrome. Si algún valor supera el
+baseline guardado por más de la tolerancia, el proceso termina con código 1.
+
+Con `--record <carpeta>` además se graban los comandos WebDriver de cada corrida
+(`common.webdriver_replay`); con `--replay <carpeta>` los escenarios se reproducen desde esas
+grabaciones sin abrir Chrome (lo más rápido posible, o con la latencia grabada si se agrega
+`--realtime`). Así se aísla el overhead del lado de Python y los round trips se cuentan exactos.
+Los resultados reproducidos se comparan contra su propia entrada del baseline (`<escenario>@replay`).
+
+Uso:
+    $ python -m bench.run [--scenario speedtest follow] [--repeat 3] [--update-baseline]
+    $ python -m bench.run --record recordings/      # con Chrome, grabando
+    $ python -m bench.run --replay recordings/      # sin Chrome, en milisegundos
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+SCENARIOS = ("speedtest", "follow")
+
+# Aumento relativo tolerado respecto del baseline, por métrica
+TOLERANCES = {"latency_ms": 0.25, "round_trips": 0.10, "chrome_rss_mb": 0.25}
+
+# Valores que muestra la réplica de Speedtest.net (se verifican para detectar escenarios rotos)
+FIXTURE_DOWN = "123.45"
+FIXTURE_UP = "67.89"
+
+
+def _import_bots(workdir):
+    """Importa ambos bots apuntando sus archivos de estado a `workdir`.
+
+    Los bots leen su configuración del entorno al importarse, así que las variables
+    se fijan antes del import.
+    """
+
+    os.environ.update({
+        "XBOT_DB_PATH": str(workdir / "measurements.db"),
+        "XBOT_OUTBOX_PATH": str(workdir / "outbox.db"),
+        "XBOT_SPEED_CACHE_PATH": str(workdir / "speed_cache.json"),
+        "INSTAGRAM_PROCESSED_DIR": str(workdir / "processed"),
+        "INSTAGRAM_LOCATOR_CACHE": str(workdir / "locators.json"),
+        "INSTAGRAM_SESSION_PATH": str(workdir / "session.bin"),
+    })
+    # Sin modo colector: los valores de la réplica no deben llegar al agregador real
+    os.environ.pop("XBOT_COLLECTOR_URL", None)
+    # Los bots usan imports planos de su propia carpeta; TwitterBot va primero porque ambos tienen main.py
+    for folder in ("InstagramBot", "TwitterBot"):
+        sys.path.insert(0, str(ROOT / folder))
+    sys.path.insert(0, str(ROOT))
+
+    import instafollower
+    import main as xbot_main
+    return xbot_main, instafollower
+
+
+def bench_chrome_options(slot=0):
+    """Chrome headless y efímero para los benchmarks."""
+
+    from common.driver_pool import build_chrome_options
+
+    options = build_chrome_options(detach=False)
+    options.add_argument("--headless=new")
+    options.add_argument("--window-size=1280,900")
+    return options
+
+
+def _chrome_rss_mb(driver):
+    from common.process_tree import tree_rss
+
+    # Un `ReplayDriver` no tiene proceso de ChromeDriver
+    process = getattr(getattr(driver, "service", None), "process", None)
+    return tree_rss(process.pid) / 1e6 if process is not None else None
+
+
+def run_speedtest(xbot_main, pool, server, delay_ms):
+    """Un test de velocidad completo contra la réplica local."""
+
+    from common.roundtrips import install_counter
+    from measurements import MeasurementStore
+
+    url = server.url(f"/speedtest.html?delay={delay_ms}&down={FIXTURE_DOWN}&up={FIXTURE_UP}")
+    started = time.perf_counter()
+    bot = xbot_main.InternetSpeedXBot(pool=pool, store=MeasurementStore(os.environ["XBOT_DB_PATH"]),
+                                      speedtest_url=url)
+    counter = install_counter(bot.driver)
+    commands = counter.total
+    try:
+        bot.get_internet_speed(force_refresh=True)
+        latency_ms = (time.perf_counter() - started) * 1000
+        if (bot.down, bot.up) != (FIXTURE_DOWN, FIXTURE_UP):
+            raise RuntimeError(f"Resultados inesperados: {bot.down}/{bot.up}")
+        return {
+            "latency_ms": latency_ms,
+            "round_trips": counter.total - commands,
+            "chrome_rss_mb": _chrome_rss_mb(bot.driver),
+        }
+    finally:
+        bot.close()
+
+
+def run_follow(instafollower, pool, server):
+    """Apertura del diálogo de seguidores y una secuencia de follow completa."""
+
+    from common.readiness import Delay
+
+    # Sin pausas "humanas": el benchmark mide el mecanismo, no el azar
+    instafollower.DELAY_BEFORE_CLICK = Delay("before_click", 0)
+    instafollower.DELAY_AFTER_FOLLOW = Delay("after_follow", 0)
+
+    started = time.perf_counter()
+    bot = instafollower.InstFollower(pool=pool, target="benchtarget", base_url=server.url("/ig"))
+    commands = bot.commands.total
+    try:
+        bot.find_followers()
+        bot.follow()
+        latency_ms = (time.perf_counter() - started) * 1000
+        if not bot.follow_stats or bot.follow_stats["followed"] < 15:
+            raise RuntimeError(f"follow() no completó la secuencia: {bot.follow_stats}")
+        return {
+            "latency_ms": latency_ms,
+            "round_trips": bot.commands.total - commands,
+            "chrome_rss_mb": _chrome_rss_mb(bot.driver),
+        }
+    finally:
+        bot.close()
+
+
+def make_pool(args, scenario):
+    """Pool del escenario: Chrome real, Chrome grabando o reproducción sin navegador.
+
+    Returns:
+        tuple[DriverPool, int]: Pool y cantidad de corridas a hacer con él.
+    """
+
+    from common.driver_pool import DriverPool
+
+    if args.replay:
+        from common.webdriver_replay import ReplayPool
+
+        recordings = sorted(str(p) for p in args.replay.glob(f"{scenario}-*.wdrec"))
+        if not recordings:
+            raise SystemExit(f"No hay grabaciones de '{scenario}' en {args.replay}.")
+        return ReplayPool(recordings, realtime=args.realtime), len(recordings)
+
+    if args.record:
+        from common.webdriver_replay import RecordingPool
+
+        pool = RecordingPool(bench_chrome_options, str(args.record), prefix=scenario, size=1)
+    else:
+        pool = DriverPool(bench_chrome_options, size=1)
+    pool.warm(1)  # El arranque en frío de Chrome no forma parte de ningún escenario
+    return pool, args.repeat
+
+
+def summarize(runs):
+    """Mediana de latencia y round trips, máximo de RSS."""
+
+    rss = [r["chrome_rss_mb"] for r in runs if r["chrome_rss_mb"] is not None]
+    return {
+        "latency_ms": round(statistics.median(r["latency_ms"] for r in runs), 1),
+        "round_trips": statistics.median(r["round_trips"] for r in runs),
+        "chrome_rss_mb": round(max(rss), 1) if rss else None,
+    }
+
+
+def compare(results, baseline, tolerance=None):
+    """Lista de regresiones respecto del baseline.
+
+    Args:
+        results (dict): `{escenario: resumen}`.
+        baseline (dict): Resultados guardados con el mismo formato.
+        tolerance (float, optional): Tolerancia única para todas las métricas (por defecto `TOLERANCES`).
+
+    Returns:
+        list[str]: Una descripción por métrica que empeoró más de lo tolerado.
+    """
+
+    regressions = []
+    for scenario, summary in results.items():
+        reference = baseline.get(scenario)
+        if not reference:
+            continue
+        for metric, allowed in TOLERANCES.items():
+            allowed = allowed if tolerance is None else tolerance
+            current, previous = summary.get(metric), reference.get(metric)
+            if current is None or not previous:
+                continue
+            if current > previous * (1 + allowed):
+                regressions.append(f"{scenario}.{metric}: {current} > {previous} (+{allowed:.0%} tolerado)")
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmarks de los bots contra fixtures locales.")
+    parser.add_argument("--scenario", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones por escenario.")
+    parser.add_argument("--delay-ms", type=int, default=1500, help="Demora de resultados de la réplica de Speedtest.")
+    parser.add_argument("--rows", type=int, default=300, help="Filas del diálogo de seguidores.")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help="Tolerancia relativa única (por defecto, una por métrica).")
+    parser.add_argument("--update-baseline", action="store_true", help="Guarda los resultados como baseline.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--record", type=Path, help="Graba los comandos WebDriver de cada corrida en esta carpeta.")
+    mode.add_argument("--replay", type=Path, help="Reproduce las grabaciones de esta carpeta sin abrir Chrome.")
+    parser.add_argument("--realtime", action="store_true", help="Con --replay, respeta la latencia grabada.")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+        xbot_main, instafollower = _import_bots(Path(tmp))
+        from bench.server import FixtureServer
+
+        results = {}
+        with FixtureServer(config={"rows": args.rows}) as server:
+            for scenario in args.scenario:
+                pool, repeat = make_pool(args, scenario)
+                runs = []
+                try:
+                    for _ in range(repeat):
+                        if scenario == "speedtest":
+                            runs.append(run_speedtest(xbot_main, pool, server, args.delay_ms))
+                        else:
+                            runs.append(run_follow(instafollower, pool, server))
+                finally:
+                    pool.close()
+                key = f"{scenario}@replay" if args.replay else scenario
+                results[key] = summarize(runs)
+                print(f"[{key}] {json.dumps(results[key])}")
+
+    if args.update_baseline:
+        baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        baseline.update(results)
+        args.baseline.write_text(json.dumps(baseline, indent=2) + "\n")
+        print(f"Baseline actualizado: {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"Sin baseline en {args.baseline}: correr con --update-baseline para crearlo.")
+        return 0
+
+    regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+    for regression in regressions:
+        print(f"❌ Regresión: {regression}")
+    if not regressions:
+        print("✅ Sin regresiones respecto del baseline.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
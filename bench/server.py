@@ -0,0 +1,150 @@
+"""Servidor HTTP local para los fixtures de los benchmarks.
+
+Rutas:
+    /speedtest.html        Réplica de Speedtest.net (parámetros por query string).
+    /ig/<perfil>/...       Réplica del perfil de Instagram con su diálogo de seguidores.
+    /__down?bytes=N        N bytes de relleno (descarga de `async_speedtest`).
+    /__up                  Acepta un POST y descarta el cuerpo (subida de `async_speedtest`).
+
+Uso típico:
+    with FixtureServer(config={"rows": 500}) as server:
+        bot = InstFollower(base_url=server.url("/ig"))
+
+    with FixtureServer() as server:
+        result = measure(ThroughputConfig.from_env(server.url()))
+"""
+
+import json
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+# Marcador de followers.html que el servidor reemplaza por `FixtureServer.config`
+_CONFIG_MARKER = b"window.FIXTURE_CONFIG = {};"
+
+# Bloque de relleno de `/__down` y tamaño de lectura de `/__up`
+_BLOCK = b"\0" * (1 << 16)
+
+
+class _FixtureHandler(SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive: `async_speedtest` reutiliza la conexión entre requests
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=str(FIXTURES_DIR), **kwargs)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path.startswith("/ig/"):
+            self._send_followers()
+        elif url.path == "/__down":
+            self._send_down(int(parse_qs(url.query).get("bytes", ["0"])[0]))
+        else:
+            super().do_GET()
+
+    def do_POST(self):
+        if urlsplit(self.path).path != "/__up":
+            self.send_error(404)
+            return
+        remaining = int(self.headers.get("Content-Length") or 0)
+        while remaining > 0:
+            chunk = self.rfile.read(min(remaining, len(_BLOCK)))
+            if not chunk:
+                self.close_connection = True  # El cliente cortó la subida (deadline)
+                return
+            remaining -= len(chunk)
+            self.server.count_bytes("up", len(chunk))
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _send_down(self, size):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(size))
+        self.end_headers()
+        try:
+            while size > 0:
+                chunk = _BLOCK[:min(size, len(_BLOCK))]
+                # Se cuenta antes de escribir: lo contado acá nunca es menos que lo que leyó el cliente
+                self.server.count_bytes("down", len(chunk))
+                self.wfile.write(chunk)
+                size -= len(chunk)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # El cliente cortó la descarga (deadline)
+
+    def _send_followers(self):
+        body = (FIXTURES_DIR / "followers.html").read_bytes()
+        config = json.dumps(self.server.fixture_config).encode("utf-8")
+        body = body.replace(_CONFIG_MARKER, b"window.FIXTURE_CONFIG = " + config + b";")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Sin una línea por request en la salida del benchmark
+
+
+class _FixtureHTTPServer(ThreadingHTTPServer):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lock = threading.Lock()
+        self.transferred = {"down": 0, "up": 0}
+
+    def count_bytes(self, direction, count):
+        with self.lock:
+            self.transferred[direction] += count
+
+
+class FixtureServer:
+    """Sirve `fixtures/` en un hilo propio.
+
+    Args:
+        host (str, optional): Dirección de escucha.
+        port (int, optional): Puerto (0 = uno libre).
+        config (dict, optional): Parámetros del diálogo de seguidores (`rows`, `chunk`, `load_ms`).
+
+    Attributes:
+        transferred (dict): Bytes servidos por `/__down` (`down`) y recibidos por `/__up` (`up`).
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, config=None):
+        self._httpd = _FixtureHTTPServer((host, port), _FixtureHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.fixture_config = dict(config or {})
+        self._thread = None
+
+    @property
+    def config(self):
+        return self._httpd.fixture_config
+
+    @property
+    def transferred(self):
+        with self._httpd.lock:
+            return dict(self._httpd.transferred)
+
+    def url(self, path="/"):
+        """URL absoluta de `path` en este servidor."""
+
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}{path}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fixture-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
@@ -0,0 +1,521 @@
+"""
+===============================================================================
+Project: web-scraping-with-selenium - CLI
+Author:  Joaquin Albano
+Python:  3.12+
+-------------------------------------------------------------------------------
+Description:
+    Punto de entrada único para ambos bots. Cada subcomando importa solo lo
+    que necesita y recién cuando se ejecuta: Selenium, Tweepy y dotenv no se
+    cargan para consultar el historial o el estado de la cola, así que esos
+    comandos arrancan casi al instante.
+
+      speedtest   Mide la velocidad (InternetSpeedXBot) y opcionalmente tweetea.
+      tweet       Publica la última medición guardada, sin abrir el navegador.
+      follow      Corre el bot de Instagram (sesión, seguidores y follow).
+      daemon      Mediciones periódicas (mismos argumentos que TwitterBot/daemon.py).
+      aggregator  Agregador central de varios nodos (mismos argumentos que TwitterBot/aggregator.py).
+      bench       Benchmarks contra fixtures locales (mismos argumentos que bench.run).
+      status      Última medición, tamaño del historial y tweets pendientes.
+      history     Mediciones recientes o agregados por hora / día.
+      analyze     Percentiles móviles, tiempo bajo lo contratado, perfil por hora y anomalías.
+      profile     Perfil de Chrome de un bot: tamaño, poda, ChromeDriver resuelto y tiempo de arranque.
+
+    `--startup-profile` informa al terminar cuánto tardó cada fase (imports
+    del CLI, configuración, comando) y el árbol de imports con su tiempo
+    acumulado y propio, al estilo de `python -X importtime`.
+
+Usage:
+    $ python cli.py status
+    $ python cli.py history --days 7 --bucket day
+    $ python cli.py speedtest --backend http --tweet
+    $ python cli.py --startup-profile tweet
+    $ python cli.py daemon --interval 1800 --jitter 60
+===============================================================================
+"""
+
+import time
+
+_CLI_START = time.perf_counter()
+
+import argparse                                                          # noqa: E402
+import builtins                                                          # noqa: E402
+import sys                                                               # noqa: E402
+from contextlib import contextmanager                                    # noqa: E402
+from datetime import datetime                                            # noqa: E402
+from pathlib import Path                                                 # noqa: E402
+
+ROOT = Path(__file__).resolve().parent
+
+# Imports más rápidos que esto (ms acumulados) no se muestran en el perfil
+PROFILE_MIN_MS = 1.0
+# Profundidad máxima del árbol de imports que se muestra
+PROFILE_MAX_DEPTH = 3
+
+# Subcomandos que reenvían todos sus argumentos (incluido --help) al script correspondiente
+PASSTHROUGH_COMMANDS = ("daemon", "bench", "aggregator")
+
+
+# ---------- PERFIL DE ARRANQUE ----------
+class StartupProfile:
+    """Tiempos por fase y árbol de imports de una invocación del CLI.
+
+    Mientras está instalado reemplaza `builtins.__import__` y mide cada import
+    de un módulo que todavía no estaba cargado (los ya cargados no cuestan nada).
+
+    Attributes:
+        phases (list[tuple[str, float]]): `(fase, ms)` en orden.
+        imports (list[list]): `[profundidad, módulo, ms acumulados, ms propios]` en orden de carga.
+    """
+
+    def __init__(self):
+        self.phases = []
+        self.imports = []
+        self._depth = 0
+        self._original = None
+
+    def install(self):
+        self._original = builtins.__import__
+        builtins.__import__ = self._import
+
+    def uninstall(self):
+        if self._original is not None:
+            builtins.__import__ = self._original
+            self._original = None
+
+    def _is_loaded(self, name, fromlist):
+        if name not in sys.modules:
+            return False
+        # `from paquete import submódulo` también carga código nuevo
+        return all(item == "*" or f"{name}.{item}" in sys.modules or not isinstance(item, str)
+                   for item in fromlist or ())
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or self._is_loaded(name, fromlist):
+            return self._original(name, globals, locals, fromlist, level)
+
+        record = [self._depth, name, 0.0, 0.0]
+        self.imports.append(record)
+        children = len(self.imports)
+        self._depth += 1
+        start = time.perf_counter()
+        try:
+            return self._original(name, globals, locals, fromlist, level)
+        finally:
+            self._depth -= 1
+            record[2] = (time.perf_counter() - start) * 1000
+            nested = sum(r[2] for r in self.imports[children:] if r[0] == record[0] + 1)
+            record[3] = record[2] - nested
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, (time.perf_counter() - start) * 1000))
+
+    def report(self):
+        """Texto del perfil: fases, imports más costosos y total."""
+
+        lines = ["", "⏱️ Perfil de arranque"]
+        for name, ms in self.phases:
+            lines.append(f"  {name:<28}{ms:9.1f} ms")
+        lines.append(f"  {'total':<28}{sum(ms for _, ms in self.phases):9.1f} ms")
+
+        shown = [r for r in self.imports if r[0] < PROFILE_MAX_DEPTH and r[2] >= PROFILE_MIN_MS]
+        if shown:
+            lines.append(f"  imports (≥ {PROFILE_MIN_MS:g} ms)            acumulado    propio")
+            for depth, name, cumulative, own in shown:
+                label = "  " * depth + name
+                lines.append(f"    {label:<34}{cumulative:8.1f}{own:10.1f}")
+        top = sorted(self.imports, key=lambda r: r[3], reverse=True)[:5]
+        if top:
+            lines.append("  mayor tiempo propio: " + ", ".join(f"{r[1]} {r[3]:.1f} ms" for r in top))
+        return "\n".join(lines)
+
+
+_profile = None
+
+
+@contextmanager
+def _phase(name):
+    if _profile is None:
+        yield
+    else:
+        with _profile.phase(name):
+            yield
+
+
+# ---------- CONFIGURACIÓN ----------
+def _use_bot(folder):
+    """Deja importables los módulos planos de un bot (`TwitterBot`, `InstagramBot`) y `common`."""
+
+    for path in (str(ROOT), str(ROOT / folder)):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+
+def _load_config(folder):
+    """Carga el `.env` del bot y el del directorio actual, solo si existen.
+
+    `dotenv` se importa únicamente cuando hay algún archivo que leer. Las variables
+    ya definidas en el entorno tienen prioridad.
+    """
+
+    with _phase("configuración"):
+        _use_bot(folder)
+        files = [path for path in (ROOT / folder / ".env", Path.cwd() / ".env") if path.is_file()]
+        if files:
+            from dotenv import load_dotenv
+
+            for path in files:
+                load_dotenv(path)
+
+
+# ---------- COMANDOS ----------
+def cmd_speedtest(args):
+    _load_config("TwitterBot")
+    with _phase("imports del comando"):
+        import main as xbot
+
+    measurement_mode = xbot.MEASUREMENT_MODE if args.measurement_mode is None else args.measurement_mode
+    bot = xbot.InternetSpeedXBot(measurement_mode=measurement_mode, backend=args.backend)
+    try:
+        # Para tweetear se mide siempre: una medición de la caché ya pudo haberse tweeteado
+        bot.get_internet_speed(force_refresh=args.fresh or args.tweet)
+        if args.tweet:
+            # Igual que el daemon: el veredicto del historial decide si hay queja
+            bot.tweet_at_provider()
+    finally:
+        bot.close()
+    if args.tweet:
+        bot.publisher.drain(timeout=args.drain_timeout)
+    if bot.collector is not None:
+        bot.collector.drain(timeout=args.drain_timeout)
+    return 0
+
+
+def cmd_tweet(args):
+    _load_config("TwitterBot")
+    with _phase("imports del comando"):
+        from measurements import DB_PATH, MeasurementStore
+        from tweets import assess_latest, compose_tweet, get_publisher
+
+    store = MeasurementStore(DB_PATH) if Path(DB_PATH).exists() else None
+    latest = store.latest() if store is not None else None
+    if latest is None or latest.down is None or latest.up is None:
+        print("No hay mediciones guardadas para publicar.")
+        return 1
+
+    verdict = assess_latest(store, latest.down, latest.up)
+    if verdict is not None:
+        print(f"📊 Veredicto del historial: {verdict.reason}.")
+    text, down, up, below_promise = compose_tweet(f"{latest.down:g}", f"{latest.up:g}", verdict)
+    # Con veredicto decide el historial; sin él, `--only-below` mira solo esta medición
+    if (verdict is not None or args.only_below) and not below_promise:
+        print(f"La última medición ({latest.down:g} / {latest.up:g} Mbps) no amerita queja: no se publica.")
+        return 0
+
+    publisher = get_publisher()
+    item_id = publisher.publish_measurement(text, down, up, below_promise)
+    if item_id is None:
+        print("🗂️ Medición acumulada para el próximo tweet resumen.")
+    else:
+        print(f"📨 Tweet encolado (#{item_id}).")
+    # Lo que no llegue a enviarse queda en la cola para la próxima ejecución
+    publisher.drain(timeout=args.drain_timeout)
+    return 0
+
+
+def cmd_follow(args):
+    _load_config("InstagramBot")
+    with _phase("imports del comando"):
+        from instafollower import InstFollower
+
+    bot = InstFollower(target=args.target)
+    try:
+        bot.start_session()
+        bot.find_followers()
+        bot.follow()
+    finally:
+        bot.close()
+    return 0
+
+
+def cmd_daemon(args):
+    _load_config("TwitterBot")
+    with _phase("imports del comando"):
+        import daemon
+
+    return daemon.main(args.args) or 0
+
+
+def cmd_aggregator(args):
+    _load_config("TwitterBot")
+    with _phase("imports del comando"):
+        import aggregator
+
+    return aggregator.main(args.args) or 0
+
+
+def cmd_bench(args):
+    with _phase("imports del comando"):
+        _use_bot(".")
+        from bench import run
+
+    return run.main(args.args)
+
+
+def cmd_status(args):
+    _load_config("TwitterBot")
+    with _phase("imports del comando"):
+        from measurements import DB_PATH, MeasurementStore
+        from tweets import OUTBOX_PATH
+
+    if Path(DB_PATH).exists():
+        store = MeasurementStore(DB_PATH)
+        latest = store.latest()
+        print(f"Historial: {store.count()} mediciones ({DB_PATH})")
+        if latest is not None:
+            print(f"Última:    {datetime.fromtimestamp(latest.ts):%Y-%m-%d %H:%M} · "
+                  f"{latest.down} ↓ / {latest.up} ↑ Mbps · {latest.server or 'servidor desconocido'}")
+        store.close()
+    else:
+        print(f"Historial: vacío ({DB_PATH})")
+
+    if Path(OUTBOX_PATH).exists():
+        from publisher import Outbox
+
+        print(f"Cola:      {Outbox(OUTBOX_PATH).pending_count()} tweets pendientes ({OUTBOX_PATH})")
+    else:
+        print(f"Cola:      vacía ({OUTBOX_PATH})")
+    return 0
+
+
+def cmd_analyze(args):
+    _load_config("TwitterBot")
+    with _phase("imports del comando"):
+        import analysis
+        from measurements import DB_PATH, MeasurementStore
+
+    if not analysis.available():
+        print("El análisis necesita NumPy: pip install numpy")
+        return 1
+    if not Path(DB_PATH).exists():
+        print(f"Historial vacío ({DB_PATH})")
+        return 0
+
+    store = MeasurementStore(DB_PATH)
+    started = time.perf_counter()
+    ts, down, up = analysis.load(store, time.time() - args.days * 86400)
+    loaded = time.perf_counter()
+    if not len(ts):
+        print("No hay mediciones en el período.")
+        return 0
+    report = analysis.summarize(ts, down, up, window=args.window * 86400)
+    done = time.perf_counter()
+
+    print(f"{report['samples']} mediciones de los últimos {args.days:g} días "
+          f"(carga {(loaded - started) * 1000:.0f} ms, análisis {(done - loaded) * 1000:.0f} ms)")
+    print(f"Tiempo bajo lo contratado: {report['share_below']:.1%}")
+    for field in ("down", "up"):
+        rolling = report["rolling"][field]
+        print(f"{field:>4} p10/p50/p90 ({args.window:g} días): {rolling['p10'][-1]:.1f} / "
+              f"{rolling['p50'][-1]:.1f} / {rolling['p90'][-1]:.1f} Mbps")
+
+    print("\nHora   mediana ↓   p10 ↓   mediana ↑   mediciones")
+    profile_down, profile_up = report["profile"]["down"], report["profile"]["up"]
+    for hour in range(24):
+        if profile_down["count"][hour]:
+            print(f"{hour:02d}h   {profile_down['median'][hour]:9.1f}   {profile_down['p10'][hour]:5.1f}   "
+                  f"{profile_up['median'][hour]:9.1f}   {profile_down['count'][hour]:10d}")
+
+    anomalies = report["anomalies"]
+    print(f"\nAnomalías (|puntaje| > {analysis.ANOMALY_THRESHOLD:g}): {anomalies['count']}")
+    for ts_, field, value, score in anomalies["worst"]:
+        print(f"  {datetime.fromtimestamp(ts_):%Y-%m-%d %H:%M}  {field:>4} {value:8.1f} Mbps  puntaje {score:6.1f}")
+
+    latest = store.latest()
+    verdict = analysis.assess(store, latest.down, latest.up) if latest is not None else None
+    if verdict is not None:
+        print(f"\nVeredicto para la última medición: {'tweetear' if verdict.complain else 'no tweetear'} "
+              f"({verdict.reason})")
+    store.close()
+    return 0
+
+
+def cmd_profile(args):
+    folder, module = ("TwitterBot", "main") if args.bot == "xbot" else ("InstagramBot", "instafollower")
+    _load_config(folder)
+    with _phase("imports del comando"):
+        import importlib
+
+        bot = importlib.import_module(module)
+        from common.driver_pool import DriverPool
+        from common.driver_resolver import DriverResolutionError, get_resolver
+
+    if args.bot == "xbot":
+        profiles, options_factory = bot.xbot_profiles(), bot.xbot_chrome_options
+    else:
+        profiles, options_factory = bot.get_profiles("instagram", "INSTAGRAM", bot.PROFILE_DIR), bot.instagram_chrome_options
+
+    if args.prune:
+        freed = profiles.prune()
+        print(f"Poda: {freed / 1e6:.1f} MB liberados de {profiles.persistent_dir}")
+    stats = profiles.stats()
+    print(f"Modo:        {stats['mode']}")
+    print(f"Perfil base: {stats['golden_mb']:.2f} MB ({profiles.golden_dir})")
+    print(f"Persistente: {stats['persistent_mb']:.2f} MB ({profiles.persistent_dir})")
+    print(f"Clones en:   {stats['runtime_dir']}")
+
+    resolver = get_resolver()
+    if resolver is not None:
+        try:
+            resolution = resolver.resolve(force=args.refresh_driver)
+            print(f"Driver:      ChromeDriver {resolution.driver_version} para Chrome {resolution.chrome_version or '?'} "
+                  f"({resolution.source}, {resolution.seconds * 1000:.1f} ms) · {resolver.cache_path}")
+        except DriverResolutionError as e:
+            print(f"Driver:      {e}")
+
+    # Arranques en frío: cada uno prepara el perfil y lanza Chrome desde cero
+    if args.launch:
+        pool = DriverPool(options_factory)
+        try:
+            for i in range(args.launch):
+                lease = pool.lease()
+                last = profiles.last
+                print(f"Arranque {i + 1}: Chrome {lease.acquire_ms / 1000:.2f} s · perfil {last['size_mb']:.2f} MB "
+                      f"preparado en {last['prepare_ms']:.1f} ms ({last['method']})")
+                lease.release(discard=True)
+        finally:
+            pool.close()
+            profiles.cleanup()
+    return 0
+
+
+def cmd_history(args):
+    _load_config("TwitterBot")
+    with _phase("imports del comando"):
+        from measurements import DB_PATH, MeasurementStore
+
+    if not Path(DB_PATH).exists():
+        print(f"Historial vacío ({DB_PATH})")
+        return 0
+
+    store = MeasurementStore(DB_PATH)
+    start = time.time() - args.days * 86400
+    if args.bucket == "none":
+        for m in store.range(start)[-args.limit:]:
+            print(f"{datetime.fromtimestamp(m.ts):%Y-%m-%d %H:%M}  {m.down or 0:8.2f} ↓  {m.up or 0:8.2f} ↑  "
+                  f"{m.latency or 0:6.1f} ms  {m.server or ''}")
+    else:
+        print(f"{'inicio':<17}{'n':>5}{'mín':>9}{'media':>9}{'p95':>9}{'máx':>9}   ({args.field})")
+        for row in store.aggregate(start, bucket=args.bucket, field=args.field)[-args.limit:]:
+            print(f"{datetime.fromtimestamp(row['start']):%Y-%m-%d %H:%M}{row['count']:5d}"
+                  f"{row['min']:9.2f}{row['mean']:9.2f}{row['p95']:9.2f}{row['max']:9.2f}")
+    store.close()
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="cli.py", description="Bots de medición de velocidad e Instagram.")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="Informa al terminar el tiempo de cada fase y de cada import.")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="comando")
+
+    speedtest = commands.add_parser("speedtest", help="Mide la velocidad de Internet.")
+    speedtest.add_argument("--backend", choices=("selenium", "http"), default=None,
+                           help="Por defecto, XBOT_SPEED_BACKEND.")
+    speedtest.add_argument("--measurement-mode", action=argparse.BooleanOptionalAction, default=None,
+                           help="Por defecto, XBOT_MEASUREMENT_MODE.")
+    speedtest.add_argument("--tweet", action="store_true", help="Publica el resultado.")
+    speedtest.add_argument("--fresh", action="store_true",
+                           help="Mide aunque haya una medición reciente en la caché (XBOT_SPEED_CACHE_TTL).")
+    speedtest.add_argument("--drain-timeout", type=float, default=30, help="Segundos esperando el envío.")
+    speedtest.set_defaults(handler=cmd_speedtest)
+
+    tweet = commands.add_parser("tweet", help="Publica la última medición guardada (sin navegador).")
+    tweet.add_argument("--only-below", action="store_true", help="Solo si está bajo lo contratado.")
+    tweet.add_argument("--drain-timeout", type=float, default=30, help="Segundos esperando el envío.")
+    tweet.set_defaults(handler=cmd_tweet)
+
+    follow = commands.add_parser("follow", help="Sigue a los seguidores de un perfil de Instagram.")
+    follow.add_argument("--target", default=None, help="Perfil objetivo (por defecto, INSTAGRAM_TARGET).")
+    follow.set_defaults(handler=cmd_follow)
+
+    # Sus argumentos no se parsean acá (ver `_split_passthrough`)
+    daemon = commands.add_parser("daemon", help="Mediciones periódicas (ver TwitterBot/daemon.py).", add_help=False)
+    daemon.set_defaults(handler=cmd_daemon)
+
+    aggregator = commands.add_parser("aggregator", help="Agregador central de mediciones (ver TwitterBot/aggregator.py).",
+                                     add_help=False)
+    aggregator.set_defaults(handler=cmd_aggregator)
+
+    bench = commands.add_parser("bench", help="Benchmarks contra fixtures locales (ver bench/run.py).", add_help=False)
+    bench.set_defaults(handler=cmd_bench)
+
+    status = commands.add_parser("status", help="Última medición y tweets pendientes.")
+    status.set_defaults(handler=cmd_status)
+
+    analyze = commands.add_parser("analyze", help="Percentiles, perfil por hora y anomalías del historial (NumPy).")
+    analyze.add_argument("--days", type=float, default=365, help="Días de historial a analizar.")
+    analyze.add_argument("--window", type=float, default=7, help="Ventana de los percentiles móviles (días).")
+    analyze.set_defaults(handler=cmd_analyze)
+
+    profile = commands.add_parser("profile", help="Perfil de Chrome, ChromeDriver resuelto y tiempo de arranque.")
+    profile.add_argument("bot", choices=("xbot", "instagram"))
+    profile.add_argument("--prune", action="store_true", help="Poda ya cachés e historial del perfil persistente.")
+    profile.add_argument("--refresh-driver", action="store_true", help="Resuelve de nuevo Chrome y ChromeDriver.")
+    profile.add_argument("--launch", type=int, default=0, metavar="N", help="Mide N arranques en frío de Chrome.")
+    profile.set_defaults(handler=cmd_profile)
+
+    history = commands.add_parser("history", help="Mediciones recientes o agregadas.")
+    history.add_argument("--days", type=float, default=7, help="Días hacia atrás.")
+    history.add_argument("--bucket", choices=("none", "hour", "day"), default="none",
+                         help="Agregado por hora o día; `none` lista las mediciones.")
+    history.add_argument("--field", choices=("down", "up", "latency", "duration"), default="down")
+    history.add_argument("--limit", type=int, default=50, help="Filas como máximo (las más recientes).")
+    history.set_defaults(handler=cmd_history)
+    return parser
+
+
+def _split_passthrough(argv):
+    """Separa los argumentos que van al script de un subcomando de `PASSTHROUGH_COMMANDS`.
+
+    Returns:
+        tuple[list[str], list[str]]: Argumentos del CLI (hasta el subcomando) y los reenviados.
+    """
+
+    for i, arg in enumerate(argv):
+        if not arg.startswith("-"):
+            if arg in PASSTHROUGH_COMMANDS:
+                return argv[:i + 1], argv[i + 1:]
+            break
+    return argv, []
+
+
+def main(argv=None):
+    global _profile
+
+    own, forwarded = _split_passthrough(sys.argv[1:] if argv is None else list(argv))
+    args = build_parser().parse_args(own)
+    args.args = forwarded
+    if args.startup_profile:
+        _profile = StartupProfile()
+        _profile.phases.append(("imports del CLI", (time.perf_counter() - _CLI_START) * 1000))
+        _profile.install()
+    start = time.perf_counter()
+    try:
+        return args.handler(args)
+    finally:
+        if _profile is not None:
+            _profile.uninstall()
+            # Lo que no fue configuración ni imports del comando es el trabajo del comando en sí
+            measured = sum(ms for _, ms in _profile.phases[1:])
+            _profile.phases.append(("ejecución", (time.perf_counter() - start) * 1000 - measured))
+            print(_profile.report(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,6 @@
+"""Utilidades compartidas por TwitterBot e InstagramBot.
+
+Los submódulos se importan explícitamente (por ejemplo
+`from common.driver_pool import get_pool`) para no cargar Selenium
+hasta que realmente se necesita un navegador.
+"""
@@ -0,0 +1,396 @@
+"""Supervisión de los navegadores del pool: plazos duros, memoria, reciclado y huérfanos.
+
+`BrowserSupervisor` se pasa a `DriverPool(supervisor=...)` y cuida cada
+navegador que el pool lanza:
+
+- **Plazo duro por comando**: cada comando WebDriver tiene un plazo de
+  reloj (`step_deadline`). Si ChromeDriver no responde a tiempo, un hilo
+  vigía termina el árbol de procesos del navegador (ChromeDriver, Chrome y
+  sus hijos) y el comando falla con `StepDeadlineExceeded`, que
+  `classify_error()` clasifica como `driver_lost`: el bot descarta el
+  navegador y toma otro en lugar de quedar colgado.
+  `step(nombre, segundos)` agrega un plazo para un paso completo.
+- **Memoria**: `run(driver)` cuenta una ejecución y al terminar mide la RSS
+  del árbol de procesos de Chrome (`common.process_tree`); el hilo vigía la
+  vuelve a medir cada `rss_interval` segundos, así una ejecución larga (o
+  un navegador que crece sin terminar ninguna) también se detecta.
+- **Reciclado**: `recycle_reason(driver)` indica si el navegador ya hizo
+  `max_runs` ejecuciones o superó `max_rss_mb`; el pool lo descarta al
+  devolverlo y los bots lo reemplazan entre ejecuciones.
+- **Huérfanos**: los procesos de cada navegador se anotan en un registro
+  por proceso y supervisor (en la carpeta temporal). Al arrancar se terminan los
+  registrados por procesos que ya murieron (nunca procesos ajenos, aunque
+  se llamen igual); al cerrar el pool, lo que haya quedado vivo de sus navegadores (por
+  ejemplo, por la opción `detach`).
+
+`psutil` es opcional (ver `common.process_tree`).
+
+Cada pool necesita su propio supervisor (`get_supervisor` con el nombre del
+pool): al cerrarse, el pool termina todos los navegadores de su supervisor.
+
+Uso típico:
+    supervisor = get_supervisor("xbot", "XBOT")       # limpia huérfanos de ejecuciones anteriores
+    pool = DriverPool(options_factory, supervisor=supervisor)
+    with supervisor.run(driver):
+        ...
+    if supervisor.recycle_reason(driver):
+        lease.release(discard=True)
+"""
+
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium.common.exceptions import WebDriverException
+
+from common.process_tree import is_alive, kill_tree, process_identity, descendants, tree_rss
+
+# Carpeta de los registros de procesos de navegadores (uno por proceso de Python)
+REGISTRY_DIR = os.path.join(tempfile.gettempdir(), "selenium-bots")
+
+
+class StepDeadlineExceeded(WebDriverException):
+    """Un comando o paso superó su plazo duro y se terminó el navegador."""
+
+    # Leído por `common.retry.classify_error`: el navegador ya no existe
+    category = "driver_lost"
+
+
+class _Supervised:
+    """Estado de un navegador supervisado."""
+
+    __slots__ = ("driver", "pid", "runs", "rss", "rss_max", "killed", "execute")
+
+    def __init__(self, driver, pid):
+        self.driver = driver
+        self.pid = pid
+        self.runs = 0
+        self.rss = None
+        self.rss_max = None
+        self.killed = None
+        self.execute = None
+
+
+class BrowserSupervisor:
+    """Supervisa los navegadores de un pool.
+
+    Args:
+        name (str): Nombre (prefijo del registro de procesos).
+        step_deadline (float, optional): Plazo duro (s) de cada comando WebDriver. Tiene que
+            superar el timeout de carga de página y de scripts asíncronos más largos.
+        max_runs (int, optional): Ejecuciones tras las que se recicla el navegador (0 = sin límite).
+        max_rss_mb (float, optional): RSS del árbol de Chrome que fuerza el reciclado (0 = sin límite).
+        poll_interval (float, optional): Cada cuánto revisa los plazos el hilo vigía (s).
+        rss_interval (float, optional): Cada cuánto mide el hilo vigía la RSS de cada navegador
+            (s, 0 = solo al terminar cada ejecución).
+
+    Attributes:
+        stats (dict): `killed` (navegadores terminados por plazo), `recycled`, `orphans_killed`.
+    """
+
+    def __init__(self, name, step_deadline=180, max_runs=0, max_rss_mb=0, poll_interval=0.5, rss_interval=30):
+        self.name = name
+        self.step_deadline = step_deadline
+        self.max_runs = max_runs
+        self.max_rss_mb = max_rss_mb
+        self.poll_interval = poll_interval
+        self.rss_interval = rss_interval
+        self.stats = {"killed": 0, "recycled": 0, "orphans_killed": 0}
+        self.registry_path = os.path.join(REGISTRY_DIR, f"{name}-{os.getpid()}.json")
+        self._browsers = {}
+        self._deadlines = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._watchdog = None
+
+    @classmethod
+    def from_env(cls, name, prefix):
+        """Crea un supervisor configurado por variables de entorno.
+
+        - `<PREFIX>_STEP_DEADLINE`: plazo duro por comando (s, por defecto 180).
+        - `<PREFIX>_RECYCLE_RUNS`: ejecuciones por navegador (0 = sin límite).
+        - `<PREFIX>_RECYCLE_RSS_MB`: RSS máxima del árbol de Chrome (0 = sin límite).
+        - `<PREFIX>_RSS_INTERVAL`: cada cuánto se mide la RSS en segundo plano (s, por defecto 30).
+        """
+
+        return cls(
+            name,
+            step_deadline=float(os.getenv(f"{prefix}_STEP_DEADLINE", "180")),
+            max_runs=int(os.getenv(f"{prefix}_RECYCLE_RUNS", "0")),
+            max_rss_mb=float(os.getenv(f"{prefix}_RECYCLE_RSS_MB", "0")),
+            rss_interval=float(os.getenv(f"{prefix}_RSS_INTERVAL", "30")),
+        )
+
+    # ---------- NAVEGADORES ----------
+    def attach(self, driver):
+        """Empieza a supervisar un navegador recién lanzado."""
+
+        process = getattr(getattr(driver, "service", None), "process", None)
+        state = _Supervised(driver, process.pid if process is not None else None)
+        execute = state.execute = driver.execute
+
+        def supervised_execute(driver_command, params=None):
+            if state.killed:
+                raise StepDeadlineExceeded(f"El navegador se terminó por exceder el plazo de '{state.killed}'.")
+            token = self._push(state, self.step_deadline, driver_command)
+            try:
+                return execute(driver_command, params)
+            except Exception as e:
+                if state.killed:
+                    raise StepDeadlineExceeded(
+                        f"'{driver_command}' superó el plazo duro de {self.step_deadline:g}s: navegador terminado."
+                    ) from e
+                raise
+            finally:
+                self._pop(token)
+
+        driver.execute = supervised_execute
+        with self._lock:
+            self._browsers[id(driver)] = state
+        self._save_registry()
+        self._start_watchdog()
+
+    def detach(self, driver):
+        """Deja de supervisar un navegador (después de `quit()`) y termina lo que haya quedado vivo."""
+
+        with self._lock:
+            state = self._browsers.pop(id(driver), None)
+        if state is None:
+            return
+        driver.__dict__.pop("execute", None)
+        if state.pid is not None and is_alive(state.pid):
+            kill_tree(state.pid)
+        self._save_registry()
+
+    def _state(self, driver):
+        with self._lock:
+            return self._browsers.get(id(driver))
+
+    # ---------- PLAZOS ----------
+    def _push(self, state, seconds, label):
+        token = object()
+        with self._lock:
+            self._deadlines[token] = (time.monotonic() + seconds, state, label)
+        return token
+
+    def _pop(self, token):
+        with self._lock:
+            self._deadlines.pop(token, None)
+
+    @contextmanager
+    def step(self, driver, label, seconds):
+        """Plazo duro para un paso completo (varios comandos).
+
+        Args:
+            driver (webdriver.Chrome): Navegador supervisado.
+            label (str): Nombre del paso (para el mensaje de error).
+            seconds (float): Plazo total del paso.
+
+        Raises:
+            StepDeadlineExceeded: Si el paso no terminó a tiempo (el navegador se termina).
+        """
+
+        state = self._state(driver)
+        if state is None:
+            yield
+            return
+        token = self._push(state, seconds, label)
+        try:
+            yield
+        finally:
+            self._pop(token)
+        if state.killed == label:
+            raise StepDeadlineExceeded(f"El paso '{label}' superó su plazo de {seconds:g}s: navegador terminado.")
+
+    def _start_watchdog(self):
+        if self._watchdog is None or not self._watchdog.is_alive():
+            self._wake.clear()
+            self._watchdog = threading.Thread(target=self._watch, name=f"{self.name}-watchdog", daemon=True)
+            self._watchdog.start()
+
+    def _watch(self):
+        next_sample = time.monotonic() + self.rss_interval
+        while True:
+            self._wake.wait(self.poll_interval)
+            now = time.monotonic()
+            with self._lock:
+                if not self._browsers:
+                    self._watchdog = None
+                    return
+                expired = [(state, label) for deadline, state, label in self._deadlines.values()
+                           if deadline <= now and not state.killed]
+                for state, label in expired:
+                    state.killed = label
+                self.stats["killed"] += len(expired)
+                sampled = list(self._browsers.values()) if self.rss_interval and now >= next_sample else []
+            for state, label in expired:
+                print(f"⛔ '{label}' superó su plazo: se termina el navegador (pid {state.pid}).")
+                if state.pid is not None:
+                    kill_tree(state.pid)
+            if sampled:
+                # Fuera del lock: recorrer el árbol de procesos no debe demorar los plazos de los comandos
+                for state in sampled:
+                    if not state.killed:
+                        self._sample_state(state)
+                next_sample = now + self.rss_interval
+
+    # ---------- EJECUCIONES, MEMORIA Y RECICLADO ----------
+    @contextmanager
+    def run(self, driver):
+        """Cuenta una ejecución del navegador y mide su memoria al terminar."""
+
+        try:
+            yield
+        finally:
+            self.end_run(driver)
+
+    def end_run(self, driver):
+        """Registra el fin de una ejecución del navegador y mide su memoria (sin `with`)."""
+
+        state = self._state(driver)
+        if state is not None:
+            state.runs += 1
+            self.sample(driver)
+
+    def sample(self, driver):
+        """Mide la RSS del árbol de procesos del navegador.
+
+        Returns:
+            float | None: MB residentes, o None si el navegador no tiene proceso propio.
+        """
+
+        state = self._state(driver)
+        return self._sample_state(state) if state is not None else None
+
+    @staticmethod
+    def _sample_state(state):
+        if state.pid is None:
+            return None
+        state.rss = tree_rss(state.pid) / 1e6
+        state.rss_max = max(state.rss_max or 0, state.rss)
+        return state.rss
+
+    def recycle_reason(self, driver):
+        """Motivo para reemplazar el navegador, o None si puede seguir usándose."""
+
+        state = self._state(driver)
+        if state is None:
+            return None
+        if state.killed:
+            return f"terminado por exceder el plazo de '{state.killed}'"
+        if self.max_runs and state.runs >= self.max_runs:
+            return f"{state.runs} ejecuciones"
+        if self.max_rss_mb and state.rss is not None and state.rss > self.max_rss_mb:
+            return f"{state.rss:.0f} MB de RSS (máximo {self.max_rss_mb:g} MB)"
+        return None
+
+    def recycled(self, reason):
+        """Registra un reciclado (lo llaman el pool y los bots al reemplazar un navegador)."""
+
+        self.stats["recycled"] += 1
+        print(f"♻️ Navegador reciclado: {reason}.")
+
+    def browser_stats(self, driver):
+        """`runs`, `rss_mb` y `rss_max_mb` del navegador."""
+
+        state = self._state(driver)
+        if state is None:
+            return {}
+        return {"runs": state.runs, "rss_mb": state.rss, "rss_max_mb": state.rss_max}
+
+    # ---------- HUÉRFANOS ----------
+    def _save_registry(self):
+        with self._lock:
+            entries = []
+            for state in self._browsers.values():
+                if state.pid is None:
+                    continue
+                # ChromeDriver y el proceso principal de Chrome (que queda huérfano si muere ChromeDriver)
+                for pid in [state.pid] + descendants(state.pid)[:4]:
+                    identity = process_identity(pid)
+                    if identity is not None:
+                        entries.append({"pid": pid, "name": identity[0], "start": identity[1]})
+        if not entries:
+            try:
+                os.remove(self.registry_path)
+            except FileNotFoundError:
+                pass
+            return
+        os.makedirs(REGISTRY_DIR, exist_ok=True)
+        owner = process_identity(os.getpid())
+        tmp = f"{self.registry_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"owner": os.getpid(), "owner_start": owner[1] if owner else None, "processes": entries}, f)
+        os.replace(tmp, self.registry_path)
+
+    def cleanup_orphans(self):
+        """Termina los navegadores que dejaron ejecuciones anteriores que ya no existen.
+
+        Revisa los registros de este `name` cuyo proceso dueño murió; solo se terminan los
+        procesos cuyo nombre e inicio coinciden con lo registrado. Los ChromeDriver que no
+        lanzó este bot (Selenium Grid, otros usuarios u otros despliegues) no se tocan.
+
+        Returns:
+            int: Procesos terminados.
+        """
+
+        killed = 0
+        # `<nombre>-<pid>.json`: el registro de "xbot" no incluye los de "xbot-measure"
+        for path in glob.glob(os.path.join(REGISTRY_DIR, f"{self.name}-[0-9]*.json")):
+            if path == self.registry_path:
+                continue
+            try:
+                with open(path, encoding="utf-8") as f:
+                    registry = json.load(f)
+            except (OSError, ValueError):
+                continue
+            owner = process_identity(registry.get("owner", -1))
+            if owner is not None and owner[1] == registry.get("owner_start"):
+                continue  # El dueño sigue vivo: son sus navegadores
+            for entry in registry.get("processes", []):
+                if process_identity(entry["pid"]) == (entry["name"], entry["start"]):
+                    killed += kill_tree(entry["pid"])
+            os.remove(path)
+
+        self.stats["orphans_killed"] += killed
+        if killed:
+            print(f"🧹 {killed} procesos de navegadores huérfanos terminados.")
+        return killed
+
+    def shutdown(self):
+        """Termina lo que quede vivo de los navegadores supervisados y borra el registro."""
+
+        with self._lock:
+            states = list(self._browsers.values())
+            self._browsers.clear()
+        for state in states:
+            if state.pid is not None and is_alive(state.pid):
+                kill_tree(state.pid)
+        self._save_registry()
+        self._wake.set()
+
+
+# ---------- REGISTRO DE SUPERVISORES POR PROCESO ----------
+_supervisors = {}
+_supervisors_lock = threading.Lock()
+
+
+def get_supervisor(name, prefix):
+    """Devuelve el supervisor `name` del proceso; al crearlo limpia los huérfanos de ejecuciones anteriores.
+
+    Args:
+        name (str): Nombre del supervisor: el del pool que lo usa (por ejemplo `"xbot"`), porque
+            `DriverPool.shutdown()` termina todos los navegadores del supervisor.
+        prefix (str): Prefijo de las variables de entorno (ver `BrowserSupervisor.from_env`).
+    """
+
+    with _supervisors_lock:
+        supervisor = _supervisors.get(name)
+        if supervisor is None:
+            supervisor = _supervisors[name] = BrowserSupervisor.from_env(name, prefix)
+            supervisor.cleanup_orphans()
+        return supervisor
@@ -0,0 +1,87 @@
+"""Lector compartido de eventos CDP del log "performance" de ChromeDriver.
+
+`driver.get_log("performance")` vacía el buffer en cada llamada, así que si
+dos componentes (el contador de tráfico y la espera de red ociosa) lo leen
+por su cuenta se roban eventos entre sí. `CdpEventLog` lee el buffer una sola
+vez y reparte cada evento a todos los suscriptores.
+
+Requiere que las opciones del navegador habiliten
+`goog:loggingPrefs = {"performance": "ALL"}` (ver `apply_measurement_mode`).
+"""
+
+import json
+
+from selenium.common.exceptions import WebDriverException
+
+
+class CdpEventLog:
+    """Distribuye los eventos CDP de un navegador a varios suscriptores.
+
+    Args:
+        driver (webdriver.Chrome): Navegador con el log "performance" habilitado.
+
+    Attributes:
+        available (bool): False si el navegador no expone el log "performance".
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.available = True
+        self._listeners = []
+
+    def subscribe(self, listener):
+        """Registra `listener(method, params)` para cada evento recibido."""
+
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        """Deja de notificar a `listener`."""
+
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def poll(self):
+        """Lee los eventos pendientes y los reparte a los suscriptores.
+
+        Returns:
+            int: Cantidad de eventos procesados (0 si el log no está disponible).
+        """
+
+        if not self.available:
+            return 0
+        try:
+            entries = self.driver.get_log("performance")
+        except WebDriverException:
+            self.available = False
+            return 0
+
+        count = 0
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            method = message.get("method")
+            params = message.get("params", {})
+            for listener in list(self._listeners):
+                listener(method, params)
+            count += 1
+        return count
+
+
+def get_event_log(driver):
+    """Devuelve el `CdpEventLog` asociado al navegador, creándolo si hace falta.
+
+    Args:
+        driver (webdriver.Chrome): Navegador.
+
+    Returns:
+        CdpEventLog: Lector único para ese navegador.
+    """
+
+    log = getattr(driver, "_cdp_event_log", None)
+    if log is None:
+        log = CdpEventLog(driver)
+        driver._cdp_event_log = log
+    return log
@@ -0,0 +1,436 @@
+"""Fábrica y pool de WebDrivers de Chrome compartido por ambos bots.
+
+Arrancar Chrome en frío cuesta varios segundos. Este módulo mantiene un
+número configurable de navegadores ya lanzados ("calientes") y los entrega
+como préstamos (`DriverLease`) usables con `with`. Al devolver un préstamo
+se limpia el estado del navegador (cookies, pestañas y storage) para que
+la siguiente tarea arranque limpia sin pagar otro arranque.
+
+Uso típico:
+    pool = get_pool("xbot", lambda slot: build_chrome_options())
+    with pool.lease() as driver:
+        driver.get("https://www.speedtest.net/")
+    print(pool.stats())
+"""
+
+import atexit
+import queue
+import threading
+import time
+from urllib.parse import urlsplit
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import WebDriverException
+
+from common.driver_resolver import chrome_service
+
+
+# Permisos que ninguno de los bots necesita
+BLOCKED_PERMISSION_PREFS = {
+    "profile.default_content_setting_values.notifications": 2,
+    "profile.default_content_setting_values.geolocation": 2,
+    "profile.default_content_setting_values.media_stream_mic": 2,
+    "profile.default_content_setting_values.media_stream_camera": 2,
+}
+
+# Desactiva la ventana emergente del navegador para guardar passwords
+NO_PASSWORD_MANAGER_PREFS = {
+    "credentials_enable_service": False,
+    "profile.password_manager_enabled": False,
+}
+
+
+def build_chrome_options(user_data_dir=None, prefs=None, detach=True):
+    """Construye las `Options` de Chrome comunes a ambos bots.
+
+    Args:
+        user_data_dir (str, optional): Carpeta de perfil de Chrome. Si es None
+            se usa un perfil temporal.
+        prefs (dict, optional): Preferencias de Chrome (`prefs`) adicionales.
+        detach (bool, optional): Mantiene abierto el navegador al terminar el
+            proceso de Python. Por defecto True, como hacían los bots.
+
+    Returns:
+        Options: Opciones listas para `webdriver.Chrome`.
+    """
+
+    options = Options()
+    options.add_argument("--start-maximized")                               # Abre Chrome maximizado
+    options.add_argument("--disable-infobars")                              # Oculta "Chrome is being controlled..."
+    options.add_argument("--disable-extensions")                            # Sin extensiones del navegador
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-blink-features=AutomationControlled")   # Evita la detección de automatización
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option("useAutomationExtension", False)
+
+    if user_data_dir:
+        options.add_argument(f"--user-data-dir={user_data_dir}")
+
+    options.add_experimental_option("prefs", dict(prefs or {}))
+    options.add_experimental_option("detach", detach)
+    return options
+
+
+def launch_driver(options, service=None):
+    """Lanza un Chrome nuevo con las opciones indicadas.
+
+    Args:
+        options (Options): Opciones del navegador.
+        service (Service, optional): Servicio de ChromeDriver. Si es None se
+            usa `chrome_service()`: rutas de Chrome y ChromeDriver resueltas
+            una vez y cacheadas (`common.driver_resolver`).
+
+    Returns:
+        webdriver.Chrome: Driver recién iniciado.
+
+    Raises:
+        WebDriverException: Si Chrome o ChromeDriver no pueden iniciarse.
+    """
+
+    return webdriver.Chrome(service=service or chrome_service(options), options=options)
+
+
+class DriverLease:
+    """Préstamo de un driver del pool.
+
+    Se puede usar como context manager (`with pool.lease() as driver`) o
+    guardarse y liberarse a mano con `release()`.
+
+    Attributes:
+        driver (webdriver.Chrome): Navegador prestado.
+        slot (int): Índice del navegador dentro del pool.
+        acquire_ms (float): Tiempo que tardó en obtenerse el driver.
+    """
+
+    def __init__(self, pool, slot, driver, acquire_ms):
+        self._pool = pool
+        self.slot = slot
+        self.driver = driver
+        self.acquire_ms = acquire_ms
+        self._released = False
+
+    def release(self, discard=False):
+        """Devuelve el driver al pool.
+
+        Args:
+            discard (bool, optional): Si es True el driver se cierra en lugar
+                de reutilizarse (por ejemplo, si quedó en mal estado).
+        """
+
+        if self._released:
+            return
+        self._released = True
+        self._pool._release(self, discard=discard)
+
+    def __enter__(self):
+        return self.driver
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+
+class DriverPool:
+    """Pool de navegadores Chrome precalentados.
+
+    Args:
+        options_factory (Callable[[int], Options]): Construye las opciones
+            para el navegador del slot indicado. Cada slot necesita su propio
+            `--user-data-dir` porque Chrome bloquea el perfil en uso.
+        size (int, optional): Cantidad máxima de navegadores vivos.
+        service_factory (Callable[[], Service], optional): Construye el
+            servicio de ChromeDriver de cada navegador. Por defecto, el de
+            `launch_driver` (ruta cacheada de ChromeDriver).
+        acquire_timeout (float, optional): Segundos máximos esperando a que
+            se libere un navegador cuando el pool está lleno.
+        supervisor (BrowserSupervisor, optional): Plazos duros, reciclado y
+            limpieza de procesos de cada navegador (`common.browser_supervisor`).
+        origins (Iterable[str], optional): Sitios que visita el bot (URLs u
+            orígenes); su storage se borra al devolver cada navegador, además
+            del de la página en la que haya quedado.
+    """
+
+    def __init__(self, options_factory, size=1, service_factory=None, acquire_timeout=120, supervisor=None,
+                 origins=()):
+        if size < 1:
+            raise ValueError("El pool necesita al menos un navegador.")
+
+        self.options_factory = options_factory
+        self.service_factory = service_factory
+        self.size = size
+        self.acquire_timeout = acquire_timeout
+        self.supervisor = supervisor
+        self.origins = {origin for origin in map(_origin, origins) if origin}
+
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._free_slots = list(range(size - 1, -1, -1))
+        self._closed = False
+
+        # Estadísticas
+        self._acquire_times = []
+        self._cold_starts = 0
+        self._cold_start_seconds = 0.0
+        self._resets = 0
+        self._discarded = 0
+
+    # ---------- ARRANQUE ----------
+    def _launch(self, slot):
+        start = time.perf_counter()
+        service = self.service_factory() if self.service_factory is not None else None
+        driver = launch_driver(self.options_factory(slot), service)
+        if self.supervisor is not None:
+            self.supervisor.attach(driver)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._cold_starts += 1
+            self._cold_start_seconds += elapsed
+        return driver
+
+    def _take_slot(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("El pool de navegadores está cerrado.")
+            return self._free_slots.pop() if self._free_slots else None
+
+    def _return_slot(self, slot):
+        with self._lock:
+            self._free_slots.append(slot)
+
+    def warm(self, count=None):
+        """Lanza en paralelo navegadores hasta tener `count` listos.
+
+        Args:
+            count (int, optional): Navegadores a precalentar. Por defecto, el
+                tamaño completo del pool.
+
+        Raises:
+            WebDriverException: Si alguno de los navegadores no pudo iniciarse.
+        """
+
+        count = self.size if count is None else min(count, self.size)
+        errors = []
+
+        def worker(slot):
+            try:
+                self._idle.put((slot, self._launch(slot)))
+            except WebDriverException as e:
+                self._return_slot(slot)
+                errors.append(e)
+
+        threads = []
+        while self._idle.qsize() + len(threads) < count:
+            slot = self._take_slot()
+            if slot is None:
+                break
+            thread = threading.Thread(target=worker, args=(slot,), daemon=True)
+            thread.start()
+            threads.append(thread)
+
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+    # ---------- PRÉSTAMOS ----------
+    def lease(self):
+        """Obtiene un navegador del pool.
+
+        Usa uno caliente si hay disponible; si no, lanza uno nuevo mientras
+        queden slots libres, o espera a que otro préstamo se libere.
+
+        Returns:
+            DriverLease: Préstamo del navegador.
+
+        Raises:
+            TimeoutError: Si no se liberó ningún navegador a tiempo.
+            WebDriverException: Si hubo que lanzar un navegador y falló.
+        """
+
+        start = time.perf_counter()
+        try:
+            slot, driver = self._idle.get_nowait()
+        except queue.Empty:
+            slot = self._take_slot()
+            if slot is not None:
+                try:
+                    driver = self._launch(slot)
+                except WebDriverException:
+                    self._return_slot(slot)
+                    raise
+            else:
+                try:
+                    slot, driver = self._idle.get(timeout=self.acquire_timeout)
+                except queue.Empty:
+                    raise TimeoutError("No se liberó ningún navegador del pool a tiempo.") from None
+
+        acquire_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self._acquire_times.append(acquire_ms)
+        return DriverLease(self, slot, driver, acquire_ms)
+
+    def _release(self, lease, discard=False):
+        driver = lease.driver
+        if not discard and self.supervisor is not None:
+            reason = self.supervisor.recycle_reason(driver)
+            if reason:
+                self.supervisor.recycled(reason)
+                discard = True
+        if not discard and not self._closed:
+            try:
+                reset_driver_state(driver, self.origins)
+                with self._lock:
+                    self._resets += 1
+                self._idle.put((lease.slot, driver))
+                return
+            except WebDriverException:
+                pass  # El navegador quedó inutilizable: se descarta
+
+        with self._lock:
+            self._discarded += 1
+        self._quit(driver)
+        self._return_slot(lease.slot)
+
+    # ---------- CIERRE Y MÉTRICAS ----------
+    def close(self):
+        """Cierra todos los navegadores ociosos y rechaza nuevos préstamos.
+
+        Con supervisor, termina además lo que quede vivo de los navegadores
+        prestados (por ejemplo, los que siguen abiertos por `detach`).
+        """
+
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                _, driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._quit(driver)
+        if self.supervisor is not None:
+            self.supervisor.shutdown()
+
+    def _quit(self, driver):
+        _quit_quietly(driver)
+        if self.supervisor is not None:
+            self.supervisor.detach(driver)
+
+    def stats(self):
+        """Devuelve métricas de uso del pool.
+
+        Returns:
+            dict: Cantidad de préstamos, latencias de adquisición (ms),
+            arranques en frío y navegadores ociosos.
+        """
+
+        with self._lock:
+            times = sorted(self._acquire_times)
+            cold_starts = self._cold_starts
+            cold_seconds = self._cold_start_seconds
+            resets = self._resets
+            discarded = self._discarded
+
+        return {
+            "leases": len(times),
+            "acquire_ms_mean": sum(times) / len(times) if times else 0.0,
+            "acquire_ms_p95": times[int(0.95 * (len(times) - 1))] if times else 0.0,
+            "acquire_ms_max": times[-1] if times else 0.0,
+            "cold_starts": cold_starts,
+            "cold_start_s_total": cold_seconds,
+            "resets": resets,
+            "discarded": discarded,
+            "idle": self._idle.qsize(),
+        }
+
+
+def _origin(url):
+    """Origen (`https://host:puerto`) de una URL http(s), o None para about:, data:, etc."""
+
+    parts = urlsplit(url or "")
+    if parts.scheme not in ("http", "https") or not parts.netloc:
+        return None
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def reset_driver_state(driver, origins=()):
+    """Limpia el estado del navegador entre préstamos.
+
+    Cierra las pestañas extra, borra cookies y el storage (localStorage,
+    IndexedDB, service workers, caché de la página...) de la página actual y
+    de `origins`, y deja la pestaña restante en `about:blank`. La caché HTTP
+    se conserva: es lo que hace más rápida la próxima carga.
+
+    Args:
+        driver (webdriver.Chrome): Navegador a limpiar.
+        origins (Iterable[str], optional): Orígenes extra a limpiar
+            (`https://www.speedtest.net`).
+
+    Raises:
+        WebDriverException: Si el navegador no responde.
+    """
+
+    handles = driver.window_handles
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(handles[0])
+
+    try:
+        driver.execute_script("try { localStorage.clear(); sessionStorage.clear(); } catch (e) {}")
+    except WebDriverException:
+        pass  # Páginas sin storage accesible (about:blank, data:, ...)
+
+    # CDP no acepta comodines: se limpia origen por origen
+    for origin in sorted({_origin(driver.current_url), *origins} - {None}):
+        driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+    driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+    driver.get("about:blank")
+
+
+def _quit_quietly(driver):
+    try:
+        driver.quit()
+    except WebDriverException:
+        pass
+
+
+# ---------- REGISTRO DE POOLS POR PROCESO ----------
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name, options_factory, size=1, **kwargs):
+    """Devuelve el pool registrado con `name`, creándolo si no existe.
+
+    Así cada configuración de navegador (perfil de X, perfil de Instagram)
+    paga el arranque en frío una sola vez por proceso.
+
+    Args:
+        name (str): Identificador del pool.
+        options_factory (Callable[[int], Options]): Ver `DriverPool`.
+        size (int, optional): Ver `DriverPool`.
+        **kwargs: Argumentos extra para `DriverPool`.
+
+    Returns:
+        DriverPool: Pool compartido.
+    """
+
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = DriverPool(options_factory, size=size, **kwargs)
+            _pools[name] = pool
+        return pool
+
+
+@atexit.register
+def close_all_pools():
+    """Cierra todos los pools registrados (se ejecuta al salir del proceso)."""
+
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,304 @@
+"""Resolución cacheada de Chrome y ChromeDriver: los arranques no buscan binarios.
+
+Con `Service()` sin ruta, cada `webdriver.Chrome` ejecuta Selenium Manager
+para encontrar un ChromeDriver compatible: recorre carpetas y, si hace
+falta, consulta la red (lo que sin conexión falla después de un timeout).
+
+`DriverResolver` lo hace una sola vez:
+
+1. Ubica Chrome (rutas habituales de cada sistema o `CHROME_BINARY`) y lee
+   su versión.
+2. Busca un ChromeDriver de la misma versión mayor: primero
+   `CHROMEDRIVER_PATH` o el del `PATH`; si no, Selenium Manager (sin red y,
+   si no alcanza, con red).
+3. Valida la versión del driver y guarda rutas, versiones y huellas
+   (inodo, tamaño y fecha) de ambos binarios en un JSON.
+
+En los arranques siguientes solo se comparan las huellas (un `stat` por
+binario) y las rutas se pasan explícitas a `Service` y a
+`options.binary_location`, así que Selenium Manager no se ejecuta y el
+arranque funciona sin red. Si Chrome se actualizó se vuelve a leer su
+versión, y el driver se resuelve de nuevo solo si la versión cambió.
+
+`SELENIUM_DRIVER_CACHE` cambia la ruta del JSON (`off` desactiva la caché
+y vuelve a `Service()` sin ruta).
+
+Uso típico:
+    service = chrome_service(options)       # Service con ruta explícita; ajusta options.binary_location
+    driver = webdriver.Chrome(service=service, options=options)
+    print(get_resolver().last)              # Resolution(..., source="cache", seconds=0.0002)
+"""
+
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+
+from selenium.webdriver.chrome.service import Service
+
+_cache_home = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+DRIVER_CACHE_PATH = os.getenv("SELENIUM_DRIVER_CACHE", os.path.join(_cache_home, "selenium-bots", "chromedriver.json"))
+
+# Nombres y rutas donde suele estar Chrome en cada sistema
+CHROME_NAMES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+CHROME_PATHS = {
+    "darwin": ("/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+               "/Applications/Chromium.app/Contents/MacOS/Chromium"),
+    "win32": (r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+              r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
+              os.path.expandvars(r"%LOCALAPPDATA%\Google\Chrome\Application\chrome.exe")),
+}
+
+# Versión de cuatro números de `chrome --version` / `chromedriver --version`
+_VERSION_RE = re.compile(r"(\d+)\.(\d+)\.(\d+)\.(\d+)")
+
+# Segundos máximos para `--version`
+VERSION_TIMEOUT = 15
+
+
+class DriverResolutionError(RuntimeError):
+    """No se encontró un ChromeDriver compatible con el Chrome instalado."""
+
+
+@dataclass
+class Resolution:
+    """Binarios resueltos.
+
+    Attributes:
+        chrome_path (str): Ejecutable de Chrome.
+        chrome_version (str | None): Versión de Chrome (None si no se pudo leer, por ejemplo en Windows).
+        driver_path (str): Ejecutable de ChromeDriver.
+        driver_version (str): Versión de ChromeDriver.
+        source (str): `cache`, `path` (CHROMEDRIVER_PATH o el PATH) o `selenium-manager`.
+        seconds (float): Lo que tardó la resolución en este proceso.
+    """
+
+    chrome_path: str
+    chrome_version: str
+    driver_path: str
+    driver_version: str
+    source: str
+    seconds: float = 0.0
+
+
+def _fingerprint(path):
+    """Huella barata de un binario: cambia si se reemplaza (actualización) o se borra."""
+
+    try:
+        st = os.stat(os.path.realpath(path))
+    except OSError:
+        return None
+    return [st.st_ino, st.st_size, st.st_mtime_ns]
+
+
+def _major(version):
+    return version.split(".", 1)[0] if version else None
+
+
+def read_version(binary):
+    """Versión (`"131.0.6778.85"`) que informa `binary --version`, o None si no se pudo leer."""
+
+    try:
+        output = subprocess.run([binary, "--version"], capture_output=True, text=True, timeout=VERSION_TIMEOUT).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = _VERSION_RE.search(output)
+    return match.group(0) if match else None
+
+
+def find_chrome():
+    """Ruta del ejecutable de Chrome (`CHROME_BINARY` o las ubicaciones habituales), o None."""
+
+    explicit = os.getenv("CHROME_BINARY")
+    if explicit:
+        return explicit if os.path.isfile(explicit) else None
+    for name in CHROME_NAMES:
+        path = shutil.which(name)
+        if path:
+            return path
+    for path in CHROME_PATHS.get(sys.platform, ()):
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+class DriverResolver:
+    """Resuelve Chrome y ChromeDriver una vez y lo recuerda entre procesos.
+
+    Args:
+        cache_path (str, optional): JSON con la última resolución.
+
+    Attributes:
+        last (Resolution | None): Resultado de la última llamada a `resolve()`.
+    """
+
+    def __init__(self, cache_path=DRIVER_CACHE_PATH):
+        self.cache_path = cache_path
+        self.last = None
+        self.failed = None  # Motivo si la resolución ya falló en este proceso (no se reintenta en cada arranque)
+        self._lock = threading.Lock()
+
+    def resolve(self, force=False):
+        """Devuelve los binarios a usar, desde la caché si sigue siendo válida.
+
+        Args:
+            force (bool, optional): Ignora la caché y resuelve de nuevo.
+
+        Returns:
+            Resolution: Rutas y versiones, con `source` y `seconds` de esta llamada.
+
+        Raises:
+            DriverResolutionError: Si no hay Chrome o ningún ChromeDriver coincide con su versión.
+        """
+
+        with self._lock:
+            start = time.perf_counter()
+            cached = None if force else self._load()
+            resolution = self._from_cache(cached) if cached else None
+            if resolution is None:
+                resolution = self._resolve()
+            resolution.seconds = time.perf_counter() - start
+            if resolution.source != "cache":
+                print(f"🔎 ChromeDriver {resolution.driver_version} para Chrome {resolution.chrome_version or '?'} "
+                      f"resuelto en {resolution.seconds:.2f} s ({resolution.source}): {resolution.driver_path}")
+            self.last = resolution
+            return resolution
+
+    # ---------- CACHÉ ----------
+    def _load(self):
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, resolution, chrome_fp, driver_fp):
+        data = asdict(resolution)
+        del data["source"], data["seconds"]
+        data.update(chrome_fingerprint=chrome_fp, driver_fingerprint=driver_fp, resolved_at=time.time())
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        tmp = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, self.cache_path)
+
+    def _from_cache(self, cached):
+        """Resolución de la caché si los binarios siguen ahí y Chrome no cambió de versión."""
+
+        try:
+            chrome_path, driver_path = cached["chrome_path"], cached["driver_path"]
+        except (KeyError, TypeError):
+            return None
+        if os.getenv("CHROME_BINARY") and os.getenv("CHROME_BINARY") != chrome_path:
+            return None
+        driver_fp = _fingerprint(driver_path)
+        if driver_fp is None or driver_fp != cached.get("driver_fingerprint"):
+            return None
+        chrome_fp = _fingerprint(chrome_path)
+        if chrome_fp is None:
+            return None
+        if chrome_fp != cached.get("chrome_fingerprint"):
+            # Chrome se reemplazó (actualización): solo invalida si cambió la versión
+            version = read_version(chrome_path)
+            if version is None or version != cached.get("chrome_version"):
+                return None
+            self._save(Resolution(chrome_path, version, driver_path, cached.get("driver_version"), "cache"),
+                       chrome_fp, driver_fp)
+        return Resolution(chrome_path, cached.get("chrome_version"), driver_path, cached.get("driver_version"), "cache")
+
+    # ---------- RESOLUCIÓN ----------
+    def _resolve(self):
+        chrome_path = find_chrome()
+        if chrome_path is None:
+            raise DriverResolutionError("No se encontró Chrome. Se puede indicar con CHROME_BINARY.")
+        chrome_version = read_version(chrome_path)
+
+        candidates = []
+        explicit = os.getenv("CHROMEDRIVER_PATH")
+        if explicit:
+            candidates.append(("path", explicit))
+        elif shutil.which("chromedriver"):
+            candidates.append(("path", shutil.which("chromedriver")))
+        candidates.append(("selenium-manager", None))
+
+        errors = []
+        for source, driver_path in candidates:
+            if driver_path is None:
+                try:
+                    driver_path = self._selenium_manager(chrome_path)
+                except Exception as e:  # Selenium Manager informa sus fallos con varios tipos de error
+                    errors.append(f"selenium-manager: {e}")
+                    continue
+            driver_version = read_version(driver_path)
+            if driver_version is None:
+                errors.append(f"{driver_path}: no informa su versión")
+                continue
+            if chrome_version is not None and _major(driver_version) != _major(chrome_version):
+                errors.append(f"{driver_path}: ChromeDriver {driver_version} no sirve para Chrome {chrome_version}")
+                continue
+            resolution = Resolution(chrome_path, chrome_version, driver_path, driver_version, source)
+            self._save(resolution, _fingerprint(chrome_path), _fingerprint(driver_path))
+            return resolution
+
+        raise DriverResolutionError("No se encontró un ChromeDriver compatible. " + "; ".join(errors))
+
+    @staticmethod
+    def _selenium_manager(chrome_path):
+        """Ruta de ChromeDriver según Selenium Manager: primero sin red (su caché), después con red."""
+
+        from selenium.webdriver.common.selenium_manager import SeleniumManager
+
+        args = ["--browser", "chrome", "--browser-path", chrome_path]
+        try:
+            return SeleniumManager().binary_paths(args + ["--offline"])["driver_path"]
+        except Exception:
+            return SeleniumManager().binary_paths(args)["driver_path"]
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_resolver():
+    """Devuelve el `DriverResolver` del proceso, o None si `SELENIUM_DRIVER_CACHE=off`."""
+
+    global _resolver
+    if DRIVER_CACHE_PATH.lower() in ("", "0", "off"):
+        return None
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = DriverResolver()
+        return _resolver
+
+
+def chrome_service(options=None):
+    """`Service` de ChromeDriver con la ruta resuelta (y cacheada).
+
+    Si se pasan las `options`, también fija `options.binary_location` (salvo que ya tenga una)
+    para que Chrome tampoco se busque en cada arranque. Si la resolución falla, vuelve a
+    `Service()` sin ruta: Selenium Manager decide como antes.
+
+    Args:
+        options (Options, optional): Opciones del navegador a lanzar.
+
+    Returns:
+        Service: Servicio listo para `webdriver.Chrome`.
+    """
+
+    resolver = get_resolver()
+    if resolver is None or resolver.failed:
+        return Service()
+    try:
+        resolution = resolver.resolve()
+    except DriverResolutionError as e:
+        resolver.failed = str(e)
+        print(f"⚠️ {e} Se usa Selenium Manager.")
+        return Service()
+    if options is not None and not options.binary_location:
+        options.binary_location = resolution.chrome_path
+    return Service(executable_path=resolution.driver_path)
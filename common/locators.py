@@ -0,0 +1,243 @@
+"""Localizadores multi-idioma con una sola consulta y caché que aprende.
+
+Un mismo botón cambia de texto según el idioma de la interfaz ("Not now",
+"Ahora no", "Agora não", ...). Probar cada variante con su propio
+`WebDriverWait` cuesta un timeout completo por cada variante que no está
+en pantalla. Acá, en cambio:
+
+- `LocatorGroup` declara todas las variantes de un elemento con una
+  plantilla XPath común.
+- `Locator.find()` prueba todas las variantes dentro del navegador, en un
+  único `execute_async_script` que sondea el DOM hasta un plazo total corto.
+- `LocatorCache` recuerda (en un JSON) qué variante coincidió la última vez
+  y con qué tasa de acierto; esa variante se prueba primero en la próxima
+  ejecución.
+
+Uso típico:
+    NOT_NOW = LocatorGroup("not_now", ("Not now", "Ahora no"), "//button[contains(., '{text}')]")
+    locator = Locator(driver, LocatorCache("locators.json"), timeout=4)
+    if locator.click(NOT_NOW):
+        ...
+    locator.cache.save()
+"""
+
+import json
+import os
+import threading
+from dataclasses import dataclass
+
+from selenium.common.exceptions import WebDriverException
+
+
+@dataclass(frozen=True)
+class LocatorGroup:
+    """Variantes de un mismo elemento.
+
+    Attributes:
+        name (str): Nombre del grupo (clave en la caché).
+        variants (tuple[str]): Textos posibles del elemento.
+        template (str): XPath con `{text}` donde va cada variante.
+    """
+
+    name: str
+    variants: tuple
+    template: str = "//button[contains(., '{text}')]"
+
+    def xpath(self, variant):
+        """Devuelve el XPath de una variante."""
+
+        return self.template.format(text=variant)
+
+
+# Evalúa todas las variantes en orden y sondea hasta encontrar un elemento visible
+# o agotar el plazo. Devuelve `{index, element}` o `{index: -1}`.
+_FIND_FIRST_JS = """
+const [xpaths, timeoutMs, pollMs, done] = [arguments[0], arguments[1], arguments[2], arguments[arguments.length - 1]];
+const visible = (el) => el.getClientRects().length > 0 && getComputedStyle(el).visibility !== 'hidden';
+const probe = () => {
+    for (let i = 0; i < xpaths.length; i++) {
+        const snap = document.evaluate(xpaths[i], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        for (let j = 0; j < snap.snapshotLength; j++) {
+            if (visible(snap.snapshotItem(j))) { return { index: i, element: snap.snapshotItem(j) }; }
+        }
+    }
+    return null;
+};
+const deadline = performance.now() + timeoutMs;
+const tick = () => {
+    const found = probe();
+    if (found) { done(found); }
+    else if (performance.now() >= deadline) { done({ index: -1 }); }
+    else { setTimeout(tick, pollMs); }
+};
+tick();
+"""
+
+
+class LocatorCache:
+    """Caché persistente de la variante que coincidió en cada grupo.
+
+    Por grupo guarda la última variante encontrada, cuántas búsquedas hubo,
+    cuántas encontraron algo, cuántas acertaron con la primera variante
+    probada (la de la caché) y los aciertos por variante.
+
+    Args:
+        path (str | None): Archivo JSON. Con None la caché vive solo en memoria.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._groups = {}
+        self._dirty = False
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self._groups = json.load(f)
+            except (OSError, ValueError):
+                self._groups = {}
+
+    def _entry(self, name):
+        return self._groups.setdefault(
+            name, {"last": None, "lookups": 0, "found": 0, "first_try": 0, "variants": {}}
+        )
+
+    def order(self, name, variants):
+        """Ordena las variantes poniendo primero la última que coincidió.
+
+        Args:
+            name (str): Nombre del grupo.
+            variants (Iterable[str]): Variantes en el orden declarado.
+
+        Returns:
+            list[str]: Variantes reordenadas.
+        """
+
+        variants = list(variants)
+        with self._lock:
+            last = self._groups.get(name, {}).get("last")
+        if last in variants:
+            variants.remove(last)
+            variants.insert(0, last)
+        return variants
+
+    def record(self, name, variant, first_try=False):
+        """Registra el resultado de una búsqueda.
+
+        Args:
+            name (str): Nombre del grupo.
+            variant (str | None): Variante encontrada, o None si no apareció ninguna.
+            first_try (bool, optional): Si coincidió la primera variante probada.
+        """
+
+        with self._lock:
+            entry = self._entry(name)
+            entry["lookups"] += 1
+            if variant is not None:
+                entry["found"] += 1
+                entry["last"] = variant
+                entry["variants"][variant] = entry["variants"].get(variant, 0) + 1
+                if first_try:
+                    entry["first_try"] += 1
+            self._dirty = True
+
+    def hit_rate(self, name):
+        """Proporción de búsquedas exitosas resueltas con la primera variante probada.
+
+        Returns:
+            float | None: Tasa de acierto, o None si el grupo nunca encontró nada.
+        """
+
+        with self._lock:
+            entry = self._groups.get(name)
+            if not entry or not entry["found"]:
+                return None
+            return entry["first_try"] / entry["found"]
+
+    def snapshot(self):
+        """Copia del estado de todos los grupos (incluye `hit_rate`)."""
+
+        with self._lock:
+            groups = json.loads(json.dumps(self._groups))
+        for name, entry in groups.items():
+            entry["hit_rate"] = entry["first_try"] / entry["found"] if entry["found"] else None
+        return groups
+
+    def save(self):
+        """Escribe la caché en disco (de forma atómica) si hubo cambios."""
+
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            data = json.dumps(self._groups, ensure_ascii=False, indent=2)
+            self._dirty = False
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+
+class Locator:
+    """Busca grupos de variantes con una consulta combinada por grupo.
+
+    Args:
+        driver (webdriver.Chrome): Navegador.
+        cache (LocatorCache, optional): Caché de variantes (por defecto, solo en memoria).
+        timeout (float, optional): Plazo total por búsqueda, para todas las variantes juntas.
+        poll_interval (float, optional): Intervalo entre sondeos dentro del navegador.
+    """
+
+    def __init__(self, driver, cache=None, timeout=4, poll_interval=0.1):
+        self.driver = driver
+        self.cache = cache or LocatorCache()
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._script_timeout = None
+
+    def find(self, group, timeout=None):
+        """Devuelve el primer elemento visible del grupo.
+
+        Args:
+            group (LocatorGroup): Grupo a buscar.
+            timeout (float, optional): Plazo total (por defecto `self.timeout`).
+
+        Returns:
+            tuple[WebElement | None, str | None]: Elemento y variante que coincidió,
+            o `(None, None)` si no apareció ninguna dentro del plazo.
+        """
+
+        timeout = self.timeout if timeout is None else timeout
+        variants = self.cache.order(group.name, group.variants)
+        xpaths = [group.xpath(v) for v in variants]
+
+        # El timeout de scripts asíncronos tiene que cubrir el plazo del sondeo
+        if self._script_timeout != timeout + 5:
+            self.driver.set_script_timeout(timeout + 5)
+            self._script_timeout = timeout + 5
+
+        try:
+            result = self.driver.execute_async_script(
+                _FIND_FIRST_JS, xpaths, int(timeout * 1000), int(self.poll_interval * 1000)
+            )
+        except WebDriverException:
+            result = None  # Página navegando a mitad del sondeo: se toma como "no encontrado"
+
+        index = result["index"] if result else -1
+        if index < 0:
+            self.cache.record(group.name, None)
+            return None, None
+        self.cache.record(group.name, variants[index], first_try=index == 0)
+        return result["element"], variants[index]
+
+    def click(self, group, timeout=None):
+        """Busca el grupo y hace click en el elemento encontrado.
+
+        Returns:
+            str | None: Variante clickeada, o None si no apareció ninguna.
+        """
+
+        element, variant = self.find(group, timeout)
+        if element is None:
+            return None
+        element.click()
+        return variant
@@ -0,0 +1,206 @@
+"""Modo "medición": perfil de navegador liviano para pruebas de velocidad.
+
+La página de Speedtest.net carga publicidad, trackers, fuentes e imágenes.
+Ese tráfico compite con el ancho de banda que se está midiendo. En este modo
+el navegador corre headless, con la estrategia de carga `eager`, bloquea por
+CDP los recursos pesados y contabiliza los bytes descargados que no forman
+parte del test.
+
+Uso típico:
+    config = MeasurementModeConfig()
+    options = apply_measurement_mode(build_chrome_options(), config)
+    ...
+    enable_request_blocking(driver, config)
+    traffic = TrafficMeter(driver, config.test_url_patterns)
+    traffic.reset()
+    # ... correr el test ...
+    print(traffic.collect()["overhead_bytes"])
+"""
+
+from dataclasses import dataclass, field
+from fnmatch import fnmatch
+
+from common.cdp_log import get_event_log
+
+
+# Patrones de URL (comodín `*`, como `Network.setBlockedURLs`) por tipo de recurso.
+# CDP solo permite bloquear por tipo interceptando cada request con el dominio
+# `Fetch`, lo que exige un loop de eventos; con patrones alcanza un único comando.
+RESOURCE_TYPE_PATTERNS = {
+    "Image": ["*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.svg*", "*.ico*", "*.avif*"],
+    "Font": ["*.woff*", "*.woff2*", "*.ttf*", "*.otf*", "*.eot*"],
+    "Media": ["*.mp4*", "*.webm*", "*.mp3*", "*.ogg*", "*.m3u8*"],
+    "Stylesheet": ["*.css*"],
+}
+
+# Publicidad y trackers habituales en Speedtest.net
+DEFAULT_BLOCKED_URL_PATTERNS = [
+    "*doubleclick.net*",
+    "*googlesyndication.com*",
+    "*googletagmanager.com*",
+    "*google-analytics.com*",
+    "*adservice.google.*",
+    "*amazon-adsystem.com*",
+    "*scorecardresearch.com*",
+    "*facebook.net*",
+    "*criteo.*",
+    "*pubmatic.com*",
+    "*rubiconproject.com*",
+    "*adnxs.com*",
+    "*taboola.com*",
+    "*outbrain.com*",
+]
+
+# Tráfico que sí forma parte de la prueba (servidores de Ookla)
+DEFAULT_TEST_URL_PATTERNS = [
+    "*/download?*",
+    "*/upload?*",
+    "*/hello*",
+    "*/ping*",
+    "*.speedtest.net:8080/*",
+]
+
+
+@dataclass
+class MeasurementModeConfig:
+    """Configuración del modo medición.
+
+    Attributes:
+        headless (bool): Ejecuta Chrome sin ventana.
+        blocked_resource_types (list[str]): Tipos de recurso a bloquear (claves de
+            `RESOURCE_TYPE_PATTERNS`).
+        blocked_url_patterns (list[str]): Patrones de URL adicionales a bloquear.
+        test_url_patterns (list[str]): Patrones de URL que cuentan como tráfico del test.
+    """
+
+    headless: bool = True
+    blocked_resource_types: list = field(default_factory=lambda: ["Image", "Font", "Media"])
+    blocked_url_patterns: list = field(default_factory=lambda: list(DEFAULT_BLOCKED_URL_PATTERNS))
+    test_url_patterns: list = field(default_factory=lambda: list(DEFAULT_TEST_URL_PATTERNS))
+
+    def blocked_patterns(self):
+        """Devuelve todos los patrones de URL a bloquear (por tipo y explícitos)."""
+
+        patterns = []
+        for resource_type in self.blocked_resource_types:
+            try:
+                patterns.extend(RESOURCE_TYPE_PATTERNS[resource_type])
+            except KeyError:
+                raise ValueError(f"Tipo de recurso desconocido: {resource_type}") from None
+        patterns.extend(self.blocked_url_patterns)
+        return patterns
+
+
+def apply_measurement_mode(options, config=None):
+    """Ajusta unas `Options` existentes para el modo medición.
+
+    Args:
+        options (Options): Opciones base (por ejemplo de `build_chrome_options`).
+        config (MeasurementModeConfig, optional): Configuración del modo.
+
+    Returns:
+        Options: Las mismas opciones, modificadas.
+    """
+
+    config = config or MeasurementModeConfig()
+    if config.headless:
+        options.add_argument("--headless=new")
+        options.add_argument("--window-size=1920,1080")
+
+    # No espera imágenes ni subrecursos: alcanza con el DOM listo
+    options.page_load_strategy = "eager"
+
+    # Habilita el log "performance", que expone los eventos Network.* de CDP
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return options
+
+
+def enable_request_blocking(driver, config=None):
+    """Activa el bloqueo de recursos por CDP en la pestaña actual.
+
+    Args:
+        driver (webdriver.Chrome): Navegador en modo medición.
+        config (MeasurementModeConfig, optional): Configuración del modo.
+    """
+
+    config = config or MeasurementModeConfig()
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": config.blocked_patterns()})
+
+
+class TrafficMeter:
+    """Cuenta los bytes que el navegador descargó fuera de la prueba.
+
+    Escucha los eventos `Network.*` del log "performance" de ChromeDriver (a
+    través de `CdpEventLog`), por lo que requiere que las opciones se hayan
+    creado con `apply_measurement_mode`.
+
+    El navegador vuelve al pool con su `CdpEventLog`: al terminar de usarlo hay que llamar a
+    `close()` para que el contador deje de recibir sus eventos.
+
+    Args:
+        driver (webdriver.Chrome): Navegador a observar.
+        test_url_patterns (list[str], optional): Patrones de URL del tráfico propio del test.
+    """
+
+    def __init__(self, driver, test_url_patterns=None):
+        self.driver = driver
+        self.test_url_patterns = list(test_url_patterns or DEFAULT_TEST_URL_PATTERNS)
+        self._log = get_event_log(driver)
+        self._log.subscribe(self._on_event)
+        self._urls = {}
+        self._summary = self._empty_summary()
+
+    @staticmethod
+    def _empty_summary():
+        return {
+            "overhead_bytes": 0,
+            "test_bytes": 0,
+            "overhead_requests": 0,
+            "test_requests": 0,
+            "blocked_requests": 0,
+        }
+
+    def reset(self):
+        """Descarta los eventos acumulados hasta ahora."""
+
+        self._log.poll()
+        self._urls.clear()
+        self._summary = self._empty_summary()
+
+    def _is_test_url(self, url):
+        return any(fnmatch(url, pattern) for pattern in self.test_url_patterns)
+
+    def _on_event(self, method, params):
+        summary = self._summary
+        if method == "Network.requestWillBeSent":
+            self._urls[params["requestId"]] = params["request"]["url"]
+        elif method == "Network.webSocketCreated":
+            self._urls[params["requestId"]] = params["url"]
+        elif method == "Network.loadingFailed" and params.get("blockedReason"):
+            summary["blocked_requests"] += 1
+        elif method == "Network.loadingFinished":
+            url = self._urls.pop(params["requestId"], "")
+            size = int(params.get("encodedDataLength", 0))
+            if self._is_test_url(url):
+                summary["test_bytes"] += size
+                summary["test_requests"] += 1
+            else:
+                summary["overhead_bytes"] += size
+                summary["overhead_requests"] += 1
+
+    def collect(self):
+        """Procesa los eventos pendientes y devuelve el resumen de tráfico desde `reset()`.
+
+        Returns:
+            dict: `overhead_bytes` (fuera del test), `test_bytes`, `overhead_requests`,
+            `blocked_requests` y `test_requests`.
+        """
+
+        self._log.poll()
+        return dict(self._summary)
+
+    def close(self):
+        """Deja de escuchar los eventos del navegador (se puede llamar más de una vez)."""
+
+        self._log.unsubscribe(self._on_event)
@@ -0,0 +1,110 @@
+"""Muestreo de memoria y tamaño del DOM de una página durante sesiones largas.
+
+`PageMetricsSampler.sample()` toma en un momento dado:
+
+- `JSHeapUsedSize` / `JSHeapTotalSize`, `Nodes` y `JSEventListeners` de
+  CDP `Performance.getMetrics` (si CDP no está disponible se usa
+  `performance.memory` y el conteo de elementos del documento);
+- la latencia de una consulta de referencia (por defecto, los botones del
+  diálogo abierto) medida dentro del navegador, para ver si las búsquedas
+  se vuelven más lentas a medida que crece el DOM.
+
+Uso típico:
+    sampler = PageMetricsSampler(driver)
+    for _ in range(n):
+        ...
+        sampler.sample("tanda")
+    print(sampler.summary())
+"""
+
+import time
+
+from selenium.common.exceptions import WebDriverException
+
+# Métricas de `Performance.getMetrics` que se conservan
+_CDP_METRICS = {
+    "JSHeapUsedSize": "js_heap_used",
+    "JSHeapTotalSize": "js_heap_total",
+    "Nodes": "dom_nodes",
+    "JSEventListeners": "event_listeners",
+}
+
+# Consulta de referencia que hacía el loop de follow original
+DEFAULT_PROBE_XPATH = "//div[@role='dialog']//button"
+
+# Mide la consulta de referencia y, sin CDP, también devuelve memoria y nodos
+_PROBE_JS = """
+const [xpath, withFallback] = [arguments[0], arguments[1]];
+const start = performance.now();
+const count = document.evaluate(xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null).snapshotLength;
+const result = { query_ms: performance.now() - start, query_matches: count };
+if (withFallback) {
+    result.dom_nodes = document.getElementsByTagName('*').length;
+    if (performance.memory) {
+        result.js_heap_used = performance.memory.usedJSHeapSize;
+        result.js_heap_total = performance.memory.totalJSHeapSize;
+    }
+}
+return result;
+"""
+
+
+class PageMetricsSampler:
+    """Toma muestras de heap JS, nodos del DOM y latencia de una consulta.
+
+    Args:
+        driver (webdriver.Chrome): Navegador a observar.
+        probe_xpath (str, optional): Consulta cuya latencia se mide en cada muestra.
+
+    Attributes:
+        samples (list[dict]): Muestras con `ts` (monotónico), `label` y las métricas disponibles.
+        cdp (bool): Si las métricas vienen de CDP (`Performance.getMetrics`).
+    """
+
+    def __init__(self, driver, probe_xpath=DEFAULT_PROBE_XPATH):
+        self.driver = driver
+        self.probe_xpath = probe_xpath
+        self.samples = []
+        try:
+            driver.execute_cdp_cmd("Performance.enable", {})
+            self.cdp = True
+        except (AttributeError, WebDriverException):
+            self.cdp = False
+
+    def sample(self, label=None):
+        """Toma una muestra y la agrega a `samples`.
+
+        Args:
+            label (str, optional): Etiqueta de la muestra (por ejemplo, el número de tanda).
+
+        Returns:
+            dict: Muestra tomada.
+        """
+
+        sample = {"ts": time.monotonic(), "label": label}
+        if self.cdp:
+            try:
+                metrics = self.driver.execute_cdp_cmd("Performance.getMetrics", {})["metrics"]
+                for metric in metrics:
+                    key = _CDP_METRICS.get(metric["name"])
+                    if key:
+                        sample[key] = metric["value"]
+            except WebDriverException:
+                self.cdp = False
+        sample.update(self.driver.execute_script(_PROBE_JS, self.probe_xpath, not self.cdp))
+        self.samples.append(sample)
+        return sample
+
+    def summary(self):
+        """Primer valor, último valor y máximo de cada métrica muestreada.
+
+        Returns:
+            dict: `{"samples", "source", métrica: {"first", "last", "max"}}`.
+        """
+
+        summary = {"samples": len(self.samples), "source": "cdp" if self.cdp else "js"}
+        for key in ("js_heap_used", "js_heap_total", "dom_nodes", "event_listeners", "query_ms", "query_matches"):
+            values = [s[key] for s in self.samples if s.get(key) is not None]
+            if values:
+                summary[key] = {"first": values[0], "last": values[-1], "max": max(values)}
+        return summary
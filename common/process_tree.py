@@ -0,0 +1,194 @@
+"""Memoria residente (RSS) de un proceso y todos sus descendientes.
+
+Chrome reparte su trabajo en muchos procesos (browser, renderers, GPU,
+utility), todos hijos de ChromeDriver. Para saber cuánto ocupa un
+navegador hay que sumar el árbol completo que cuelga de
+`driver.service.process`.
+
+También permite reconocer un proceso aunque su pid se haya reutilizado
+(`process_identity`) y terminar un árbol completo (`kill_tree`), que usa
+`common.browser_supervisor` para limpiar navegadores colgados o huérfanos.
+
+Usa `psutil` si está instalado; si no, lee `/proc` directamente (Linux).
+
+Uso típico:
+    rss = tree_rss(driver.service.process.pid)
+    print(f"Chrome: {rss / 1e6:.0f} MB")
+"""
+
+import os
+import signal
+import time
+
+try:
+    import psutil                                                        # Opcional: más rápido y portable
+except ImportError:
+    psutil = None
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _proc_parents():
+    """Devuelve `{pid: ppid}` de todos los procesos visibles en `/proc`."""
+
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                stat = f.read()
+        except OSError:
+            continue  # El proceso terminó mientras se recorría /proc
+        # El nombre del comando va entre paréntesis y puede contener espacios
+        fields = stat[stat.rfind(b")") + 2:].split()
+        parents[int(entry)] = int(fields[1])
+    return parents
+
+
+def _proc_stat(pid):
+    """Devuelve `(nombre, estado, ppid, inicio)` leídos de `/proc/<pid>/stat`, o None."""
+
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    name = stat[stat.find(b"(") + 1:stat.rfind(b")")].decode("utf-8", "replace")
+    fields = stat[stat.rfind(b")") + 2:].split()
+    # Campos 3 (estado), 4 (ppid) y 22 (inicio en ticks desde el arranque) de proc(5)
+    return name, fields[0].decode(), int(fields[1]), int(fields[19])
+
+
+def _proc_rss(pid):
+    try:
+        with open(f"/proc/{pid}/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def descendants(pid):
+    """Devuelve los pids de todos los descendientes de `pid` (sin incluirlo).
+
+    Args:
+        pid (int): Proceso raíz.
+
+    Returns:
+        list[int]: Pids descendientes (vacío si el proceso ya no existe).
+    """
+
+    if psutil is not None:
+        try:
+            return [child.pid for child in psutil.Process(pid).children(recursive=True)]
+        except psutil.Error:
+            return []
+
+    children = {}
+    for child, parent in _proc_parents().items():
+        children.setdefault(parent, []).append(child)
+    found, pending = [], list(children.get(pid, ()))
+    while pending:
+        child = pending.pop()
+        found.append(child)
+        pending.extend(children.get(child, ()))
+    return found
+
+
+def process_rss(pid):
+    """RSS en bytes de un único proceso (0 si ya no existe)."""
+
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except psutil.Error:
+            return 0
+    return _proc_rss(pid)
+
+
+def tree_rss(pid, include_root=True):
+    """Suma la RSS (bytes) de `pid` y de todos sus descendientes.
+
+    Args:
+        pid (int): Proceso raíz (por ejemplo, el de ChromeDriver).
+        include_root (bool, optional): Si se cuenta también el propio `pid`.
+
+    Returns:
+        int: Bytes residentes del árbol.
+    """
+
+    pids = descendants(pid)
+    if include_root:
+        pids.append(pid)
+    return sum(process_rss(p) for p in pids)
+
+
+def process_identity(pid):
+    """Nombre e instante de inicio de un proceso, para reconocerlo aunque su pid se reutilice.
+
+    Args:
+        pid (int): Proceso.
+
+    Returns:
+        tuple[str, float] | None: `(nombre, inicio)`, o None si el proceso ya no existe.
+        El inicio solo es comparable entre llamadas de la misma máquina.
+    """
+
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            return process.name(), process.create_time()
+        except psutil.Error:
+            return None
+    stat = _proc_stat(pid)
+    return (stat[0], float(stat[3])) if stat else None
+
+
+def is_alive(pid):
+    """Indica si el proceso existe y no es un zombie."""
+
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).status() != psutil.STATUS_ZOMBIE
+        except psutil.Error:
+            return False
+    stat = _proc_stat(pid)
+    return stat is not None and stat[1] != "Z"
+
+
+def kill_tree(pid, include_root=True, grace=3.0):
+    """Termina un proceso y todos sus descendientes (SIGTERM y, si no alcanza, SIGKILL).
+
+    Args:
+        pid (int): Proceso raíz.
+        include_root (bool, optional): Si se termina también el propio `pid`.
+        grace (float, optional): Segundos de espera entre SIGTERM y SIGKILL.
+
+    Returns:
+        int: Procesos a los que se envió alguna señal.
+    """
+
+    # Los descendientes se toman antes de matar a nadie: al morir el padre quedarían huérfanos
+    pids = descendants(pid)
+    if include_root:
+        pids.append(pid)
+
+    signaled = 0
+    for target in pids:
+        try:
+            os.kill(target, signal.SIGTERM)
+            signaled += 1
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    deadline = time.monotonic() + grace
+    pending = [p for p in pids if is_alive(p)]
+    while pending and time.monotonic() < deadline:
+        time.sleep(0.05)
+        pending = [p for p in pending if is_alive(p)]
+    for target in pending:
+        try:
+            os.kill(target, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+    return signaled
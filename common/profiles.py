@@ -0,0 +1,368 @@
+"""Perfiles de Chrome administrados: perfil base mínimo, clones por ejecución y poda de cachés.
+
+Un `--user-data-dir` fijo acumula caché, historial y datos de service
+workers, y Chrome tarda más en arrancar a medida que crece. `ProfileManager`
+ofrece dos modos por bot:
+
+- **clone** (por defecto): arma una sola vez un perfil base ("golden")
+  mínimo y, en cada arranque de un navegador del pool, lo clona en una
+  carpeta efímera (`/dev/shm` si existe, o sea RAM; si no, la carpeta
+  temporal). Los archivos que Chrome reemplaza de forma atómica se clonan
+  con hardlinks; el resto con copy-on-write (`FICLONE`, btrfs/xfs) o, si no
+  se puede, con una copia. Cada navegador arranca siempre del mismo perfil
+  chico y sus clones se borran al cerrar el proceso (y los de procesos que
+  ya no existen, al arrancar el siguiente).
+- **persistent**: la carpeta de siempre (por ejemplo `chrome_profile_xbot`),
+  con poda periódica de cachés e historial antes de lanzar el navegador.
+
+Configuración por bot (prefijo `XBOT`, `INSTAGRAM`, ...):
+    <PREFIX>_PROFILE_MODE         clone | persistent (por defecto clone)
+    <PREFIX>_PROFILE_RUNTIME      Carpeta de los clones (por defecto /dev/shm o la temporal)
+    <PREFIX>_PROFILE_PRUNE_HOURS  Horas entre podas del perfil persistente (por defecto 24)
+
+Uso típico:
+    profiles = get_profiles("xbot", "XBOT", persistent_dir="chrome_profile_xbot")
+    options = build_chrome_options(user_data_dir=profiles.prepare(slot))
+    print(profiles.stats())    # tamaño del perfil, tiempo de clonado y método
+"""
+
+import atexit
+import errno
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl                                                         # Copy-on-write con FICLONE (Linux)
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+from common.process_tree import is_alive
+
+PROFILE_MODES = ("clone", "persistent")
+
+# Versión del perfil base: si cambia, se vuelve a armar
+GOLDEN_VERSION = 1
+
+# ioctl FICLONE de Linux (copy-on-write de un archivo completo)
+_FICLONE = 0x40049409
+
+# Archivos que Chrome reescribe a un temporal y renombra: compartirlos con hardlinks es seguro
+ATOMIC_FILES = {"Local State", "Preferences", "Secure Preferences", "First Run"}
+
+# Carpetas y archivos que se podan del perfil persistente (relativos al perfil o a `Default/`)
+PRUNE_ROOT = ("GrShaderCache", "ShaderCache", "GraphiteDawnCache", "Crashpad", "component_crx_cache",
+              "optimization_guide_model_store", "segmentation_platform", "BrowserMetrics")
+PRUNE_PROFILE = ("Cache", "Code Cache", "GPUCache", "DawnCache", "DawnGraphiteCache",
+                 "Service Worker/CacheStorage", "Service Worker/ScriptCache",
+                 "History", "History-journal", "Visited Links", "Top Sites", "Top Sites-journal",
+                 "Favicons", "Favicons-journal", "Network Action Predictor", "Shortcuts")
+
+
+def dir_size(path):
+    """Bytes ocupados por una carpeta (recursivo, sin seguir symlinks)."""
+
+    total = 0
+    try:
+        entries = list(os.scandir(path))
+    except OSError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                total += dir_size(entry.path)
+            else:
+                total += entry.stat(follow_symlinks=False).st_size
+        except OSError:
+            pass
+    return total
+
+
+def _default_runtime_root():
+    shm = "/dev/shm"
+    if os.path.isdir(shm) and os.access(shm, os.W_OK):
+        return shm
+    return tempfile.gettempdir()
+
+
+def _remove(path):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+class ProfileManager:
+    """Perfil de Chrome de un bot: base + clones efímeros, o carpeta persistente podada.
+
+    Args:
+        name (str): Nombre del perfil (prefijo de las carpetas).
+        persistent_dir (str): Carpeta del perfil persistente. El perfil base se arma a su lado
+            (`<persistent_dir>_golden`).
+        mode (str, optional): `clone` o `persistent`.
+        runtime_root (str, optional): Dónde crear los clones. Por defecto `/dev/shm` o la temporal.
+        prune_interval (float, optional): Segundos entre podas del perfil persistente (0 = nunca).
+
+    Attributes:
+        last (dict): Datos del último `prepare()`: `path`, `mode`, `prepare_ms`, `size_mb`,
+            `method` (cómo se clonó) y `pruned_mb`.
+    """
+
+    def __init__(self, name, persistent_dir, mode="clone", runtime_root=None, prune_interval=24 * 3600):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Modo de perfil desconocido: {mode}")
+        self.name = name
+        self.persistent_dir = persistent_dir
+        self.golden_dir = f"{persistent_dir}_golden"
+        self.mode = mode
+        self.runtime_dir = os.path.join(runtime_root or _default_runtime_root(), "selenium-profiles")
+        self.prune_interval = prune_interval
+        self.last = {}
+        self._clones = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, name, prefix, persistent_dir):
+        """Crea el manager según `<PREFIX>_PROFILE_MODE`, `_PROFILE_RUNTIME` y `_PROFILE_PRUNE_HOURS`."""
+
+        return cls(
+            name,
+            persistent_dir,
+            mode=os.getenv(f"{prefix}_PROFILE_MODE", "clone"),
+            runtime_root=os.getenv(f"{prefix}_PROFILE_RUNTIME") or None,
+            prune_interval=float(os.getenv(f"{prefix}_PROFILE_PRUNE_HOURS", "24")) * 3600,
+        )
+
+    # ---------- API ----------
+    def prepare(self, slot=0):
+        """Deja listo el perfil del navegador de `slot` y devuelve su carpeta.
+
+        En modo `clone` descarta el clone anterior del slot (su navegador ya se cerró) y crea
+        uno nuevo desde el perfil base. En modo `persistent` poda la carpeta si corresponde.
+
+        Args:
+            slot (int, optional): Índice del navegador dentro del pool.
+
+        Returns:
+            str: Carpeta para `--user-data-dir`.
+        """
+
+        start = time.perf_counter()
+        if self.mode == "persistent":
+            path = self.persistent_dir if not slot else f"{self.persistent_dir}_{slot}"
+            pruned = self.prune(path) if self._prune_due(path) else 0
+            method = "persistent"
+        else:
+            self.ensure_golden()
+            path = os.path.join(self.runtime_dir, f"{self.name}-{os.getpid()}-{slot}")
+            _remove(path)
+            method = self._clone(self.golden_dir, path)
+            with self._lock:
+                self._clones[slot] = path
+            pruned = 0
+
+        self.last = {
+            "path": path,
+            "mode": self.mode,
+            "prepare_ms": round((time.perf_counter() - start) * 1000, 1),
+            "size_mb": round(dir_size(path) / 1e6, 2),
+            "method": method,
+            "pruned_mb": round(pruned / 1e6, 2),
+        }
+        return path
+
+    def ensure_golden(self):
+        """Arma el perfil base si no existe o es de otra versión. Devuelve True si lo armó."""
+
+        stamp = os.path.join(self.golden_dir, ".golden")
+        try:
+            with open(stamp, encoding="utf-8") as f:
+                if json.load(f).get("version") == GOLDEN_VERSION:
+                    return False
+        except (OSError, ValueError):
+            pass
+
+        # Se arma al lado y se renombra: otro proceso nunca ve un perfil base a medio escribir
+        building = f"{self.golden_dir}.{os.getpid()}.tmp"
+        _remove(building)
+        os.makedirs(os.path.join(building, "Default"))
+        open(os.path.join(building, "First Run"), "w").close()                  # Sin pantalla de bienvenida
+        _write_json(os.path.join(building, "Local State"), {
+            "browser": {"has_seen_welcome_page": True},
+            "user_experience_metrics": {"reporting_enabled": False},
+        })
+        _write_json(os.path.join(building, "Default", "Preferences"), {
+            "browser": {"has_seen_welcome_page": True, "check_default_browser": False},
+            "profile": {"exit_type": "Normal", "exited_cleanly": True},
+            "translate": {"enabled": False},
+            "search": {"suggest_enabled": False},
+            "signin": {"allowed": False},
+        })
+        _write_json(os.path.join(building, ".golden"), {"version": GOLDEN_VERSION, "built": time.time()})
+        _remove(self.golden_dir)
+        try:
+            os.replace(building, self.golden_dir)
+        except OSError:
+            _remove(building)  # Otro proceso lo armó al mismo tiempo
+        return True
+
+    def prune(self, path=None):
+        """Borra cachés, historial y datos de service workers de un perfil que no está en uso.
+
+        Args:
+            path (str, optional): Carpeta del perfil. Por defecto, la persistente.
+
+        Returns:
+            int: Bytes liberados.
+        """
+
+        path = path or self.persistent_dir
+        freed = 0
+        targets = [os.path.join(path, rel) for rel in PRUNE_ROOT]
+        targets += [os.path.join(path, "Default", rel) for rel in PRUNE_PROFILE]
+        for target in targets:
+            if os.path.lexists(target):
+                freed += dir_size(target) if os.path.isdir(target) else os.path.getsize(target)
+                _remove(target)
+        if os.path.isdir(path):
+            with open(os.path.join(path, ".last_prune"), "w", encoding="utf-8") as f:
+                f.write(str(time.time()))
+        return freed
+
+    def _prune_due(self, path):
+        if not self.prune_interval or not os.path.isdir(path):
+            return False
+        try:
+            with open(os.path.join(path, ".last_prune"), encoding="utf-8") as f:
+                last = float(f.read())
+        except (OSError, ValueError):
+            last = 0
+        return time.time() - last >= self.prune_interval
+
+    # ---------- CLONES ----------
+    def _clone(self, src, dst):
+        methods = set()
+
+        def clone_file(s, d):
+            methods.add(_clone_file(s, d))
+            return d
+
+        shutil.copytree(src, dst, copy_function=clone_file)
+        return "+".join(sorted(methods)) or "vacío"
+
+    def cleanup(self):
+        """Borra los clones de este proceso (sus navegadores ya tienen que estar cerrados)."""
+
+        with self._lock:
+            clones = list(self._clones.values())
+            self._clones.clear()
+        for path in clones:
+            _remove(path)
+
+    def cleanup_stale(self):
+        """Borra los clones de este perfil que dejaron procesos que ya no existen.
+
+        Returns:
+            int: Clones borrados.
+        """
+
+        removed = 0
+        try:
+            entries = list(os.scandir(self.runtime_dir))
+        except OSError:
+            return 0
+        for entry in entries:
+            if not entry.name.startswith(f"{self.name}-"):
+                continue
+            owner, _, slot = entry.name[len(self.name) + 1:].partition("-")
+            if not owner.isdigit() or not slot.isdigit():
+                continue
+            if int(owner) != os.getpid() and not is_alive(int(owner)):
+                _remove(entry.path)
+                removed += 1
+        return removed
+
+    def stats(self):
+        """Tamaño del perfil base y del persistente, clones vivos y datos del último `prepare()`."""
+
+        with self._lock:
+            clones = dict(self._clones)
+        return {
+            "mode": self.mode,
+            "golden_mb": round(dir_size(self.golden_dir) / 1e6, 2),
+            "persistent_mb": round(dir_size(self.persistent_dir) / 1e6, 2),
+            "runtime_dir": self.runtime_dir,
+            "clones": {slot: round(dir_size(path) / 1e6, 2) for slot, path in clones.items()},
+            "last": dict(self.last),
+        }
+
+
+def _write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def _clone_file(src, dst):
+    """Clona un archivo con el método más barato posible y devuelve cuál usó."""
+
+    if os.path.basename(src) in ATOMIC_FILES:
+        try:
+            os.link(src, dst)
+            return "hardlink"
+        except OSError:
+            pass  # Otro sistema de archivos (p. ej. perfil base en disco y clones en tmpfs)
+    if fcntl is not None:
+        try:
+            with open(src, "rb") as s, open(dst, "wb") as d:
+                fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+            shutil.copystat(src, dst)
+            return "reflink"
+        except OSError as e:
+            if e.errno not in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.EBADF):
+                raise
+    shutil.copy2(src, dst)
+    return "copia"
+
+
+# ---------- REGISTRO DE PERFILES POR PROCESO ----------
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_profiles(name, prefix, persistent_dir):
+    """Devuelve el `ProfileManager` de `name`; al crearlo borra los clones de procesos muertos.
+
+    Args:
+        name (str): Nombre del perfil (por ejemplo `"xbot"`).
+        prefix (str): Prefijo de las variables de entorno (ver `ProfileManager.from_env`).
+        persistent_dir (str): Carpeta del perfil persistente (y base del perfil golden).
+    """
+
+    with _managers_lock:
+        manager = _managers.get(name)
+        if manager is None:
+            manager = _managers[name] = ProfileManager.from_env(name, prefix, persistent_dir)
+            if manager.mode == "clone":
+                manager.cleanup_stale()
+        return manager
+
+
+@atexit.register
+def cleanup_all_profiles():
+    """Borra los clones del proceso al salir, después de cerrar los navegadores que los usan."""
+
+    # `atexit` corre en orden inverso: los pools todavía no se cerraron y Chrome sigue usando los clones
+    driver_pool = sys.modules.get("common.driver_pool")
+    if driver_pool is not None:
+        driver_pool.close_all_pools()
+    with _managers_lock:
+        managers = list(_managers.values())
+    for manager in managers:
+        manager.cleanup()
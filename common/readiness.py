@@ -0,0 +1,248 @@
+"""Motor de "readiness": esperas basadas en señales reales en lugar de `sleep`.
+
+Cada espera vuelve apenas se cumple su condición y registra cuánto tardó de
+verdad, de modo que el tiempo muerto de cada ejecución queda a la vista:
+
+- `document_ready()`: `document.readyState` alcanza el estado pedido.
+- `network_idle()`: no hay requests en vuelo durante una ventana (eventos
+  CDP `Network.*`; si el log "performance" no está disponible se usa la
+  Resource Timing API del navegador).
+- `dom_quiet()`: un MutationObserver inyectado no ve cambios durante una
+  ventana (en todo el documento o en un elemento concreto).
+
+Las pausas que se mantienen a propósito (por ejemplo, pausas "humanas" para
+no parecer un bot) se declaran como `Delay` con nombre; las que corren dentro
+de un script del navegador se anotan con `record()`.
+
+Uso típico:
+    ready = Readiness(driver, timeout=15)
+    driver.get(url)
+    ready.document_ready()
+    ready.dom_quiet(quiet_time=0.5)
+    print(ready.summary())
+"""
+
+import random
+import time
+from dataclasses import dataclass
+
+from selenium.common.exceptions import WebDriverException
+
+from common.cdp_log import get_event_log
+
+
+@dataclass(frozen=True)
+class Delay:
+    """Pausa explícita y con nombre.
+
+    Attributes:
+        name (str): Nombre con el que se registra la pausa.
+        low (float): Segundos mínimos.
+        high (float | None): Segundos máximos. Si se indica, la pausa es aleatoria
+            (uniforme) entre `low` y `high`.
+    """
+
+    name: str
+    low: float
+    high: float = None
+
+    def seconds(self):
+        """Devuelve la duración de esta pausa."""
+
+        if self.high is None:
+            return self.low
+        return random.uniform(self.low, self.high)
+
+
+@dataclass
+class WaitResult:
+    """Resultado de una espera.
+
+    Attributes:
+        name (str): Tipo de espera (`document_ready`, `network_idle`, `dom_quiet`, `pause:<nombre>`).
+        elapsed (float): Segundos que realmente tardó.
+        satisfied (bool): False si se agotó el timeout sin cumplirse la condición.
+    """
+
+    name: str
+    elapsed: float
+    satisfied: bool
+
+
+# Instala (una sola vez por documento o elemento) un MutationObserver que anota el
+# instante de la última mutación, y devuelve los ms transcurridos desde entonces.
+_DOM_QUIET_JS = """
+const root = arguments[0] || document.documentElement;
+const key = '__readinessObserver';
+if (!root[key]) {
+    root[key] = { last: performance.now() };
+    new MutationObserver(() => { root[key].last = performance.now(); })
+        .observe(root, { childList: true, subtree: true, attributes: true, characterData: true });
+}
+return performance.now() - root[key].last;
+"""
+
+# Fallback sin CDP: cantidad de recursos registrados por la Resource Timing API
+_RESOURCE_COUNT_JS = "return performance.getEntriesByType('resource').length;"
+
+
+class _InflightTracker:
+    """Lleva la cuenta de los requests en vuelo a partir de eventos CDP."""
+
+    def __init__(self):
+        self.inflight = set()
+        self.last_change = time.monotonic()
+
+    def __call__(self, method, params):
+        if method == "Network.requestWillBeSent":
+            self.inflight.add(params["requestId"])
+        elif method in ("Network.loadingFinished", "Network.loadingFailed"):
+            self.inflight.discard(params["requestId"])
+        else:
+            return
+        self.last_change = time.monotonic()
+
+
+class Readiness:
+    """Esperas basadas en eventos para un navegador.
+
+    Args:
+        driver (webdriver.Chrome): Navegador a observar.
+        timeout (float, optional): Segundos máximos por espera.
+        poll_interval (float, optional): Intervalo entre comprobaciones.
+
+    Attributes:
+        results (list[WaitResult]): Historial de esperas y pausas realizadas.
+    """
+
+    def __init__(self, driver, timeout=15, poll_interval=0.1):
+        self.driver = driver
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.results = []
+
+    def _record(self, name, start, satisfied):
+        return self.record(name, time.monotonic() - start, satisfied)
+
+    def record(self, name, elapsed, satisfied=True):
+        """Registra una espera medida por fuera (por ejemplo, pausas ejecutadas dentro de un script).
+
+        Returns:
+            WaitResult: Resultado registrado.
+        """
+
+        result = WaitResult(name, elapsed, satisfied)
+        self.results.append(result)
+        return result
+
+    def _until(self, name, condition, timeout):
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        while True:
+            try:
+                if condition():
+                    return self._record(name, start, True)
+            except WebDriverException:
+                pass  # La página puede estar navegando: se reintenta en la próxima vuelta
+            if time.monotonic() >= deadline:
+                return self._record(name, start, False)
+            time.sleep(self.poll_interval)
+
+    # ---------- SEÑALES ----------
+    def document_ready(self, state="complete", timeout=None):
+        """Espera a que `document.readyState` llegue a `state`.
+
+        Args:
+            state (str, optional): `"interactive"` o `"complete"`.
+            timeout (float, optional): Segundos máximos (por defecto `self.timeout`).
+
+        Returns:
+            WaitResult: Resultado de la espera.
+        """
+
+        accepted = ("interactive", "complete") if state == "interactive" else ("complete",)
+        return self._until(
+            "document_ready",
+            lambda: self.driver.execute_script("return document.readyState;") in accepted,
+            timeout,
+        )
+
+    def network_idle(self, idle_time=0.5, max_inflight=0, timeout=None):
+        """Espera a que la red quede ociosa durante `idle_time` segundos.
+
+        Args:
+            idle_time (float, optional): Ventana sin actividad requerida.
+            max_inflight (int, optional): Requests en vuelo tolerados (útil con
+                conexiones largas como websockets o long-polling).
+            timeout (float, optional): Segundos máximos.
+
+        Returns:
+            WaitResult: Resultado de la espera.
+        """
+
+        log = get_event_log(self.driver)
+        log.poll()
+        if not log.available:
+            return self._network_idle_fallback(idle_time, timeout)
+
+        tracker = _InflightTracker()
+        log.subscribe(tracker)
+        try:
+            def idle():
+                log.poll()
+                return (len(tracker.inflight) <= max_inflight
+                        and time.monotonic() - tracker.last_change >= idle_time)
+
+            return self._until("network_idle", idle, timeout)
+        finally:
+            log.unsubscribe(tracker)
+
+    def _network_idle_fallback(self, idle_time, timeout):
+        state = {"count": -1, "since": time.monotonic()}
+
+        def idle():
+            count = self.driver.execute_script(_RESOURCE_COUNT_JS)
+            now = time.monotonic()
+            if count != state["count"]:
+                state["count"], state["since"] = count, now
+                return False
+            return now - state["since"] >= idle_time
+
+        return self._until("network_idle", idle, timeout)
+
+    def dom_quiet(self, quiet_time=0.5, root=None, timeout=None):
+        """Espera a que el DOM deje de mutar durante `quiet_time` segundos.
+
+        Args:
+            quiet_time (float, optional): Ventana sin mutaciones requerida.
+            root (WebElement, optional): Elemento a observar. Por defecto, todo el documento.
+            timeout (float, optional): Segundos máximos.
+
+        Returns:
+            WaitResult: Resultado de la espera.
+        """
+
+        quiet_ms = quiet_time * 1000
+        return self._until(
+            "dom_quiet",
+            lambda: self.driver.execute_script(_DOM_QUIET_JS, root) >= quiet_ms,
+            timeout,
+        )
+
+    # ---------- MÉTRICAS ----------
+    def summary(self):
+        """Agrupa el tiempo total y la cantidad de esperas por tipo.
+
+        Returns:
+            dict: `{nombre: {"count", "total_s", "timeouts"}}`.
+        """
+
+        summary = {}
+        for result in self.results:
+            entry = summary.setdefault(result.name, {"count": 0, "total_s": 0.0, "timeouts": 0})
+            entry["count"] += 1
+            entry["total_s"] += result.elapsed
+            if not result.satisfied:
+                entry["timeouts"] += 1
+        return summary
@@ -0,0 +1,305 @@
+"""Subsistema de reintentos: política con backoff, clasificación de errores
+y circuit breaker.
+
+- `RetryPolicy`: backoff exponencial con jitter, tope por espera, límite de
+  intentos y plazo total.
+- `classify_error()`: agrupa las excepciones de Selenium y de red en
+  categorías (`timeout`, `stale`, `intercepted`, `network`, `driver_lost`,
+  `fatal`) para decidir si vale la pena reintentar.
+- `Retrier`: reintenta un paso concreto (no el flujo completo) y lleva
+  contadores y tiempos por intento.
+- `CircuitBreaker`: deja de insistir contra un destino caído durante un
+  tiempo de enfriamiento.
+
+Uso típico:
+    retrier = Retrier(RetryPolicy(max_attempts=4), breaker=get_breaker("speedtest.net"))
+    retrier.call(open_page, step="abrir página")
+    retrier.call(read_results, step="leer resultados")
+    print(retrier.stats.snapshot())
+"""
+
+import random
+import socket
+import sys
+import threading
+import time
+from dataclasses import dataclass
+
+# Categorías que se reintentan por defecto. `driver_lost` necesita un navegador
+# nuevo y `fatal` indica un error de programación: reintentar el paso no sirve.
+DEFAULT_RETRY_ON = frozenset({"timeout", "stale", "intercepted", "not_found", "network"})
+
+# Fragmentos de mensaje de Chrome que indican un problema de red
+_NETWORK_MARKERS = ("net::ERR_", "ERR_CONNECTION", "ERR_NAME_NOT_RESOLVED", "ERR_INTERNET_DISCONNECTED")
+# Fragmentos que indican que el navegador murió
+_DRIVER_LOST_MARKERS = ("chrome not reachable", "disconnected", "session deleted", "target window already closed")
+
+
+class CircuitOpenError(Exception):
+    """Se lanza cuando el circuit breaker está abierto y no se permite intentar."""
+
+
+def classify_error(exc):
+    """Clasifica una excepción para decidir si reintentar.
+
+    Args:
+        exc (BaseException): Excepción capturada.
+
+    Returns:
+        str: `timeout`, `stale`, `intercepted`, `not_found`, `network`,
+        `driver_lost` o `fatal`.
+    """
+
+    # Selenium no se importa acá: si nadie lo importó, la excepción no puede ser suya
+    # (así `publisher` y el CLI pueden usar este módulo sin cargar Selenium)
+    errors = sys.modules.get("selenium.common.exceptions")
+    if getattr(exc, "category", None):
+        return exc.category  # Excepciones propias que ya saben su categoría (p. ej. StepDeadlineExceeded)
+    if errors is not None:
+        if isinstance(exc, errors.TimeoutException):
+            return "timeout"
+        if isinstance(exc, errors.StaleElementReferenceException):
+            return "stale"
+        if isinstance(exc, errors.ElementClickInterceptedException):
+            return "intercepted"
+        if isinstance(exc, errors.NoSuchElementException):
+            return "not_found"
+        if isinstance(exc, (errors.InvalidSessionIdException, errors.NoSuchWindowException)):
+            return "driver_lost"
+        if isinstance(exc, errors.WebDriverException):
+            message = str(exc.msg or exc)
+            if any(marker in message for marker in _NETWORK_MARKERS):
+                return "network"
+            if any(marker in message.lower() for marker in _DRIVER_LOST_MARKERS):
+                return "driver_lost"
+            return "fatal"
+    if isinstance(exc, (ConnectionError, socket.timeout, TimeoutError)):
+        return "network"
+    return "fatal"
+
+
+@dataclass
+class RetryPolicy:
+    """Política de reintentos con backoff exponencial y jitter.
+
+    Attributes:
+        max_attempts (int): Intentos máximos por paso (incluye el primero).
+        base_delay (float): Espera base antes del segundo intento (s).
+        multiplier (float): Factor de crecimiento de la espera.
+        max_delay (float): Tope de cada espera (s).
+        jitter (str): `"full"` (uniforme entre 0 y la espera), `"equal"` (mitad fija,
+            mitad aleatoria) o `"none"`.
+        deadline (float | None): Plazo total por paso (s), contando esperas.
+        retry_on (frozenset[str]): Categorías de `classify_error` que se reintentan.
+    """
+
+    max_attempts: int = 5
+    base_delay: float = 1.0
+    multiplier: float = 2.0
+    max_delay: float = 15.0
+    jitter: str = "full"
+    deadline: float = None
+    retry_on: frozenset = DEFAULT_RETRY_ON
+
+    def backoff(self, attempt):
+        """Devuelve la espera tras el intento número `attempt` (empezando en 1)."""
+
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        if self.jitter == "full":
+            return random.uniform(0, delay)
+        if self.jitter == "equal":
+            return delay / 2 + random.uniform(0, delay / 2)
+        return delay
+
+    def should_retry(self, category):
+        """Indica si una categoría de error es reintentable según la política."""
+
+        return category in self.retry_on
+
+
+class CircuitBreaker:
+    """Circuit breaker clásico (cerrado → abierto → semiabierto).
+
+    Tras `failure_threshold` fallos consecutivos el circuito se abre y rechaza
+    intentos durante `reset_timeout` segundos. Pasado ese tiempo permite un
+    intento de prueba: si sale bien se cierra, si falla vuelve a abrirse.
+
+    Args:
+        name (str): Destino protegido (para mensajes).
+        failure_threshold (int, optional): Fallos consecutivos para abrir.
+        reset_timeout (float, optional): Segundos con el circuito abierto.
+    """
+
+    def __init__(self, name, failure_threshold=3, reset_timeout=300):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        """`"closed"`, `"open"` o `"half_open"`."""
+
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def allow(self):
+        """Lanza `CircuitOpenError` si el circuito está abierto."""
+
+        if self.state == "open":
+            raise CircuitOpenError(f"Circuito abierto para {self.name}: se omite el intento.")
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class RetryStats:
+    """Contadores y tiempos por paso y por intento.
+
+    Attributes:
+        attempts (list[dict]): Un registro por intento con `step`, `attempt`,
+            `elapsed` (s) y `outcome` (`ok` o la categoría del error).
+    """
+
+    def __init__(self):
+        self.attempts = []
+        self._lock = threading.Lock()
+
+    def record(self, step, attempt, elapsed, outcome):
+        with self._lock:
+            self.attempts.append({"step": step, "attempt": attempt, "elapsed": elapsed, "outcome": outcome})
+
+    def snapshot(self):
+        """Resume los intentos por paso.
+
+        Returns:
+            dict: `{paso: {"attempts", "outcomes": {resultado: cantidad}, "total_s"}}`.
+        """
+
+        summary = {}
+        with self._lock:
+            attempts = list(self.attempts)
+        for entry in attempts:
+            step = summary.setdefault(entry["step"], {"attempts": 0, "outcomes": {}, "total_s": 0.0})
+            step["attempts"] += 1
+            step["outcomes"][entry["outcome"]] = step["outcomes"].get(entry["outcome"], 0) + 1
+            step["total_s"] += entry["elapsed"]
+        return summary
+
+
+class Retrier:
+    """Ejecuta pasos individuales aplicando una `RetryPolicy`.
+
+    Args:
+        policy (RetryPolicy, optional): Política de reintentos.
+        breaker (CircuitBreaker, optional): Breaker del destino.
+        stats (RetryStats, optional): Contadores compartidos.
+        log (Callable[[str], None], optional): Función para los mensajes de progreso.
+    """
+
+    def __init__(self, policy=None, breaker=None, stats=None, log=print):
+        self.policy = policy or RetryPolicy()
+        self.breaker = breaker
+        self.stats = stats or RetryStats()
+        self.log = log
+
+    def call(self, func, step="", count_timeouts=True):
+        """Ejecuta `func()` reintentando solo ante errores reintentables.
+
+        Args:
+            func (Callable): Paso a ejecutar.
+            step (str, optional): Nombre del paso (para mensajes y métricas).
+            count_timeouts (bool, optional): Si los `timeout` del paso cuentan como fallas del
+                destino en el breaker. False para pasos que esperan por sondeo (por ejemplo, leer
+                resultados mientras el test sigue corriendo), donde vencer una espera es normal.
+
+        Returns:
+            Any: El valor retornado por `func`.
+
+        Raises:
+            CircuitOpenError: Si el breaker del destino está abierto.
+            Exception: La última excepción de `func` si no es reintentable o se
+                agotaron los intentos o el plazo.
+        """
+
+        policy = self.policy
+        start = time.monotonic()
+        deadline = start + policy.deadline if policy.deadline is not None else None
+
+        for attempt in range(1, policy.max_attempts + 1):
+            if self.breaker is not None:
+                self.breaker.allow()
+
+            attempt_start = time.monotonic()
+            try:
+                result = func()
+            except Exception as exc:
+                category = classify_error(exc)
+                self.stats.record(step, attempt, time.monotonic() - attempt_start, category)
+                counted = category in ("network", "driver_lost") or (category == "timeout" and count_timeouts)
+                if self.breaker is not None and counted:
+                    self.breaker.record_failure()
+
+                delay = policy.backoff(attempt)
+                out_of_time = deadline is not None and time.monotonic() + delay >= deadline
+                if (not policy.should_retry(category) or attempt == policy.max_attempts or out_of_time):
+                    raise
+
+                self.log(f"Intento {attempt}/{policy.max_attempts} fallido al {step} ({category}). "
+                         f"Reintentando en {delay:.1f}s...")
+                time.sleep(delay)
+                continue
+
+            self.stats.record(step, attempt, time.monotonic() - attempt_start, "ok")
+            if self.breaker is not None:
+                self.breaker.record_success()
+            return result
+
+    def step(self, name, count_timeouts=True):
+        """Decorador equivalente a `call(func, step=name, count_timeouts=count_timeouts)`."""
+
+        def decorator(func):
+            def wrapper(*args, **kwargs):
+                return self.call(lambda: func(*args, **kwargs), step=name, count_timeouts=count_timeouts)
+            wrapper.__name__ = func.__name__
+            wrapper.__doc__ = func.__doc__
+            return wrapper
+        return decorator
+
+
+# ---------- REGISTRO DE BREAKERS POR DESTINO ----------
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name, **kwargs):
+    """Devuelve el `CircuitBreaker` del destino `name` (compartido en el proceso).
+
+    Args:
+        name (str): Destino (por ejemplo, `"speedtest.net"`).
+        **kwargs: Argumentos de `CircuitBreaker` si hay que crearlo.
+
+    Returns:
+        CircuitBreaker: Breaker compartido.
+    """
+
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name, **kwargs)
+            _breakers[name] = breaker
+        return breaker
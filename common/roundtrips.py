@@ -0,0 +1,69 @@
+"""Conteo de round trips de WebDriver.
+
+Todos los comandos de Selenium (los del driver y los de cada `WebElement`)
+pasan por `WebDriver.execute`. `install_counter()` envuelve ese método en
+la instancia del driver para contar cada comando enviado a ChromeDriver,
+sin modificar la clase ni el resto del código.
+
+Uso típico:
+    counter = install_counter(driver)
+    driver.find_element(By.ID, "x").click()
+    print(counter.total, counter.by_command)
+"""
+
+import threading
+from collections import Counter
+
+
+class CommandCounter:
+    """Contador de comandos WebDriver de un navegador.
+
+    Attributes:
+        total (int): Comandos enviados desde la instalación (o el último `reset()`).
+        by_command (collections.Counter): Comandos por nombre (`findElements`, `executeScript`, ...).
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.by_command = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, command):
+        with self._lock:
+            self.total += 1
+            self.by_command[command] += 1
+
+    def reset(self):
+        with self._lock:
+            self.total = 0
+            self.by_command.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return {"total": self.total, "by_command": dict(self.by_command)}
+
+
+def install_counter(driver):
+    """Instala (una sola vez) el contador de comandos en el driver.
+
+    Args:
+        driver (webdriver.Chrome): Navegador a instrumentar.
+
+    Returns:
+        CommandCounter: Contador asociado al driver.
+    """
+
+    counter = getattr(driver, "_command_counter", None)
+    if counter is not None:
+        return counter
+
+    counter = CommandCounter()
+    execute = driver.execute
+
+    def counted_execute(driver_command, params=None):
+        counter.add(driver_command)
+        return execute(driver_command, params)
+
+    driver.execute = counted_execute
+    driver._command_counter = counter
+    return counter
@@ -0,0 +1,338 @@
+"""Trazas livianas por paso: tiempo real, tiempo de CPU y comandos WebDriver.
+
+Cada paso de un bot se envuelve en un span (con `tracer.span(...)` o con el
+decorador `@traced()` en los métodos). Los spans se anidan según el orden
+de ejecución y guardan:
+
+- tiempo real (`perf_counter`) y de CPU del hilo (`thread_time`);
+- comandos WebDriver enviados durante el span (si se indicó un
+  `CommandCounter`, ver `common.roundtrips`);
+- atributos libres y el tipo de excepción si el paso falló.
+
+`flush()` cierra una ejecución: escribe un archivo JSON en formato Chrome
+trace-event (se abre en `chrome://tracing` o https://ui.perfetto.dev) si hay
+carpeta configurada, e imprime una línea de log estructurada con los
+tiempos agregados por paso.
+
+Con el tracer deshabilitado `span()` devuelve siempre el mismo objeto
+vacío y `@traced()` llama directamente al método: el costo es una
+comprobación de atributo por paso.
+
+Uso típico:
+    tracer = Tracer.from_env("xbot", "XBOT")
+    tracer.counter = install_counter(driver)
+    with tracer.span("abrir página", url=url):
+        driver.get(url)
+    tracer.flush()
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+
+class Span:
+    """Un paso medido.
+
+    Attributes:
+        name (str): Nombre del paso.
+        attrs (dict): Atributos libres.
+        children (list[Span]): Spans anidados.
+        error (str | None): Tipo de la excepción que cerró el span, si la hubo.
+    """
+
+    __slots__ = ("tracer", "name", "attrs", "parent", "children", "tid",
+                 "start", "end", "cpu_start", "cpu_end", "cmd_start", "cmd_end", "error")
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.parent = None
+        self.children = []
+        self.tid = threading.get_ident()
+        self.end = self.cpu_end = self.cmd_end = None
+        self.error = None
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        if stack:
+            self.parent = stack[-1]
+            self.parent.children.append(self)
+        else:
+            with self.tracer._lock:
+                self.tracer.roots.append(self)
+        stack.append(self)
+        counter = self.tracer.counter
+        self.cmd_start = counter.total if counter is not None else None
+        self.cpu_start = time.thread_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.perf_counter()
+        self.cpu_end = time.thread_time()
+        counter = self.tracer.counter
+        self.cmd_end = counter.total if counter is not None else None
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        stack = self.tracer._stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        return False
+
+    def set(self, **attrs):
+        """Agrega atributos al span (por ejemplo, resultados conocidos al final del paso)."""
+
+        self.attrs.update(attrs)
+
+    @property
+    def wall_ms(self):
+        return ((self.end or time.perf_counter()) - self.start) * 1000
+
+    @property
+    def cpu_ms(self):
+        return ((self.cpu_end or time.thread_time()) - self.cpu_start) * 1000
+
+    @property
+    def commands(self):
+        if self.cmd_start is None or self.cmd_end is None:
+            return None
+        return self.cmd_end - self.cmd_start
+
+    def path(self):
+        """Nombre completo del span incluyendo a sus padres (`padre/hijo`)."""
+
+        names = []
+        span = self
+        while span is not None:
+            names.append(span.name)
+            span = span.parent
+        return "/".join(reversed(names))
+
+
+class _NoopSpan:
+    """Span vacío que se usa con el tracer deshabilitado."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Tracer:
+    """Registro de spans de una ejecución.
+
+    Args:
+        name (str): Nombre de la ejecución (prefijo de los archivos exportados).
+        enabled (bool, optional): Si es False, `span()` no mide nada.
+        counter (CommandCounter, optional): Contador de comandos WebDriver a consultar.
+        trace_dir (str, optional): Carpeta donde `flush()` escribe el JSON de Chrome trace.
+        log (Callable[[str], None], optional): Destino de la línea de log estructurada.
+
+    Attributes:
+        roots (list[Span]): Spans de primer nivel desde el último `flush()`.
+    """
+
+    def __init__(self, name, enabled=True, counter=None, trace_dir=None, log=print):
+        self.name = name
+        self.enabled = enabled
+        self.counter = counter
+        self.trace_dir = trace_dir
+        self.log = log
+        self.roots = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._epoch = time.perf_counter()
+
+    @classmethod
+    def from_env(cls, name, prefix, **kwargs):
+        """Crea un tracer configurado por variables de entorno.
+
+        - `<PREFIX>_TRACE=1`: habilita las trazas (solo la línea de log).
+        - `<PREFIX>_TRACE_DIR=<carpeta>`: habilita las trazas y exporta el JSON de Chrome trace.
+
+        Args:
+            name (str): Nombre de la ejecución.
+            prefix (str): Prefijo de las variables (por ejemplo, `"XBOT"`).
+
+        Returns:
+            Tracer: Tracer habilitado o deshabilitado según el entorno.
+        """
+
+        trace_dir = os.getenv(f"{prefix}_TRACE_DIR") or None
+        enabled = bool(trace_dir) or os.getenv(f"{prefix}_TRACE", "0").lower() in ("1", "true", "yes")
+        return cls(name, enabled=enabled, trace_dir=trace_dir, **kwargs)
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    # ---------- MEDICIÓN ----------
+    def span(self, name, **attrs):
+        """Devuelve un context manager que mide el bloque como un span.
+
+        Args:
+            name (str): Nombre del paso.
+            **attrs: Atributos del span.
+
+        Returns:
+            Span: Span a usar con `with` (vacío si el tracer está deshabilitado).
+        """
+
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, attrs)
+
+    def wrap(self, func, name=None):
+        """Envuelve una función para que cada llamada sea un span.
+
+        Útil con `Retrier.call()`: cada intento queda como un span separado.
+        """
+
+        if not self.enabled:
+            return func
+        name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Span(self, name, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    # ---------- EXPORTACIÓN ----------
+    def _walk(self):
+        with self._lock:
+            pending = list(self.roots)
+        while pending:
+            span = pending.pop(0)
+            yield span
+            pending[:0] = span.children
+
+    def to_chrome_trace(self):
+        """Devuelve los spans en formato Chrome trace-event (eventos completos `"ph": "X"`).
+
+        Returns:
+            dict: `{"traceEvents": [...], "displayTimeUnit": "ms", "otherData": {...}}`.
+        """
+
+        pid = os.getpid()
+        events = []
+        for span in self._walk():
+            args = dict(span.attrs)
+            args["cpu_ms"] = round(span.cpu_ms, 3)
+            if span.commands is not None:
+                args["webdriver_commands"] = span.commands
+            if span.error:
+                args["error"] = span.error
+            events.append({
+                "name": span.name,
+                "cat": self.name,
+                "ph": "X",
+                "ts": round((span.start - self._epoch) * 1e6, 1),
+                "dur": round(span.wall_ms * 1000, 1),
+                "pid": pid,
+                "tid": span.tid,
+                "args": {k: v if isinstance(v, (int, float, str, bool, type(None))) else str(v)
+                         for k, v in args.items()},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"run": self.name}}
+
+    def export_chrome_trace(self, path):
+        """Escribe el JSON de Chrome trace en `path`."""
+
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f)
+        return path
+
+    def summary(self):
+        """Agrega los spans por ruta (`padre/hijo`).
+
+        Returns:
+            dict: `{ruta: {"count", "wall_ms", "cpu_ms", "commands", "errors"}}`.
+        """
+
+        summary = {}
+        for span in self._walk():
+            entry = summary.setdefault(span.path(), {"count": 0, "wall_ms": 0.0, "cpu_ms": 0.0,
+                                                     "commands": 0, "errors": 0})
+            entry["count"] += 1
+            entry["wall_ms"] += span.wall_ms
+            entry["cpu_ms"] += span.cpu_ms
+            entry["commands"] += span.commands or 0
+            if span.error:
+                entry["errors"] += 1
+        for entry in summary.values():
+            entry["wall_ms"] = round(entry["wall_ms"], 1)
+            entry["cpu_ms"] = round(entry["cpu_ms"], 1)
+        return summary
+
+    def log_line(self):
+        """Línea JSON con el total y los tiempos agregados por paso."""
+
+        with self._lock:
+            roots = list(self.roots)
+        return json.dumps({
+            "trace": self.name,
+            "wall_ms": round(sum(span.wall_ms for span in roots), 1),
+            "spans": self.summary(),
+        }, ensure_ascii=False)
+
+    def flush(self):
+        """Cierra la ejecución actual: exporta, imprime la línea de log y descarta los spans.
+
+        Returns:
+            str | None: Ruta del JSON de Chrome trace escrito, si hay `trace_dir`.
+        """
+
+        if not self.enabled or not self.roots:
+            return None
+        path = None
+        if self.trace_dir:
+            os.makedirs(self.trace_dir, exist_ok=True)
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+            path = self.export_chrome_trace(os.path.join(self.trace_dir, f"{self.name}-{stamp}.json"))
+        self.log(f"TRACE {self.log_line()}")
+        with self._lock:
+            self.roots = []
+        return path
+
+
+def traced(name=None):
+    """Decorador para métodos: mide cada llamada como un span del `self.tracer` de la instancia.
+
+    Si la instancia no tiene tracer o está deshabilitado, llama al método sin medir.
+
+    Args:
+        name (str, optional): Nombre del span (por defecto, el del método).
+    """
+
+    def decorator(method):
+        span_name = name or method.__name__
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            tracer = getattr(self, "tracer", None)
+            if tracer is None or not tracer.enabled:
+                return method(self, *args, **kwargs)
+            with Span(tracer, span_name, {}):
+                return method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,309 @@
+"""Grabación y reproducción de los comandos WebDriver de un navegador.
+
+Todos los comandos de Selenium terminan en `driver.command_executor.execute()`,
+que devuelve la respuesta JSON de ChromeDriver. `install_recorder()` envuelve
+ese método y guarda cada comando con su respuesta y su duración en un archivo
+compacto (JSON por línea, comprimido con gzip).
+
+`ReplayDriver` es un `WebDriver` sin navegador que responde cada comando con
+la respuesta grabada, en orden: el código de los bots corre igual (mismos
+elementos, mismos errores, mismas esperas) pero sin Chrome. Sirve para medir
+solo el overhead del lado de Python y contar round trips exactos en
+milisegundos. Puede responder con la latencia grabada (`realtime=True`) o lo
+más rápido posible.
+
+`RecordingPool` y `ReplayPool` son pools con la misma interfaz que
+`DriverPool`, así que se pasan a los bots con `pool=` sin otros cambios.
+
+Uso típico:
+    pool = RecordingPool(options_factory, "recordings/speedtest")
+    bot = InternetSpeedXBot(pool=pool); bot.measure(); bot.close()
+
+    pool = ReplayPool(pool.recordings)
+    bot = InternetSpeedXBot(pool=pool); bot.measure(); bot.close()
+"""
+
+import gzip
+import json
+import os
+import threading
+import time
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
+
+from common.driver_pool import DriverPool
+
+FORMAT_VERSION = 1
+
+
+class ReplayMismatchError(WebDriverException):
+    """El código pidió un comando distinto del grabado en esa posición."""
+
+
+class ReplayExhaustedError(WebDriverException):
+    """El código pidió más comandos de los que tiene la grabación."""
+
+
+# ---------- GRABACIÓN ----------
+class CommandRecorder:
+    """Graba los comandos que pasan por el `command_executor` de un driver.
+
+    Attributes:
+        path (str): Archivo de la grabación.
+        commands (int): Comandos grabados.
+    """
+
+    def __init__(self, driver, path):
+        self.path = path
+        self.commands = 0
+        self._executor = driver.command_executor
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._write({"format": "wdrec", "version": FORMAT_VERSION, "capabilities": driver.caps})
+
+        execute = self._executor.execute
+
+        def recorded_execute(command, params):
+            start = time.perf_counter()
+            try:
+                response = execute(command, params)
+            except Exception as e:
+                self._record(command, params, None, f"{type(e).__name__}: {e}", time.perf_counter() - start)
+                raise
+            self._record(command, params, response, None, time.perf_counter() - start)
+            return response
+
+        self._executor.execute = recorded_execute
+
+    def _write(self, entry):
+        self._file.write(json.dumps(entry, separators=(",", ":"), default=str))
+        self._file.write("\n")
+
+    def _record(self, command, params, response, error, seconds):
+        entry = {"c": command, "t": round(seconds, 6)}
+        if params:
+            entry["p"] = {k: v for k, v in params.items() if k != "sessionId"}
+        if error is None:
+            entry["r"] = response
+        else:
+            entry["e"] = error
+        with self._lock:
+            if self._file is not None:
+                self._write(entry)
+                self.commands += 1
+
+    def close(self):
+        """Deja de grabar y cierra el archivo."""
+
+        with self._lock:
+            if self._file is None:
+                return
+            self._executor.__dict__.pop("execute", None)
+            self._file.close()
+            self._file = None
+
+
+def install_recorder(driver, path):
+    """Empieza a grabar los comandos del driver en `path`.
+
+    Returns:
+        CommandRecorder: Grabador; `close()` termina la grabación.
+    """
+
+    return CommandRecorder(driver, path)
+
+
+def load_recording(path):
+    """Lee una grabación.
+
+    Returns:
+        tuple[dict, list[dict]]: Encabezado y comandos grabados.
+    """
+
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        if header.get("format") != "wdrec":
+            raise ValueError(f"{path} no es una grabación de comandos WebDriver.")
+        return header, [json.loads(line) for line in f if line.strip()]
+
+
+# ---------- REPRODUCCIÓN ----------
+class ReplayExecutor:
+    """`command_executor` que responde con los comandos grabados, en orden.
+
+    Los bucles de sondeo (`WebDriverWait`, esperas de readiness) terminan por tiempo, así que
+    al reproducir más rápido o más lento pueden pedir más o menos vueltas que las grabadas.
+    Si el comando pedido no coincide con el grabado se tolera eso: una vuelta extra del mismo
+    comando recibe otra vez la última respuesta, y las vueltas grabadas de más se saltean.
+
+    Args:
+        path (str): Grabación a reproducir.
+        realtime (bool, optional): Si es True, cada respuesta tarda lo mismo que en la grabación.
+
+    Attributes:
+        position (int): Comandos ya reproducidos.
+        repeated (int): Respuestas repetidas por vueltas de sondeo extra.
+        skipped (int): Comandos grabados salteados porque el sondeo terminó antes.
+    """
+
+    # Comandos del ciclo de vida que se responden aunque no estén grabados
+    _SYNTHETIC = {
+        Command.NEW_SESSION: lambda header: {"sessionId": "replay", "capabilities": header.get("capabilities") or {}},
+        Command.QUIT: lambda header: None,
+    }
+
+    def __init__(self, path, realtime=False):
+        self.path = path
+        self.realtime = realtime
+        self.header, self.entries = load_recording(path)
+        self.position = 0
+        self.repeated = 0
+        self.skipped = 0
+        self._last = None
+        self.keep_alive = False
+        self._url = "replay://" + os.path.basename(path)
+        self._lock = threading.Lock()
+
+    def execute(self, command, params):
+        with self._lock:
+            entry = self._next(command)
+            if entry is None or entry["c"] != command:
+                if command in self._SYNTHETIC:
+                    return {"value": self._SYNTHETIC[command](self.header)}
+                if entry is None:
+                    raise ReplayExhaustedError(
+                        f"La grabación terminó ({len(self.entries)} comandos) y se pidió '{command}'."
+                    )
+                raise ReplayMismatchError(
+                    f"Comando {self.position}: se pidió '{command}' pero se grabó '{entry['c']}'."
+                )
+            self.position += 1
+            self._last = entry
+
+        if self.realtime:
+            time.sleep(entry["t"])
+        if "e" in entry:
+            raise WebDriverException(f"(grabado) {entry['e']}")
+        # Copia: Selenium modifica la respuesta al desempaquetar elementos
+        return json.loads(json.dumps(entry["r"]))
+
+    def _next(self, command):
+        """Próximo comando grabado, tolerando diferencias en la cantidad de vueltas de un sondeo."""
+
+        entry = self.entries[self.position] if self.position < len(self.entries) else None
+        if entry is not None and entry["c"] == command:
+            return entry
+        last = self._last
+        if last is None:
+            return entry
+        if command == last["c"]:
+            # Vuelta de sondeo extra: misma respuesta que la anterior (sin avanzar)
+            self.repeated += 1
+            self.position -= 1
+            return last
+        # El sondeo terminó antes que en la grabación: se saltean sus vueltas restantes
+        while entry is not None and entry["c"] == last["c"]:
+            self.position += 1
+            self.skipped += 1
+            entry = self.entries[self.position] if self.position < len(self.entries) else None
+        return entry
+
+    def remaining(self):
+        """Comandos grabados que todavía no se reprodujeron."""
+
+        return len(self.entries) - self.position
+
+    def close(self):
+        pass
+
+
+class ReplayDriver(RemoteWebDriver):
+    """`WebDriver` sin navegador que reproduce una grabación.
+
+    Args:
+        path (str): Grabación (de `install_recorder()`).
+        realtime (bool, optional): Reproduce con la latencia grabada en lugar de lo más rápido posible.
+
+    Attributes:
+        replay (ReplayExecutor): Estado de la reproducción.
+    """
+
+    def __init__(self, path, realtime=False):
+        self.replay = ReplayExecutor(path, realtime)
+        super().__init__(command_executor=self.replay, options=Options())
+
+    def execute_cdp_cmd(self, cmd, cmd_args):
+        """Igual que en `webdriver.Chrome`: los comandos CDP también se reproducen."""
+
+        return self.execute("executeCdpCommand", {"cmd": cmd, "params": cmd_args})["value"]
+
+
+# ---------- POOLS ----------
+class RecordingPool(DriverPool):
+    """`DriverPool` que graba cada préstamo en un archivo propio.
+
+    La grabación empieza al prestar el navegador y termina al devolverlo (antes de que
+    el pool lo limpie), así que cubre exactamente lo que hizo el bot.
+
+    Args:
+        options_factory (Callable[[int], Options]): Como en `DriverPool`.
+        directory (str): Carpeta de las grabaciones.
+        prefix (str, optional): Prefijo de los archivos (`<prefix>-<n>.wdrec`).
+        **kwargs: Argumentos de `DriverPool`.
+
+    Attributes:
+        recordings (list[str]): Archivos grabados, en orden.
+    """
+
+    def __init__(self, options_factory, directory, prefix="run", **kwargs):
+        super().__init__(options_factory, **kwargs)
+        self.directory = directory
+        self.prefix = prefix
+        self.recordings = []
+        self._recorders = {}
+
+    def lease(self):
+        lease = super().lease()
+        path = os.path.join(self.directory, f"{self.prefix}-{len(self.recordings):03d}.wdrec")
+        self._recorders[id(lease)] = install_recorder(lease.driver, path)
+        self.recordings.append(path)
+        return lease
+
+    def _release(self, lease, discard=False):
+        recorder = self._recorders.pop(id(lease), None)
+        if recorder is not None:
+            recorder.close()
+        super()._release(lease, discard=discard)
+
+
+class ReplayPool(DriverPool):
+    """Pool sin navegadores: cada préstamo reproduce la siguiente grabación de la lista.
+
+    Args:
+        recordings (list[str]): Grabaciones, en el orden en que se van a prestar.
+        realtime (bool, optional): Reproduce con la latencia grabada.
+
+    Attributes:
+        replayed (list[ReplayExecutor]): Reproducciones ya prestadas (para ver `remaining()`).
+    """
+
+    def __init__(self, recordings, realtime=False):
+        super().__init__(lambda slot: None, size=1)
+        self.recordings = list(recordings)
+        self.realtime = realtime
+        self.replayed = []
+
+    def _launch(self, slot):
+        if not self.recordings:
+            raise ReplayExhaustedError("No quedan grabaciones para prestar.")
+        driver = ReplayDriver(self.recordings.pop(0), self.realtime)
+        self.replayed.append(driver.replay)
+        return driver
+
+    def _release(self, lease, discard=False):
+        # Cada grabación se reproduce una sola vez: el driver nunca vuelve al pool
+        super()._release(lease, discard=True)
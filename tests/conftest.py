@@ -0,0 +1,9 @@
+import sys
+from pathlib import Path
+
+# Los módulos compartidos se importan como `common.*`, igual que desde los bots
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# Los módulos de TwitterBot usan imports planos de su carpeta (`from measurements import ...`)
+sys.path.insert(1, str(ROOT / "TwitterBot"))
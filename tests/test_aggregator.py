@@ -0,0 +1,104 @@
+"""Colector contra un `AggregatorServer` local: deduplicación, tandas rechazadas (400) y reintento (500)."""
+
+import json
+import sqlite3
+import urllib.error
+import urllib.request
+
+import pytest
+
+from aggregator import AggregatorServer, BatchError, FleetStore
+from collector import Collector, Spool
+
+
+@pytest.fixture
+def server():
+    store = FleetStore(":memory:")
+    with AggregatorServer(store) as server:
+        yield server
+    store.close()
+
+
+def _collector(server):
+    return Collector(server.url(), site="test", node="n1", spool=Spool(":memory:"), timeout=5)
+
+
+def _rejected(spool):
+    return spool._conn.execute("SELECT uid, reason FROM rejected ORDER BY seq").fetchall()
+
+
+def test_resent_rows_are_counted_as_duplicates(server):
+    collector = _collector(server)
+    rows = [("a", 1.0, 100.0, 50.0, 10.0, "srv"), ("b", 2.0, 90.0, 40.0, 12.0, "srv")]
+    collector.spool.put(rows)
+    assert collector.flush()
+
+    # Mismos `uid` en otra tanda (la respuesta anterior se "perdió"): el agregador no los duplica
+    collector.spool.put(rows + [("c", 3.0, 80.0, 30.0, 15.0, None)])
+    assert collector.flush()
+    collector.stop()
+
+    assert server.store.count() == 3
+    assert collector.stats["sent"] == 3
+    assert collector.stats["duplicates"] == 2
+    assert collector.spool.pending() == 0
+
+
+@pytest.mark.parametrize("row", [
+    ("", 1.0, 100.0, 50.0, 10.0, "srv"),      # uid vacío
+    ("a", "ayer", 100.0, 50.0, 10.0, "srv"),  # ts no numérico
+])
+def test_invalid_rows_are_dead_lettered(server, row):
+    collector = _collector(server)
+    collector.spool.put([row])
+    assert collector.flush()
+    collector.stop()
+
+    assert server.store.count() == 0
+    assert collector.stats["rejected"] == 1
+    assert collector.spool.pending() == 0
+    [(uid, reason)] = _rejected(collector.spool)
+    assert uid == row[0]
+    assert reason.startswith("HTTP 400")
+
+
+def test_storage_errors_are_retried(server, monkeypatch):
+    ingest = server.store.ingest
+    calls = []
+
+    def flaky_ingest(batch):
+        calls.append(batch)
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        return ingest(batch)
+
+    monkeypatch.setattr(server.store, "ingest", flaky_ingest)
+    collector = _collector(server)
+    collector.spool.put([("a", 1.0, 100.0, 50.0, 10.0, "srv")])
+
+    assert not collector.flush()                  # 500: la tanda sigue en la cola
+    assert collector.spool.pending() == 1
+    assert collector.stats["errors"] == 1
+    assert collector.flush()
+    collector.stop()
+
+    assert server.store.count() == 1
+    assert collector.stats["rejected"] == 0
+    assert _rejected(collector.spool) == []
+
+
+@pytest.mark.parametrize("row", [
+    [None, 1.0, 100.0, 50.0, 10.0, "srv"],        # uid nulo (antes se contaba como repetido)
+    ["a", 1.0, {"mbps": 100}, 50.0, 10.0, "srv"],  # campo no escalar (antes, sqlite3.Error y 500)
+    ["a", True, 100.0, 50.0, 10.0, "srv"],
+])
+def test_malformed_rows_get_400(server, row):
+    body = json.dumps({"site": "s", "node": "n", "rows": [row]}).encode("utf-8")
+    request = urllib.request.Request(server.url("/v1/results"), data=body, method="POST")
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(request, timeout=5)
+    assert error.value.code == 400
+    assert server.store.count() == 0
+
+    with pytest.raises(BatchError):
+        server.store.ingest({"site": "s", "node": "n", "rows": [row]})
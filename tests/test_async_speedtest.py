@@ -0,0 +1,61 @@
+"""`async_speedtest.measure()` contra los endpoints `/__down` y `/__up` de `bench.server.FixtureServer`."""
+
+import time
+
+import pytest
+
+from async_speedtest import ThroughputConfig, measure
+from bench.server import FixtureServer
+
+
+@pytest.fixture
+def server():
+    with FixtureServer() as server:
+        yield server
+
+
+def _config(server, **overrides):
+    config = ThroughputConfig.from_env(server.url())
+    config.streams = 2
+    config.duration = 0.5
+    config.warmup = 0
+    config.request_bytes = 256 * 1024
+    config.latency_samples = 3
+    config.timeout = 5
+    for name, value in overrides.items():
+        setattr(config, name, value)
+    return config
+
+
+def test_counts_the_bytes_each_direction_moved(server):
+    config = _config(server)
+    result = measure(config)
+    served = server.transferred
+
+    # Sin warm-up se cuenta todo lo leído; como mucho queda una respuesta a medio leer por stream
+    assert served["down"] - config.streams * config.request_bytes <= result.details["down_bytes"] <= served["down"]
+    # Una subida completa llega entera al servidor; la que cortó el deadline puede no haber llegado
+    assert config.request_bytes <= served["up"] <= result.details["up_bytes"]
+    assert result.down == pytest.approx(result.details["down_bytes"] * 8 / result.details["down_seconds"] / 1e6)
+    assert result.server == server.url().split("/")[2]
+    assert result.latency > 0
+
+
+def test_deadline_cuts_long_transfers(server):
+    # Una sola transferencia de 10 GB no termina en 0.3 s: el deadline la corta en ambas direcciones
+    config = _config(server, streams=1, duration=0.3, request_bytes=10 * 1024 ** 3)
+    started = time.monotonic()
+    result = measure(config)
+
+    assert time.monotonic() - started < 3
+    assert 0 < result.details["down_bytes"] < config.request_bytes
+    assert 0 < result.details["up_bytes"] < config.request_bytes
+    assert result.details["down_seconds"] == pytest.approx(config.duration, abs=0.2)
+
+
+# Antes, `measure_latency` cronometraba la página de error como si fuera una muestra
+@pytest.mark.parametrize("endpoint", ["latency_url", "download_url"])
+def test_error_responses_raise(server, endpoint):
+    broken = server.url("/no-existe?bytes={bytes}" if endpoint == "download_url" else "/no-existe")
+    with pytest.raises(ConnectionError, match="HTTP 404"):
+        measure(_config(server, **{endpoint: broken}))
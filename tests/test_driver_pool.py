@@ -0,0 +1,88 @@
+"""Reutilización de navegadores del `DriverPool`, con un driver falso en lugar de Chrome."""
+
+import pytest
+
+pytest.importorskip("selenium")
+
+from selenium.common.exceptions import WebDriverException
+
+from common import driver_pool
+
+
+class FakeSwitchTo:
+    def __init__(self, driver):
+        self._driver = driver
+
+    def window(self, handle):
+        self._driver.current_window = handle
+
+
+class FakeDriver:
+    """Lo mínimo que usa `reset_driver_state`; CDP rechaza orígenes inválidos como Chrome."""
+
+    def __init__(self):
+        self.window_handles = ["main"]
+        self.current_window = "main"
+        self.current_url = "https://www.speedtest.net/result/123"
+        self.switch_to = FakeSwitchTo(self)
+        self.cleared_origins = []
+        self.quit_called = False
+
+    def close(self):
+        self.window_handles.remove(self.current_window)
+
+    def execute_script(self, script, *args):
+        return None
+
+    def execute_cdp_cmd(self, cmd, params):
+        if cmd == "Storage.clearDataForOrigin":
+            if not params["origin"].startswith(("http://", "https://")):
+                raise WebDriverException("Invalid security origin")
+            self.cleared_origins.append(params["origin"])
+        return {}
+
+    def get(self, url):
+        self.current_url = url
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def launched(monkeypatch):
+    drivers = []
+
+    def fake_launch(options, service=None):
+        drivers.append(FakeDriver())
+        return drivers[-1]
+
+    monkeypatch.setattr(driver_pool, "launch_driver", fake_launch)
+    return drivers
+
+
+def test_second_lease_reuses_the_released_driver(launched):
+    pool = driver_pool.DriverPool(lambda slot: None, size=1, origins=("https://www.speedtest.net/",))
+
+    with pool.lease() as first:
+        first.window_handles.append("popup")
+    assert first.window_handles == ["main"]
+    assert first.cleared_origins == ["https://www.speedtest.net"]
+
+    with pool.lease() as second:
+        pass
+
+    assert second is first
+    assert len(launched) == 1
+    assert not first.quit_called
+    stats = pool.stats()
+    assert stats["cold_starts"] == 1 and stats["resets"] == 2 and stats["discarded"] == 0
+
+
+def test_reset_clears_current_page_and_known_origins():
+    driver = FakeDriver()
+    driver.current_url = "https://www.instagram.com/chefsteps/"
+
+    driver_pool.reset_driver_state(driver, {"https://www.speedtest.net"})
+
+    assert driver.cleared_origins == ["https://www.instagram.com", "https://www.speedtest.net"]
+    assert driver.current_url == "about:blank"
@@ -0,0 +1,52 @@
+"""`TrafficMeter` sobre un navegador falso que entrega eventos del log "performance"."""
+
+import json
+
+import pytest
+
+pytest.importorskip("selenium")
+
+from common.cdp_log import get_event_log
+from common.measurement_mode import TrafficMeter
+
+
+class FakeDriver:
+    def __init__(self):
+        self.entries = []
+
+    def emit(self, method, **params):
+        self.entries.append({"message": json.dumps({"message": {"method": method, "params": params}})})
+
+    def get_log(self, kind):
+        entries, self.entries = self.entries, []
+        return entries
+
+
+def _load(driver, request_id, url, size):
+    driver.emit("Network.requestWillBeSent", requestId=request_id, request={"url": url})
+    driver.emit("Network.loadingFinished", requestId=request_id, encodedDataLength=size)
+
+
+def test_counts_test_and_overhead_bytes():
+    driver = FakeDriver()
+    meter = TrafficMeter(driver, ["*speedtest*"])
+    _load(driver, "1", "https://www.speedtest.net/api/download", 1000)
+    _load(driver, "2", "https://ads.example.com/banner.js", 300)
+
+    summary = meter.collect()
+    assert (summary["test_bytes"], summary["overhead_bytes"]) == (1000, 300)
+
+
+def test_close_unsubscribes_from_the_shared_log():
+    driver = FakeDriver()
+    first = TrafficMeter(driver, ["*speedtest*"])
+    first.close()
+    first.close()
+
+    # El mismo navegador, devuelto al pool y prestado otra vez: solo cuenta el contador nuevo
+    second = TrafficMeter(driver, ["*speedtest*"])
+    _load(driver, "1", "https://ads.example.com/banner.js", 300)
+
+    assert second.collect()["overhead_bytes"] == 300
+    assert first.collect()["overhead_bytes"] == 0
+    assert get_event_log(driver)._listeners == [second._on_event]
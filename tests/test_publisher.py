@@ -0,0 +1,155 @@
+"""`Publisher` y `Outbox` contra un servidor HTTP local en lugar de la API de X (`X_API_BASE_URL`)."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("tweepy")
+
+import publisher
+from common.retry import RetryPolicy
+from publisher import Outbox, Publisher, rate_limit_pause
+
+
+class _FakeXHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.server.received.append((self.path, json.loads(body)))
+        status, headers = self.server.responses.pop(0) if self.server.responses else (201, {})
+        payload = {"data": {"id": str(len(self.server.received)), "text": ""}} if status < 300 else {
+            "title": "error", "detail": "error", "errors": [{"message": "error"}]}
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def x_api(monkeypatch):
+    """Servidor que responde `POST /2/tweets` según `server.responses` (`(status, headers)` en orden)."""
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeXHandler)
+    server.daemon_threads = True
+    server.received, server.responses = [], []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    monkeypatch.setenv("X_API_BASE_URL", f"http://{host}:{port}")
+    for name in ("X_API_KEY", "X_API_KEY_SECRET", "X_ACCESS_TOKEN", "X_ACCESS_TOKEN_SECRET"):
+        monkeypatch.setenv(name, "test")
+    monkeypatch.setattr(publisher, "_client", None)  # El cliente del proceso se crea con esta URL
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _attempts(outbox, item_id):
+    return outbox._conn.execute("SELECT attempts, next_attempt, status FROM outbox WHERE id = ?",
+                                (item_id,)).fetchone()
+
+
+def test_outbox_survives_reopen(tmp_path):
+    path = str(tmp_path / "outbox.db")
+    item_id = Outbox(path).enqueue("hola")
+
+    reopened = Outbox(path)
+    assert reopened.pending_count() == 1
+    assert reopened.next_due() == (item_id, "hola", 0)
+
+
+def test_rate_limit_pause_reads_both_limits():
+    now = 1000.0
+    assert rate_limit_pause({"x-rate-limit-remaining": "3", "x-rate-limit-reset": "2000"}, now) is None
+    assert rate_limit_pause({"x-rate-limit-remaining": "0", "x-rate-limit-reset": "900"}, now) is None
+    assert rate_limit_pause({"x-rate-limit-remaining": "0", "x-rate-limit-reset": "2000"}, now) == 2000.0
+    assert rate_limit_pause({
+        "x-rate-limit-remaining": "0", "x-rate-limit-reset": "2000",
+        "x-user-limit-24hour-remaining": "0", "x-user-limit-24hour-reset": "5000",
+    }, now) == 5000.0
+
+
+def test_sends_through_the_local_server(tmp_path, x_api):
+    reset = int(time.time()) + 600
+    x_api.responses.append((201, {"x-rate-limit-remaining": "0", "x-rate-limit-reset": str(reset)}))
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    pub = Publisher(outbox)
+    item_id = outbox.enqueue("Hola proveedor")
+
+    pub._send(*outbox.next_due())
+
+    assert x_api.received == [("/2/tweets", {"text": "Hola proveedor"})]
+    assert _attempts(outbox, item_id)[2] == "sent"
+    assert pub.stats["sent"] == 1
+    assert pub.paused_until == reset  # Sin cuota: el próximo envío espera al reset
+
+
+def test_429_reschedules_without_counting_an_attempt(tmp_path, x_api):
+    reset = int(time.time()) + 600
+    x_api.responses.append((429, {"x-rate-limit-remaining": "0", "x-rate-limit-reset": str(reset)}))
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    pub = Publisher(outbox, max_attempts=1)
+    item_id = outbox.enqueue("Hola proveedor")
+
+    pub._send(*outbox.next_due())
+
+    assert _attempts(outbox, item_id) == (0, reset, "pending")
+    assert pub.stats["rate_limited"] == 1
+    assert pub.paused_until == reset
+    assert outbox.next_due() is None
+
+
+def test_5xx_backs_off_and_counts_the_attempt(tmp_path, x_api):
+    x_api.responses.append((503, {}))
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    pub = Publisher(outbox, retry_policy=RetryPolicy(base_delay=30, max_delay=30, jitter="none"))
+    item_id = outbox.enqueue("Hola proveedor")
+
+    before = time.time()
+    pub._send(*outbox.next_due())
+
+    attempts, next_attempt, status = _attempts(outbox, item_id)
+    assert (attempts, status) == (1, "pending")
+    assert before + 30 <= next_attempt <= time.time() + 30
+    assert pub.stats["retried"] == 1
+    assert pub.paused_until is None
+
+    # El siguiente intento (ya vencido) se publica
+    outbox.reschedule(item_id, 0, None, count_attempt=False)
+    pub._send(*outbox.next_due())
+    assert _attempts(outbox, item_id)[2] == "sent"
+    assert len(x_api.received) == 2
+
+
+def test_below_promise_measurements_are_coalesced(tmp_path, x_api):
+    outbox = Outbox(str(tmp_path / "outbox.db"))
+    pub = Publisher(outbox, coalesce_window=3600, coalesce_max=3,
+                    digest_formatter=lambda samples: f"{len(samples)} mediciones bajo lo contratado")
+    pub.start = lambda: None  # Sin hilo: el resumen se arma a mano con `take_digest`
+
+    assert pub.publish_measurement("individual", 10, 5, below_promise=True) is None
+    assert pub.publish_measurement("individual", 12, 6, below_promise=True) is None
+    assert outbox.take_digest(pub.digest_formatter, pub.coalesce_window, pub.coalesce_max) is None
+    pub.publish_measurement("individual", 11, 4, below_promise=True)
+
+    item_id = outbox.take_digest(pub.digest_formatter, pub.coalesce_window, pub.coalesce_max)
+    assert outbox.next_due() == (item_id, "3 mediciones bajo lo contratado", 0)
+    assert outbox.take_digest(pub.digest_formatter, pub.coalesce_window, pub.coalesce_max) is None
+
+    # Vencida la ventana, una sola muestra alcanza
+    outbox.add_digest_sample(9, 3, ts=time.time() - 7200)
+    assert outbox.take_digest(pub.digest_formatter, pub.coalesce_window, pub.coalesce_max) is not None
+
+    pub._send(*outbox.next_due())
+    assert x_api.received[0][1] == {"text": "3 mediciones bajo lo contratado"}
@@ -0,0 +1,84 @@
+"""`SpeedCache`: TTL, `force_refresh` y single-flight entre hilos."""
+
+import threading
+import time
+
+from speed_cache import SpeedCache
+
+
+class _Measure:
+    """Test de velocidad falso que cuenta cuántas veces corrió."""
+
+    def __init__(self, duration=0.0):
+        self.duration = duration
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+            calls = self.calls
+        time.sleep(self.duration)
+        return {"down": 100.0 + calls, "up": 50.0}
+
+
+def test_ttl_hit_and_miss(tmp_path):
+    cache = SpeedCache(path=str(tmp_path / "cache.json"), ttl=60)
+    measure = _Measure()
+
+    first, hit = cache.get("speedtest.net", measure)
+    assert not hit and first["down"] == 101.0
+    assert cache.get("speedtest.net", measure) == (first, True)
+    assert measure.calls == 1
+
+    # Otro destino no reutiliza la medición
+    assert cache.get("otro", measure)[1] is False
+
+    # Una entrada más vieja que el TTL ya no sirve
+    cache._write({"speedtest.net": dict(first, ts=time.time() - 120)})
+    entry, hit = cache.get("speedtest.net", measure)
+    assert not hit and entry["down"] == 103.0
+    assert cache.stats == {"hits": 1, "misses": 3, "coalesced": 0, "forced": 0}
+
+
+def test_cache_is_shared_through_the_file(tmp_path):
+    path = str(tmp_path / "cache.json")
+    entry, _ = SpeedCache(path=path, ttl=60).get("speedtest.net", _Measure())
+
+    # Otra instancia (otro proceso, en la práctica) lee la misma medición
+    assert SpeedCache(path=path, ttl=60).get("speedtest.net", _Measure()) == (entry, True)
+
+
+def test_force_refresh_always_measures(tmp_path):
+    cache = SpeedCache(path=str(tmp_path / "cache.json"), ttl=60)
+    measure = _Measure()
+    cache.get("speedtest.net", measure)
+
+    entry, hit = cache.get("speedtest.net", measure, force_refresh=True)
+    assert not hit and entry["down"] == 102.0
+    assert cache.peek("speedtest.net") == entry
+    assert cache.stats["forced"] == 1
+    assert measure.calls == 2
+
+
+def test_concurrent_threads_share_one_measurement(tmp_path):
+    cache = SpeedCache(path=str(tmp_path / "cache.json"), ttl=60)
+    measure = _Measure(duration=0.5)
+    barrier = threading.Barrier(4)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(cache.get("speedtest.net", measure))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert measure.calls == 1
+    assert sorted(hit for _, hit in results) == [False, True, True, True]
+    assert len({entry["ts"] for entry, _ in results}) == 1
+    assert cache.stats["misses"] == 1
+    assert cache.stats["coalesced"] == 3
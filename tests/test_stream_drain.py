@@ -0,0 +1,87 @@
+"""`_STREAM_DRAIN_JS` de `InstagramBot/batch_actions.py`, ejecutado con Node sobre un diálogo simulado.
+
+El script se lee del fuente (sin importar el módulo, que necesita Selenium) y corre
+como lo haría `execute_async_script`: el último argumento es el callback de respuesta.
+"""
+
+import ast
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+BATCH_ACTIONS = Path(__file__).resolve().parent.parent / "InstagramBot" / "batch_actions.py"
+
+pytestmark = pytest.mark.skipif(shutil.which("node") is None, reason="Node no está instalado")
+
+
+def _script(name):
+    tree = ast.parse(BATCH_ACTIONS.read_text(encoding="utf-8"))
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == name for t in node.targets):
+            return node.value.value
+    raise LookupError(name)
+
+
+_HARNESS = """
+const stream = { queue: [], drained: [], waiters: [] };
+const dlg = { __botStream: stream, dispatchEvent() {} };
+globalThis.document = { querySelector: () => dlg };
+globalThis.WheelEvent = class { constructor(type, init) { Object.assign(this, init); } };
+const drain = function () { %s };
+const call = (waitMs) => new Promise((resolve) => drain(20, 5, 900, waitMs, resolve));
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+// Lo que hace el MutationObserver al encolar filas nuevas
+const mutate = (ids) => {
+    for (const id of ids) { stream.queue.push({ id: id, username: 'u' + id, state: 'follow', label: 'Seguir' }); }
+    stream.waiters.splice(0).forEach((wake) => wake());
+};
+(async () => {
+    const steps = await (%s)();
+    console.log(JSON.stringify({ steps: steps, drained: stream.drained, waiters: stream.waiters.length }));
+})();
+"""
+
+
+def _run(scenario):
+    source = _HARNESS % (_script("_STREAM_DRAIN_JS"), scenario)
+    output = subprocess.run(["node", "-e", source], capture_output=True, text=True, timeout=30, check=True).stdout
+    return json.loads(output)
+
+
+def _ids(result):
+    return [row["id"] for row in result["rows"]]
+
+
+def test_rows_after_timeout_reach_the_next_call():
+    result = _run("""async () => {
+        const first = await call(20);          // Vence la espera: nadie agregó filas
+        await sleep(10);
+        mutate(['1', '2', '3']);               // El observer despierta después del timeout
+        const second = await call(20);
+        return [first, second];
+    }""")
+    first, second = result["steps"]
+    assert _ids(first) == []
+    assert _ids(second) == ["1", "2", "3"]
+    assert result["drained"] == ["1", "2", "3"]
+    assert result["waiters"] == 0
+
+
+def test_waiting_call_is_woken_once_by_new_rows():
+    result = _run("""async () => {
+        const pending = call(1000);
+        await sleep(10);
+        mutate(['1']);
+        const first = await pending;
+        await sleep(10);
+        mutate(['2']);
+        const second = await call(20);
+        return [first, second];
+    }""")
+    first, second = result["steps"]
+    assert _ids(first) == ["1"]
+    assert _ids(second) == ["2"]
+    assert result["waiters"] == 0